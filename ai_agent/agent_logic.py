@@ -0,0 +1,164 @@
+# Path: ai_agent/agent_logic.py
+# Outbound call dispatcher: queues calls, runs N at a time, rate-limits each
+# provider and retries failed attempts with jittered backoff.
+import asyncio
+import itertools
+import random
+import time
+import uuid
+
+class RateLimiter:
+    """Token bucket: at most `per_minute` acquisitions per minute, `burst` at once."""
+
+    def __init__(self, per_minute, burst=None):
+        self.rate = per_minute / 60.0
+        self.capacity = burst if burst is not None else max(1.0, self.rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class CallDispatcher:
+    """
+    Async job queue for outbound agent calls.
+
+    - enqueue() persists the job (via `store`) and returns a unique call ID;
+      enqueue_many() does the same for a bulk list in one store write
+    - jobs run lowest `priority` first (0 = manual calls), FIFO within a priority
+    - `concurrency` worker tasks place calls; each provider has its own RateLimiter
+    - failed attempts retry with exponential backoff + full jitter, up to `max_attempts`
+    - queued jobs in the store are re-queued by start(), so a restart loses nothing;
+      stop() puts the calls it cancels mid-dial back in the queue, while jobs a
+      crash left mid-dial are marked for review (the call may have gone through)
+    - `on_complete(summary)` receives each finished call's summary
+    """
+
+    def __init__(self, store, providers, default_provider, concurrency, max_attempts=3,
+                 retry_base_seconds=2.0, on_complete=None):
+        self.store = store
+        self.providers = providers  # name -> (provider, RateLimiter)
+        self.default_provider = default_provider
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.on_complete = on_complete
+        self.queue = asyncio.PriorityQueue()
+        self._seq = itertools.count()  # FIFO tie-break inside a priority
+        self._workers = []
+        self._retries = set()
+        self._dialing = set()  # call IDs with a place_call() in flight
+        self.stats = {"completed": 0, "failed": 0, "retried": 0}
+
+    async def start(self, resume=True):
+        # resume=False: another process owns the unfinished jobs
+        if resume:
+            interrupted = await asyncio.to_thread(self.store.mark_interrupted)
+            if interrupted:
+                print(f"⚠️ {interrupted} calls were cut off mid-dial, marked needs_review (not redialed)")
+            for job in await asyncio.to_thread(self.store.unfinished):
+                self._put(job)
+        if self.queue.qsize():
+            print(f"📞 Resuming {self.queue.qsize()} unfinished calls")
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        # Queued jobs stay "queued" in the store and resume on next start()
+        for task in self._workers + list(self._retries):
+            task.cancel()
+        await asyncio.gather(*self._workers, *self._retries, return_exceptions=True)
+        self._workers = []
+        self._retries.clear()
+        # Cancelled here, not lost in a crash: dial them again next time
+        if self._dialing:
+            await asyncio.to_thread(self.store.requeue, list(self._dialing))
+            print(f"📞 {len(self._dialing)} calls stopped mid-dial, re-queued")
+            self._dialing.clear()
+
+    def _put(self, job):
+        self.queue.put_nowait((job.get('priority', 0), next(self._seq), job))
+
+    def _new_job(self, student_id, provider, priority):
+        provider = provider or self.default_provider
+        if provider not in self.providers:
+            raise ValueError(f"Unknown call provider: {provider}")
+        return {'call_id': uuid.uuid4().hex, 'student_id': student_id,
+                'provider': provider, 'attempts': 0, 'priority': priority}
+
+    async def enqueue(self, student_id, provider=None, priority=0):
+        job = self._new_job(student_id, provider, priority)
+        await asyncio.to_thread(self.store.create, job['call_id'], student_id, job['provider'], priority)
+        self._put(job)
+        return job['call_id']
+
+    async def enqueue_many(self, requests, provider=None):
+        """requests: [(student_id, priority), ...] -> call IDs, persisted in one write."""
+        jobs = [self._new_job(student_id, provider, priority) for student_id, priority in requests]
+        await asyncio.to_thread(self.store.create_many, jobs)
+        for job in jobs:
+            self._put(job)
+        return [job['call_id'] for job in jobs]
+
+    @property
+    def depth(self):
+        return self.queue.qsize()
+
+    async def _worker(self):
+        while True:
+            _, _, job = await self.queue.get()
+            try:
+                await self._attempt(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Dispatcher error on call {job['call_id']}: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def _attempt(self, job):
+        provider, limiter = self.providers[job['provider']]
+        await limiter.acquire()
+
+        job['attempts'] += 1
+        await asyncio.to_thread(self.store.update, job['call_id'], status="dialing", attempts=job['attempts'])
+        self._dialing.add(job['call_id'])
+        try:
+            summary = await provider.place_call(job['call_id'], job['student_id'])
+        except Exception as e:
+            self._dialing.discard(job['call_id'])
+            await self._retry_or_fail(job, e)
+            return
+        self._dialing.discard(job['call_id'])
+
+        await asyncio.to_thread(self.store.update, job['call_id'], status="completed", last_error=None)
+        self.stats["completed"] += 1
+        if self.on_complete is not None:
+            await self.on_complete(summary)
+
+    async def _retry_or_fail(self, job, error):
+        if job['attempts'] >= self.max_attempts:
+            await asyncio.to_thread(self.store.update, job['call_id'], status="failed", last_error=str(error))
+            self.stats["failed"] += 1
+            print(f"❌ Call {job['call_id']} to {job['student_id']} failed after {job['attempts']} attempts: {error}")
+            return
+
+        await asyncio.to_thread(self.store.update, job['call_id'], status="queued", last_error=str(error))
+        self.stats["retried"] += 1
+        # Full jitter: spread retries out so a provider outage doesn't cause a thundering herd
+        delay = random.uniform(0, self.retry_base_seconds * 2 ** (job['attempts'] - 1))
+        task = asyncio.create_task(self._requeue_later(job, delay))
+        self._retries.add(task)
+        task.add_done_callback(self._retries.discard)
+
+    async def _requeue_later(self, job, delay):
+        await asyncio.sleep(delay)
+        self._put(job)
@@ -1,11 +1,53 @@
 # Path: ai_agent/mock_call.py
+import asyncio
 import requests
 import time
 import random
+import uuid
 
 # Configuration
 API_URL = "http://localhost:8000/api/v1"
 
+# Possible call outcomes
+OUTCOMES = [
+    {"sentiment": "Stressed", "action": "Schedule Counselor", "text": "Student is overwhelmed with part-time job. Requesting extension on assignments."},
+    {"sentiment": "Neutral", "action": "None", "text": "Student was sick last week. Will submit medical certificate tomorrow."},
+    {"sentiment": "Positive", "action": "Scholarship Info", "text": "Student is focused but worried about fees. Asked for scholarship details."}
+]
+
+class ProviderError(Exception):
+    """A call attempt failed (busy line, provider hiccup). Worth retrying."""
+
+class MockTelephonyProvider:
+    """
+    Local stand-in for Vapi.ai / Twilio used by the call dispatcher and for
+    load tests. Calls take `min_seconds`..`max_seconds` (asyncio.sleep, so
+    hundreds can be in flight) and fail with probability `failure_rate`.
+    """
+
+    name = "mock"
+
+    def __init__(self, min_seconds=2.0, max_seconds=4.0, failure_rate=0.05):
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+        self.failure_rate = failure_rate
+        self.calls_started = 0
+
+    async def place_call(self, call_id, student_id):
+        self.calls_started += 1
+        await asyncio.sleep(random.uniform(self.min_seconds, self.max_seconds))
+        if random.random() < self.failure_rate:
+            raise ProviderError("No answer")
+
+        result = random.choice(OUTCOMES)
+        return {
+            "call_id": call_id,
+            "student_id": student_id,
+            "transcript": result["text"],
+            "sentiment": result["sentiment"],
+            "action_item": result["action"]
+        }
+
 def simulate_agent_workflow(student_id):
     print(f"🤖 [Agent System] Received trigger for Student {student_id}...")
     print("📞 Dialing... (Simulating Vapi.ai / Twilio connection)")
@@ -16,17 +58,13 @@ def simulate_agent_workflow(student_id):
     time.sleep(2)
     
     # Generate a random outcome
-    outcomes = [
-        {"sentiment": "Stressed", "action": "Schedule Counselor", "text": "Student is overwhelmed with part-time job. Requesting extension on assignments."},
-        {"sentiment": "Neutral", "action": "None", "text": "Student was sick last week. Will submit medical certificate tomorrow."},
-        {"sentiment": "Positive", "action": "Scholarship Info", "text": "Student is focused but worried about fees. Asked for scholarship details."}
-    ]
-    result = random.choice(outcomes)
+    result = random.choice(OUTCOMES)
     
     print("✅ Call Finished. Sending Summary to Backend Webhook...")
     
     # PAYLOAD (Matches your Backend Model)
     payload = {
+        "call_id": uuid.uuid4().hex,  # lets the backend ignore retried webhooks
         "student_id": student_id,
         "transcript": result["text"],
         "sentiment": result["sentiment"],
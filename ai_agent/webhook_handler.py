@@ -0,0 +1,97 @@
+# Path: ai_agent/webhook_handler.py
+# Buffers call summaries from the provider webhook and writes them in batches.
+import asyncio
+
+class SummaryIngestor:
+    """
+    Acknowledge-fast ingestion for call summaries.
+
+    submit() only appends to an in-memory buffer. The buffer is handed to
+    `write_fn(summaries)` (run in a thread, one transaction per call) when it
+    reaches `max_items` or `flush_ms` after the first unwritten summary.
+
+    - Summaries are de-duplicated on call_id inside the buffer; write_fn is
+      expected to skip call_ids already stored, so retried webhooks are no-ops.
+    - Flushes run one at a time, in arrival order.
+    - A failed write puts the batch back and is retried on the next flush.
+    - close() flushes whatever is left, so acknowledged summaries are written.
+    """
+
+    def __init__(self, write_fn, max_items=200, flush_ms=250, max_pending=5000):
+        self.write_fn = write_fn
+        self.max_items = max_items
+        self.flush_delay = flush_ms / 1000.0
+        self.max_pending = max_pending
+        self._buffer = {}  # call_id (or a local key) -> summary, insertion ordered
+        self._anonymous = 0
+        self._timer = None
+        self._flushing = asyncio.Lock()
+        self._running = set()
+        self.stats = {"received": 0, "duplicates": 0, "written": 0, "flushes": 0, "failed_flushes": 0}
+
+    @property
+    def pending(self):
+        return len(self._buffer)
+
+    async def submit(self, summary):
+        self.stats["received"] += 1
+        call_id = summary.get('call_id')
+        if call_id is None:
+            # No ID to dedupe on: always keep it
+            self._anonymous += 1
+            key = ("anonymous", self._anonymous)
+        else:
+            key = call_id
+        if key in self._buffer:
+            self.stats["duplicates"] += 1
+            return False
+        self._buffer[key] = summary
+
+        if len(self._buffer) >= self.max_pending:
+            # Backpressure: don't let a slow database grow the buffer forever
+            await self.flush()
+        elif len(self._buffer) >= self.max_items:
+            self._spawn(self.flush())
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().create_task(self._flush_later())
+        return True
+
+    def _spawn(self, coro):
+        task = asyncio.get_running_loop().create_task(coro)
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_delay)
+        self._timer = None
+        await self.flush()
+
+    async def flush(self):
+        """Writes everything buffered so far, `max_items` per transaction."""
+        async with self._flushing:
+            while self._buffer:
+                keys = list(self._buffer)[:self.max_items]
+                batch = [self._buffer.pop(k) for k in keys]
+                try:
+                    written = await asyncio.to_thread(self.write_fn, batch)
+                except Exception as e:
+                    print(f"❌ Writing {len(batch)} call summaries failed, will retry: {e}")
+                    self.stats["failed_flushes"] += 1
+                    # Put them back in front of anything that arrived meanwhile
+                    self._buffer = {**dict(zip(keys, batch)), **self._buffer}
+                    if self._timer is None:
+                        self._timer = asyncio.get_running_loop().create_task(self._flush_later())
+                    return
+                self.stats["flushes"] += 1
+                self.stats["written"] += written
+                self.stats["duplicates"] += len(batch) - written
+
+    async def close(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+        await self.flush()
+        if self._buffer:
+            print(f"❌ {len(self._buffer)} call summaries could not be written on shutdown")
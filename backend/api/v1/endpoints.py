@@ -1,132 +1,310 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from .models import PredictionResponse, StudentRiskProfile, CallResponse, CallSummaryRequest
-from sqlalchemy.orm import Session
-from fastapi import Depends
-from backend.db.database import get_db, StudentDB, CallLogDB 
-import pandas as pd
-import io
-import random
-import os
-import joblib
+import asyncio
+from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Query
+from fastapi.responses import StreamingResponse, Response
+from .models import PredictionResponse, PredictionSummary, StudentRiskProfile, SingleStudentRequest, CallResponse, CallSummaryRequest, CallSummaryAck, JobStatus, JobResultsPage
+from backend.db.crud import StudentWriter
+from backend.core.scoring import score_batch, scoring_version, to_ndjson
+from backend.core.utils import iter_csv_batches
+from backend.core.config import CSV_BATCH_ROWS, SCORING_RETRY_AFTER, PERSIST_PREDICTIONS, SCORING_MODE, JOB_PAGE_MAX_ROWS
+from backend.core.workers import get_scoring_pool, PoolSaturated
+from backend.core.batching import get_micro_batcher
+from backend.core.dispatch import get_call_dispatcher, get_summary_ingestor
+from backend.core.cache import prediction_cache, hash_file
+from backend.core.escalation import EscalationCollector, escalate_students
+from backend.core.jobs import get_job_runner, read_results, eta_seconds
+from backend.core.metrics import (stage, timed, observe_timings, ROWS_SCORED, CACHE_HITS,
+                                  UPLOADS_REJECTED, WEBHOOK_SUMMARIES, CALLS_QUEUED, CASCADE_ROWS,
+                                  CASCADE_AUDITS)
+from ml_engine.predictor import registry, normalize_domain, DOMAINS
 import numpy as np
 
 router = APIRouter()
 
-MODEL_DIR = os.path.join(os.path.dirname(__file__), "../../../ml_engine/models")
+class UploadRun:
+    """
+    Per-upload scoring state shared by the JSON and NDJSON paths: running
+    totals, the whole-file prediction cache, the students table writer,
+    cascade routing counts and (with ?escalate=true) the students to hand
+    to the call dispatcher.
+    """
+
+    def __init__(self, pool, domain_type, file_hash, escalate=False):
+        self.pool = pool
+        self.domain_type = domain_type
+        self.file_hash = file_hash
+        # Includes the linear tier's version in cascade mode
+        self.version = scoring_version(domain_type)
+        self.cached_scores = None
+        if self.version is not None:
+            self.cached_scores = prediction_cache.get_file(domain_type, self.version, file_hash)
+        self.new_scores = []
+        self.total_students = 0
+        self.at_risk_count = 0
+        self.cache_hits = 0
+        self.cascade = {"rows": 0, "escalated": 0, "audited": 0, "audit_disagreements": 0}
+        self.writer = StudentWriter() if PERSIST_PREDICTIONS else None
+        # Without a model the scores are random: never phone anyone over them
+        self.escalation = None
+        self.escalation_skipped = None
+        if escalate and registry.has_model(domain_type):
+            self.escalation = EscalationCollector()
+        elif escalate:
+            self.escalation_skipped = f"No {domain_type} model loaded, scores are mock values"
+        self.completed = False
+
+    async def score(self, df):
+        precomputed = None
+        if self.cached_scores is not None:
+            precomputed = self.cached_scores[self.total_students:self.total_students + len(df)]
+        # Score the whole batch at once (one predict_proba per chunk, not per row)
+        results = await self.pool.score(score_batch, df, self.domain_type, precomputed)
+        observe_timings(self.domain_type, results.attrs.get('timings'))
+        ROWS_SCORED.inc(len(results), domain=self.domain_type, source="upload")
+        CACHE_HITS.inc(results.attrs.get('cache_hits', 0), domain=self.domain_type)
+        self.total_students += len(results)
+        self.at_risk_count += int((results['risk_label'] == "High Risk").sum())
+        self.cache_hits += results.attrs.get('cache_hits', 0)
+        if 'cascade' in results.attrs:
+            self.count_cascade(results.attrs['cascade'])
+        if self.cached_scores is None:
+            self.new_scores.append(results['risk_score'].to_numpy(dtype=np.int8))
+        if self.writer is not None:
+            await self.pool.read(timed, "persist", self.domain_type, self.writer.write, results)
+        if self.escalation is not None:
+            self.escalation.add(results)
+        return results
+
+    async def finish(self):
+        """Remember the file's scores once it is fully scored."""
+        self.completed = True
+        if self.cached_scores is None and self.version is not None:
+            scores = np.concatenate(self.new_scores) if self.new_scores else np.zeros(0, dtype=np.int8)
+            prediction_cache.put_file(self.domain_type, self.version, self.file_hash, scores)
+
+    def count_cascade(self, stats):
+        for key in self.cascade:
+            self.cascade[key] += stats[key]
+        domain = self.domain_type
+        CASCADE_ROWS.inc(stats["rows"] - stats["escalated"], domain=domain, tier="linear")
+        CASCADE_ROWS.inc(stats["escalated"], domain=domain, tier="ensemble")
+        CASCADE_AUDITS.inc(stats["audited"] - stats["audit_disagreements"], domain=domain, result="agree")
+        CASCADE_AUDITS.inc(stats["audit_disagreements"], domain=domain, result="disagree")
+
+    def cascade_fields(self):
+        """Cascade report fields of the response (rates are None when nothing was routed)."""
+        c = self.cascade
+        return {
+            "scoring_mode": SCORING_MODE,
+            "cascade_escalation_rate": c["escalated"] / c["rows"] if c["rows"] else None,
+            "cascade_audited_rows": c["audited"],
+            "cascade_label_disagreement": c["audit_disagreements"] / c["audited"] if c["audited"] else None,
+        }
+
+    @property
+    def cache_hit_rate(self):
+        return self.cache_hits / self.total_students if self.total_students else 0.0
+
+    @property
+    def escalation_candidates(self):
+        return self.escalation.count if self.escalation is not None else 0
+
+    async def escalate(self):
+        """Background stage: runs after the response has been sent."""
+        if self.escalation is not None and self.completed:
+            queued = await escalate_students(self.escalation, self.domain_type)
+            CALLS_QUEUED.inc(queued, source="escalation")
+
+    def summary(self, status="success"):
+        return PredictionSummary(status=status, total_students=self.total_students,
+                                 at_risk_count=self.at_risk_count, cache_hits=self.cache_hits,
+                                 cache_hit_rate=self.cache_hit_rate,
+                                 escalation_candidates=self.escalation_candidates,
+                                 escalation_skipped=self.escalation_skipped,
+                                 **self.cascade_fields())
 
-# Global Cache
-MODELS = { "engineering": None, "med": None, "ca": None, "mba": None, "school": None }
+def render_prediction_response(frames, run):
+    """Builds the PredictionResponse JSON body (runs in the pool, not on the loop)."""
+    processed_data = [StudentRiskProfile(**r) for df in frames for r in df.to_dict('records')]
+    return PredictionResponse(
+        status="success",
+        total_students=run.total_students,
+        at_risk_count=run.at_risk_count,
+        data=processed_data,
+        cache_hits=run.cache_hits,
+        cache_hit_rate=run.cache_hit_rate,
+        escalation_candidates=run.escalation_candidates,
+        escalation_skipped=run.escalation_skipped,
+        **run.cascade_fields()
+    ).model_dump_json()
+
+def admit_upload(pool):
+    """Reserve a queue slot or fail fast with 503 (backpressure)."""
+    try:
+        pool.try_acquire()
+    except PoolSaturated:
+        UPLOADS_REJECTED.inc()
+        raise HTTPException(status_code=503, detail="Scoring queue is full, retry shortly",
+                            headers={"Retry-After": str(SCORING_RETRY_AFTER)})
 
-def get_model_features(domain):
+async def stream_predictions(run, batches, first_batch):
     """
-    CRITICAL: These must match the columns used in train_models.py EXACTLY.
+    Yields NDJSON: one StudentRiskProfile per line as each batch is scored,
+    then a final PredictionSummary line.
     """
-    base = ['attendance_rate', 'cgpa', 'study_hours_per_day', 'past_failures']
-    
-    if domain == 'engineering': return base + ['project_score', 'coding_skills']
-    if domain == 'med': return base + ['clinical_score', 'hospital_hours']
-    if domain == 'ca': return base + ['audit_hours', 'law_score']
-    if domain == 'mba': return base + ['internship_score', 'case_studies']
-    if domain == 'school': return base + ['homework_rate', 'parent_meetings']
-    
-    return base # Fallback
-
-def load_model(domain: str):
-    if domain == 'medical': domain = 'med' # Normalize
-    
-    if MODELS.get(domain) is None:
-        model_path = os.path.join(MODEL_DIR, f"model_{domain}.pkl")
-        if os.path.exists(model_path):
+    pool = run.pool
+    df = first_batch
+
+    try:
+        while df is not None:
+            results = await run.score(df)
+            if len(results):
+                yield await pool.read(timed, "serialize", run.domain_type, to_ndjson, results)
+
             try:
-                MODELS[domain] = joblib.load(model_path)
-                print(f"✅ Loaded: {model_path}")
-            except:
-                return None
-        else:
-            print(f"⚠️ Missing: {model_path}")
-            return None
-    return MODELS[domain]
+                df = await pool.read(timed, "csv_decode", run.domain_type, next, batches, None)
+            except Exception as e:
+                # Headers are already sent, so report the failure in-band
+                print(f"Streaming upload failed: {e}")
+                yield run.summary(status="error").model_dump_json() + "\n"
+                return
+
+        await run.finish()
+        yield run.summary().model_dump_json() + "\n"
+    finally:
+        pool.release()
 
 @router.post("/predict/{domain_type}", response_model=PredictionResponse)
-async def predict_students(domain_type: str, file: UploadFile = File(...), db: Session = Depends(get_db)):
-    domain_type = domain_type.lower().strip()
-    if domain_type == 'medical': domain_type = 'med'
+async def predict_students(domain_type: str, background_tasks: BackgroundTasks, file: UploadFile = File(...),
+                           stream: bool = False, escalate: bool = False):
+    """
+    Scores an uploaded CSV. With ?stream=true the results come back as NDJSON
+    (application/x-ndjson) while scoring is still running.
+    With ?escalate=true, students at or above ESCALATION_RISK_THRESHOLD are
+    queued for agent calls after the response is sent (highest risk first).
+    Parsing and scoring run in the scoring pool; returns 503 when it is full.
+    Re-uploads of an identical file (or identical rows) skip inference.
+    """
+    domain_type = normalize_domain(domain_type)
+
+    pool = get_scoring_pool()
+    admit_upload(pool)
+    released = False
 
     try:
-        contents = await file.read()
-        df = pd.read_csv(io.StringIO(contents.decode('utf-8')))
-        # Normalize columns to lowercase/underscore
-        df.columns = [c.strip().lower().replace(' ', '_') for c in df.columns]
-    except Exception as e:
-        raise HTTPException(status_code=400, detail="Invalid CSV")
-
-    model = load_model(domain_type)
-    required_features = get_model_features(domain_type)
-    
-    processed_data = []
-    at_risk_counter = 0
-
-    for index, row in df.iterrows():
-        student_id = str(row.get('student_id', f"STU_{index}"))
-        name = row.get('name', f"Student {index}")
-        
-        # 1. Extract Features for Model
-        try:
-            # This line forces the backend to look for 'clinical_score' etc.
-            features = [float(row.get(f, 0)) for f in required_features]
-            features_np = np.array([features])
-            
-            # 2. Predict
-            if model:
-                probs = model.predict_proba(features_np)
-                risk_score = int(probs[0][1] * 100)
-            else:
-                # Mock Fallback (only if model missing)
-                risk_score = random.randint(20, 90)
-        except Exception as e:
-            print(f"Prediction Failed for {student_id}: {e}")
-            risk_score = 50 # The "Magic 50" error fallback
-
-        # 3. Labels
-        label = "Safe"
-        if risk_score >= 75: 
-            label = "High Risk"
-            at_risk_counter += 1
-        elif risk_score >= 40: 
-            label = "Moderate"
-
-        # 4. Financial
-        income = str(row.get('family_income', '')).lower()
-        scholarship = str(row.get('scholarship', '')).lower()
-        financial_flag = ('low' in income) and ('no' in scholarship)
-
-        processed_data.append(StudentRiskProfile(
-            student_id=student_id,
-            name=name,
-            risk_score=risk_score,
-            risk_label=label,
-            cgpa=float(row.get('cgpa', 0)),
-            attendance=float(row.get('attendance_rate', 0)),
-            financial_flag=financial_flag,
-            study_hours=float(row.get('study_hours_per_day', 0)),
-            top_risk_factor="Model Prediction"
-        ))
-        
-        # Database Save Logic (Simplified)
-        # ... (Existing DB logic fits here)
+        file_hash = await pool.read(timed, "upload_read", domain_type, hash_file, file.file)
+        run = UploadRun(pool, domain_type, file_hash, escalate)
+        if escalate:
+            # Queued calls never hold up the prediction response
+            background_tasks.add_task(run.escalate)
 
-    return PredictionResponse(
-        status="success",
-        total_students=len(processed_data),
-        at_risk_count=at_risk_counter,
-        data=processed_data
-    )
+        # Stream the upload in bounded row batches instead of reading it whole
+        batches = iter_csv_batches(file.file, CSV_BATCH_ROWS)
+
+        if stream:
+            # Parse the first batch up front so a broken CSV is still a clean 400
+            try:
+                first_batch = await pool.read(timed, "csv_decode", domain_type, next, batches, None)
+            except Exception:
+                raise HTTPException(status_code=400, detail="Invalid CSV")
+            # The stream generator owns the queue slot from here on
+            released = True
+            return StreamingResponse(stream_predictions(run, batches, first_batch),
+                                     media_type="application/x-ndjson")
+
+        frames = []
+        while True:
+            try:
+                df = await pool.read(timed, "csv_decode", domain_type, next, batches, None)
+            except Exception:
+                raise HTTPException(status_code=400, detail="Invalid CSV")
+            if df is None:
+                break
+            frames.append(await run.score(df))
+
+        await run.finish()
+
+        content = await pool.read(timed, "serialize", domain_type, render_prediction_response, frames, run)
+        return Response(content=content, media_type="application/json")
+    finally:
+        if not released:
+            pool.release()
+
+@router.post("/predict/{domain_type}/student", response_model=StudentRiskProfile)
+async def predict_single_student(domain_type: str, student: SingleStudentRequest):
+    """
+    Scores one student (chatbot / dashboard lookups). Concurrent calls are
+    micro-batched into a single predict_proba per domain.
+    """
+    domain_type = normalize_domain(domain_type)
+    record = student.model_dump()
+    if record['name'] is None:
+        record['name'] = f"Student {student.student_id}"
+
+    profile = await get_micro_batcher().submit(domain_type, record)
+    ROWS_SCORED.inc(domain=domain_type, source="single")
+    return StudentRiskProfile(**profile)
+
+# --- BACKGROUND JOBS (very large uploads) ---
+def job_status(job):
+    total, done = job['total_rows'], job['rows_done']
+    return JobStatus(job_id=job['job_id'], domain=job['domain'], status=job['status'],
+                     total_rows=total, rows_done=done, chunks_done=job['chunks_done'],
+                     progress=min(done / total, 1.0) if total else None, eta_seconds=eta_seconds(job),
+                     at_risk_count=job['at_risk_count'], error=job['error'],
+                     created_at=job['created_at'], finished_at=job['finished_at'],
+                     results_url=f"/api/v1/jobs/{job['job_id']}/results")
+
+async def get_job_or_404(job_id):
+    # Off the scoring pool: polls shouldn't wait behind the chunks being scored
+    job = await asyncio.to_thread(get_job_runner().store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"No scoring job {job_id}")
+    return job
+
+@router.post("/jobs/{domain_type}", response_model=JobStatus, status_code=202)
+async def submit_job(domain_type: str, file: UploadFile = File(...)):
+    """
+    Queues an uploaded CSV for background scoring and returns right away.
+    Poll GET /jobs/{job_id} for progress, page through GET /jobs/{job_id}/results
+    (partial results appear chunk by chunk). Jobs resume after a restart.
+    """
+    domain_type = normalize_domain(domain_type)
+    # Without a model every row would get a random mock score
+    if domain_type not in DOMAINS or not registry.has_model(domain_type):
+        raise HTTPException(status_code=404, detail=f"No model for domain '{domain_type}'")
+    job = await get_job_runner().submit(domain_type, file.file)
+    return job_status(job)
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    return job_status(await get_job_or_404(job_id))
+
+@router.get("/jobs/{job_id}/results", response_model=JobResultsPage)
+async def get_job_results(job_id: str, offset: int = Query(0, ge=0),
+                          limit: int = Query(1000, ge=1, le=JOB_PAGE_MAX_ROWS)):
+    """Scored rows committed so far, in upload order."""
+    job = await get_job_or_404(job_id)
+    rows = await asyncio.to_thread(read_results, job, offset, limit)
+    end = offset + len(rows)
+    more = end < job['rows_done'] or job['status'] in ("queued", "running")
+    content = JobResultsPage(job_id=job_id, status=job['status'], offset=offset, limit=limit,
+                             rows_available=job['rows_done'], next_offset=end if more else None,
+                             data=rows).model_dump_json()
+    return Response(content=content, media_type="application/json")
 
-# ... (Keep Trigger Call & Webhook endpoints same as before)
 @router.post("/agent/call/{student_id}", response_model=CallResponse)
 async def trigger_call(student_id: str):
-    return CallResponse(status="queued", call_id="123", message="Calling")
+    call_id = await get_call_dispatcher().enqueue(student_id)
+    CALLS_QUEUED.inc(source="manual")
+    return CallResponse(status="queued", call_id=call_id, message=f"Call to {student_id} queued")
 
-@router.post("/agent/webhook/summary")
-async def receive_summary(summary: CallSummaryRequest, db: Session = Depends(get_db)):
-    return {"status": "saved"}
\ No newline at end of file
+@router.post("/agent/webhook/summary", response_model=CallSummaryAck)
+async def receive_summary(summary: CallSummaryRequest):
+    """
+    Acknowledges right away; the summary is written to call_logs in the
+    next batched flush (and on shutdown). Repeats of a call_id are dropped.
+    """
+    with stage("webhook_submit"):
+        accepted = await get_summary_ingestor().submit(summary.model_dump())
+    WEBHOOK_SUMMARIES.inc(result="accepted" if accepted else "duplicate")
+    return CallSummaryAck(status="accepted" if accepted else "duplicate", call_id=summary.call_id)
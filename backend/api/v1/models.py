@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
+from datetime import datetime
 from typing import List, Optional
 
 # --- STUDENT DATA MODELS ---
@@ -19,6 +20,63 @@ class PredictionResponse(BaseModel):
     total_students: int
     at_risk_count: int
     data: List[StudentRiskProfile]
+    cache_hits: int = 0          # rows served from the prediction cache
+    cache_hit_rate: float = 0.0
+    escalation_candidates: int = 0  # rows at/above the threshold (?escalate=true)
+    escalation_skipped: Optional[str] = None  # why ?escalate=true queued no calls
+    # SCORING_MODE=cascade: share of rows the linear tier sent on to the full model,
+    # and how often an audit sample of the rest got a different label from it
+    scoring_mode: str = "single"
+    cascade_escalation_rate: Optional[float] = None
+    cascade_audited_rows: int = 0
+    cascade_label_disagreement: Optional[float] = None
+
+class PredictionSummary(BaseModel):
+    # Last line of a streamed (NDJSON) prediction response
+    status: str
+    total_students: int
+    at_risk_count: int
+    cache_hits: int = 0
+    cache_hit_rate: float = 0.0
+    escalation_candidates: int = 0
+    escalation_skipped: Optional[str] = None
+    scoring_mode: str = "single"
+    cascade_escalation_rate: Optional[float] = None
+    cascade_audited_rows: int = 0
+    cascade_label_disagreement: Optional[float] = None
+
+# --- BACKGROUND JOB MODELS ---
+
+class JobStatus(BaseModel):
+    job_id: str
+    domain: str
+    status: str                   # "queued", "running", "completed", "failed"
+    total_rows: Optional[int] = None   # estimated from the upload until completed
+    rows_done: int = 0            # committed rows, readable from /results
+    chunks_done: int = 0
+    progress: Optional[float] = None   # rows_done / total_rows
+    eta_seconds: Optional[float] = None
+    at_risk_count: int = 0
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    results_url: str
+
+class JobResultsPage(BaseModel):
+    job_id: str
+    status: str
+    offset: int
+    limit: int
+    rows_available: int           # committed so far (grows while the job runs)
+    next_offset: Optional[int] = None  # None once the job is done and this was the last page
+    data: List[StudentRiskProfile]
+
+class SingleStudentRequest(BaseModel):
+    # Feature columns (attendance_rate, cgpa, ...) are passed as extra fields
+    model_config = ConfigDict(extra="allow")
+
+    student_id: str
+    name: Optional[str] = None
 
 # --- AGENT CALL MODELS ---
 
@@ -31,7 +89,12 @@ class CallResponse(BaseModel):
     message: str
 
 class CallSummaryRequest(BaseModel):
+    call_id: Optional[str] = None  # retries with the same call_id are ignored
     student_id: str
     transcript: str
     sentiment: str  # "Positive", "Neutral", "Stressed"
-    action_item: str # "Schedule Meeting", "Scholarship", "None"
\ No newline at end of file
+    action_item: str # "Schedule Meeting", "Scholarship", "None"
+
+class CallSummaryAck(BaseModel):
+    status: str      # "accepted", or "duplicate" if that call_id is still buffered
+    call_id: Optional[str] = None
@@ -0,0 +1,83 @@
+# Path: backend/core/batching.py
+import asyncio
+import time
+from backend.core.config import MICROBATCH_WAIT_MS, MICROBATCH_MAX_ITEMS
+from backend.core.metrics import metrics, observe_stage
+
+class MicroBatcher:
+    """
+    Collects concurrent single-item requests per key (domain) and runs them
+    through `flush_fn(key, items) -> results` as one batch.
+
+    A batch is flushed when it reaches `max_items` or `max_wait_ms` after its
+    first item arrived, whichever comes first. Each caller awaits only its
+    own result; an error in the batch is raised to every caller in it.
+    """
+
+    def __init__(self, flush_fn, pool, max_items=MICROBATCH_MAX_ITEMS, max_wait_ms=MICROBATCH_WAIT_MS):
+        self.flush_fn = flush_fn
+        self.pool = pool
+        self.max_items = max_items
+        self.max_wait = max_wait_ms / 1000.0
+        self._pending = {}   # key -> [(item, future), ...]
+        self._timers = {}    # key -> flush timer task
+        self._running = set()  # strong refs so in-flight flushes aren't GC'd
+
+    async def submit(self, key, item):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.setdefault(key, [])
+        batch.append((item, future))
+
+        if len(batch) >= self.max_items:
+            # Detach the full batch now so later arrivals start a new one
+            self._cancel_timer(key)
+            task = loop.create_task(self._run(key, self._pending.pop(key)))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+        elif key not in self._timers:
+            self._timers[key] = loop.create_task(self._flush_later(key))
+
+        return await future
+
+    def _cancel_timer(self, key):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+
+    async def _flush_later(self, key):
+        await asyncio.sleep(self.max_wait)
+        self._timers.pop(key, None)
+        batch = self._pending.pop(key, None)
+        if batch:
+            await self._run(key, batch)
+
+    async def _run(self, key, batch):
+        items = [item for item, _ in batch]
+        start = time.perf_counter()
+        try:
+            results = await self.pool.score(self.flush_fn, key, items)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            observe_stage("microbatch", time.perf_counter() - start, key)
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+_BATCHER = None
+
+metrics.gauge("edupulse_microbatch_pending", "Single-student lookups waiting for their batch",
+              fn=lambda: sum(map(len, _BATCHER._pending.values())) if _BATCHER is not None else 0)
+
+def get_micro_batcher():
+    """Shared batcher for single-student scoring (created on first use)."""
+    global _BATCHER
+    if _BATCHER is None:
+        from backend.core.scoring import score_students
+        from backend.core.workers import get_scoring_pool
+        _BATCHER = MicroBatcher(score_students, get_scoring_pool())
+    return _BATCHER
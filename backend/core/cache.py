@@ -0,0 +1,117 @@
+# Path: backend/core/cache.py
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from backend.core.config import PREDICTION_CACHE_ROWS, PREDICTION_CACHE_FILES
+from backend.core.metrics import metrics
+from ml_engine.predictor import registry
+
+def hash_feature_rows(X):
+    """One uint64 per row of the (already normalized) float feature matrix."""
+    return pd.util.hash_pandas_object(pd.DataFrame(X), index=False).to_numpy()
+
+def hash_file(fileobj, block_size=1 << 20):
+    """sha256 of a seekable binary file; leaves the position at the start."""
+    fileobj.seek(0)
+    digest = hashlib.sha256()
+    for block in iter(lambda: fileobj.read(block_size), b""):
+        digest.update(block)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+class PredictionCache:
+    """
+    LRU cache of risk scores.
+
+    - rows:  (domain, model version, row hash)  -> risk_score
+    - files: (domain, model version, file hash) -> array of risk_scores
+
+    The model version is part of every key, and a registry reload also
+    drops the domain's entries, so a retrained model never serves old scores.
+    """
+
+    def __init__(self, max_rows=PREDICTION_CACHE_ROWS, max_files=PREDICTION_CACHE_FILES):
+        self.max_rows = max_rows
+        self.max_files = max_files
+        self._rows = OrderedDict()
+        self._files = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup_rows(self, domain, version, hashes):
+        """Returns (scores, hit_mask). Scores for misses are undefined."""
+        scores = np.zeros(len(hashes), dtype=np.int64)
+        hit = np.zeros(len(hashes), dtype=bool)
+        if not self.max_rows:
+            return scores, hit
+        with self._lock:
+            rows = self._rows
+            for i, h in enumerate(hashes.tolist()):
+                key = (domain, version, h)
+                score = rows.get(key)
+                if score is not None:
+                    rows.move_to_end(key)
+                    scores[i] = score
+                    hit[i] = True
+            n_hits = int(hit.sum())
+            self.hits += n_hits
+            self.misses += len(hashes) - n_hits
+        return scores, hit
+
+    def store_rows(self, domain, version, hashes, scores):
+        if not self.max_rows:
+            return
+        with self._lock:
+            rows = self._rows
+            for h, score in zip(hashes.tolist(), scores.tolist()):
+                rows[(domain, version, h)] = score
+            while len(rows) > self.max_rows:
+                rows.popitem(last=False)
+
+    def get_file(self, domain, version, file_hash):
+        if not self.max_files:
+            return None
+        key = (domain, version, file_hash)
+        with self._lock:
+            scores = self._files.get(key)
+            if scores is not None:
+                self._files.move_to_end(key)
+            return scores
+
+    def put_file(self, domain, version, file_hash, scores):
+        if not self.max_files:
+            return
+        with self._lock:
+            self._files[(domain, version, file_hash)] = scores
+            while len(self._files) > self.max_files:
+                self._files.popitem(last=False)
+
+    def invalidate(self, domain=None):
+        with self._lock:
+            if domain is None:
+                self._rows.clear()
+                self._files.clear()
+                return
+            for store in (self._rows, self._files):
+                for key in [k for k in store if k[0] == domain]:
+                    del store[key]
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "rows": len(self._rows),
+            "files": len(self._files),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+# One cache per process (scoring pool threads share it)
+prediction_cache = PredictionCache()
+registry.add_reload_listener(lambda domain, entry: prediction_cache.invalidate(domain))
+
+metrics.gauge("edupulse_prediction_cache_entries", "Prediction cache size", ("kind",),
+              fn=lambda: {("rows",): prediction_cache.stats()["rows"], ("files",): prediction_cache.stats()["files"]})
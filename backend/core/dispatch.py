@@ -0,0 +1,54 @@
+# Path: backend/core/dispatch.py
+from backend.core.config import (CALL_PROVIDER, CALL_CONCURRENCY, CALL_RATE_PER_MINUTE,
+                                 CALL_MAX_ATTEMPTS, CALL_RETRY_BASE_SECONDS, SERVE_WORKERS,
+                                 WEBHOOK_BATCH_ITEMS, WEBHOOK_FLUSH_MS, WEBHOOK_MAX_PENDING)
+from backend.db.crud import CallJobStore, insert_call_summaries
+from ai_agent.agent_logic import CallDispatcher, RateLimiter
+from ai_agent.mock_call import MockTelephonyProvider
+from ai_agent.webhook_handler import SummaryIngestor
+from backend.core.metrics import metrics
+
+_DISPATCHER = None
+_INGESTOR = None
+
+metrics.gauge("edupulse_call_queue_depth", "Agent calls waiting for a dispatcher worker",
+              fn=lambda: _DISPATCHER.depth if _DISPATCHER is not None else 0)
+metrics.counter("edupulse_calls_total", "Agent calls finished or retried, by outcome", ("outcome",),
+              fn=lambda: {(k,): v for k, v in _DISPATCHER.stats.items()} if _DISPATCHER is not None else {})
+metrics.gauge("edupulse_webhook_pending", "Call summaries buffered, not yet written",
+              fn=lambda: _INGESTOR.pending if _INGESTOR is not None else 0)
+
+def get_summary_ingestor():
+    """Shared buffer for call summaries (webhook + dispatcher) -> call_logs."""
+    global _INGESTOR
+    if _INGESTOR is None:
+        _INGESTOR = SummaryIngestor(insert_call_summaries, max_items=WEBHOOK_BATCH_ITEMS,
+                                    flush_ms=WEBHOOK_FLUSH_MS, max_pending=WEBHOOK_MAX_PENDING)
+    return _INGESTOR
+
+async def store_summary(summary):
+    await get_summary_ingestor().submit(summary)
+
+def get_call_dispatcher():
+    global _DISPATCHER
+    if _DISPATCHER is None:
+        # Every server worker runs its own dispatcher: split the limit between them
+        rate = CALL_RATE_PER_MINUTE / max(1, SERVE_WORKERS)
+        providers = {
+            "mock": (MockTelephonyProvider(), RateLimiter(rate)),
+        }
+        _DISPATCHER = CallDispatcher(CallJobStore(), providers, CALL_PROVIDER, CALL_CONCURRENCY,
+                                     max_attempts=CALL_MAX_ATTEMPTS,
+                                     retry_base_seconds=CALL_RETRY_BASE_SECONDS,
+                                     on_complete=store_summary)
+    return _DISPATCHER
+
+async def start_call_dispatcher(resume=True):
+    await get_call_dispatcher().start(resume)
+
+async def stop_call_dispatcher():
+    if _DISPATCHER is not None:
+        await _DISPATCHER.stop()
+    # After the dispatcher, so summaries from its last calls are written too
+    if _INGESTOR is not None:
+        await _INGESTOR.close()
@@ -0,0 +1,77 @@
+# Path: backend/core/escalation.py
+# Turns a scored upload into outbound agent calls (opt-in via ?escalate=true).
+import asyncio
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+from backend.core.config import ESCALATION_RISK_THRESHOLD, ESCALATION_COOLDOWN_HOURS, ESCALATION_MAX_CALLS
+from backend.core.dispatch import get_call_dispatcher
+from backend.db.crud import recently_contacted
+
+def call_priority(risk_score, financial_flag):
+    """
+    Dispatcher priority (lower runs first). Manual calls use 0, so they stay
+    ahead of bulk escalations. Higher scores go first; within a score,
+    students with a financial flag go first.
+    """
+    risk_score = np.asarray(risk_score, dtype=np.int64)
+    no_flag = ~np.asarray(financial_flag, dtype=bool)
+    return 1 + 2 * (100 - risk_score) + no_flag.astype(np.int64)
+
+class EscalationCollector:
+    """
+    Keeps the above-threshold rows of each scored batch for one upload.
+    Batches scored without a model (random mock scores) are refused.
+    """
+
+    def __init__(self, threshold=ESCALATION_RISK_THRESHOLD):
+        self.threshold = threshold
+        self.frames = []
+        self.refused_rows = 0
+
+    def add(self, results):
+        if results.attrs.get('mock', False):
+            self.refused_rows += len(results)
+            return
+        hits = results.loc[results['risk_score'] >= self.threshold,
+                           ['student_id', 'risk_score', 'financial_flag']]
+        if len(hits):
+            self.frames.append(hits)
+
+    @property
+    def count(self):
+        return sum(len(f) for f in self.frames)
+
+    def candidates(self):
+        """[(student_id, priority), ...] best first, one entry per student."""
+        if not self.frames:
+            return []
+        hits = pd.concat(self.frames, ignore_index=True)
+        hits = hits.assign(priority=call_priority(hits['risk_score'], hits['financial_flag']))
+        hits = hits.sort_values('priority', kind='stable')
+        hits = hits.drop_duplicates('student_id', keep='first')
+        return list(zip(hits['student_id'].tolist(), hits['priority'].tolist()))
+
+async def escalate_students(collector, domain, max_calls=ESCALATION_MAX_CALLS,
+                   cooldown_hours=ESCALATION_COOLDOWN_HOURS):
+    """
+    Background stage after a prediction response: drops students contacted
+    within the cooldown, then queues the rest in one bulk enqueue.
+    """
+    try:
+        if collector.refused_rows:
+            print(f"⚠️ {collector.refused_rows} {domain} rows had mock scores (no model), not escalated")
+        candidates = collector.candidates()
+        if not candidates:
+            return 0
+        since = datetime.now(timezone.utc) - timedelta(hours=cooldown_hours)
+        skip = await asyncio.to_thread(recently_contacted, [sid for sid, _ in candidates], since)
+        to_call = [(sid, p) for sid, p in candidates if sid not in skip][:max_calls]
+
+        await get_call_dispatcher().enqueue_many(to_call)
+        print(f"📞 Escalated {len(to_call)} {domain} students "
+              f"({len(candidates)} at risk, {len(skip)} recently contacted)")
+        return len(to_call)
+    except Exception as e:
+        print(f"❌ Escalation for {domain} failed: {e}")
+        return 0
@@ -0,0 +1,199 @@
+# Path: backend/core/jobs.py
+# Background scoring jobs for very large uploads (POST /jobs/{domain}).
+#
+#   {JOB_DIR}/{job_id}/upload.csv              the upload, as received
+#   {JOB_DIR}/{job_id}/chunk_000000.ndjson     scored rows of chunk 0, and so on
+#   prediction_jobs row                        status, chunks_done, rows_done, ...
+#
+# A chunk counts once its file is written AND its students + the job's
+# progress are committed in one transaction. After a restart, unfinished jobs
+# resume at the first uncommitted chunk (its file, if any, is rewritten).
+import asyncio
+import itertools
+import json
+import os
+import uuid
+from datetime import datetime, timezone
+from backend.core.config import JOB_DIR, JOB_CHUNK_ROWS, JOB_CONCURRENCY
+from backend.core.scoring import score_batch, to_ndjson
+from backend.core.utils import iter_csv_batches
+from backend.core.workers import get_scoring_pool
+from backend.core.metrics import metrics, timed, observe_timings, ROWS_SCORED
+from backend.db.crud import PredictionJobStore
+
+def job_dir(job_id):
+    return os.path.join(JOB_DIR, job_id)
+
+def upload_path(job_id):
+    return os.path.join(job_dir(job_id), "upload.csv")
+
+def chunk_path(job_id, chunk):
+    return os.path.join(job_dir(job_id), f"chunk_{chunk:06d}.ndjson")
+
+def save_upload(fileobj, path, block_size=1 << 20):
+    """Copies the upload to disk. Returns its row count, estimated from line breaks."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fileobj.seek(0)
+    lines, last = 0, b""
+    with open(path, "wb") as out:
+        for block in iter(lambda: fileobj.read(block_size), b""):
+            out.write(block)
+            lines += block.count(b"\n")
+            last = block
+    if last and not last.endswith(b"\n"):
+        lines += 1  # no trailing newline
+    return max(lines - 1, 0)  # minus the header
+
+def write_chunk(job_id, chunk, results):
+    """Scored rows of one chunk as NDJSON, atomically (a resumed job may rewrite it)."""
+    path = chunk_path(job_id, chunk)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(to_ndjson(results))
+    os.replace(tmp_path, path)
+
+def read_results(job, offset, limit):
+    """Up to `limit` committed result rows from `offset` on, as dicts."""
+    wanted = max(min(offset + limit, job['rows_done']) - offset, 0)
+    rows = []
+    # Every chunk but the last holds exactly chunk_rows rows
+    chunk, skip = divmod(offset, job['chunk_rows'])
+    while len(rows) < wanted:
+        with open(chunk_path(job['job_id'], chunk)) as f:
+            for line in itertools.islice(f, skip, skip + wanted - len(rows)):
+                rows.append(json.loads(line))
+        chunk, skip = chunk + 1, 0
+    return rows
+
+def eta_seconds(job, now=None):
+    """Seconds left at the current run's pace, None until there is a pace (or a total)."""
+    if job['status'] != "running" or not job['started_at'] or not job['total_rows']:
+        return None
+    done_this_run = job['rows_done'] - (job['rows_at_start'] or 0)
+    elapsed = ((now or datetime.now(timezone.utc)) - job['started_at']).total_seconds()
+    if done_this_run <= 0 or elapsed <= 0:
+        return None
+    return max(job['total_rows'] - job['rows_done'], 0) / (done_this_run / elapsed)
+
+class JobRunner:
+    """
+    Scores queued jobs chunk by chunk in the background, `concurrency` at a
+    time, through the shared scoring pool. Nothing is kept in memory that
+    isn't also in the database: stopping the runner (or the process) at any
+    point leaves every job resumable.
+    """
+
+    def __init__(self, store, concurrency=JOB_CONCURRENCY, chunk_rows=JOB_CHUNK_ROWS):
+        self.store = store
+        self.concurrency = concurrency
+        self.chunk_rows = chunk_rows
+        self.queue = asyncio.Queue()
+        self._workers = []
+
+    async def start(self, resume=True):
+        # resume=False: another process owns the unfinished jobs
+        if resume:
+            for job_id in await asyncio.to_thread(self.store.unfinished):
+                self.queue.put_nowait(job_id)
+        if self.queue.qsize():
+            print(f"🗂️ Resuming {self.queue.qsize()} unfinished scoring jobs")
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        # Running jobs stay "running" in the store and resume on next start()
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    @property
+    def depth(self):
+        return self.queue.qsize()
+
+    async def submit(self, domain, fileobj):
+        """Stores the upload, records the job and queues it. Returns the job row."""
+        job_id = uuid.uuid4().hex
+        pool = get_scoring_pool()
+        total_rows = await pool.read(timed, "upload_read", domain, save_upload, fileobj, upload_path(job_id))
+        job = await asyncio.to_thread(self.store.create, job_id, domain, self.chunk_rows, total_rows)
+        self.queue.put_nowait(job_id)
+        return job
+
+    async def _worker(self):
+        while True:
+            job_id = await self.queue.get()
+            try:
+                await self.run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Scoring job {job_id} failed: {e}")
+                await asyncio.to_thread(self.store.finish, job_id, "failed", str(e))
+
+    async def run(self, job_id):
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if job is None or job['status'] in ("completed", "failed"):
+            return
+        domain = job['domain']
+        await asyncio.to_thread(self.store.mark_running, job_id, job['rows_done'])
+        pool = get_scoring_pool()
+
+        with open(upload_path(job_id), "rb") as f:
+            batches = iter_csv_batches(f, job['chunk_rows'])
+            try:
+                chunk = await self._score_chunks(job, batches, pool)
+            finally:
+                # Before the file closes, also when cancelled at shutdown
+                try:
+                    batches.close()
+                except ValueError:
+                    pass  # a parse is still running in the pool; it fails on the closed file
+        if chunk is None:
+            return
+
+        await asyncio.to_thread(self.store.finish, job_id, "completed")
+        print(f"✅ Scoring job {job_id} ({domain}) completed: {chunk} chunks")
+
+    async def _score_chunks(self, job, batches, pool):
+        """Scores and commits every chunk after the committed ones. Returns the chunk count (None if pre-empted)."""
+        job_id, domain = job['job_id'], job['domain']
+        chunk = 0
+        while True:
+            try:
+                df = await pool.read(timed, "csv_decode", domain, next, batches, None)
+            except Exception as e:
+                raise ValueError(f"Invalid CSV: {e}")
+            if df is None:
+                return chunk
+            if chunk < job['chunks_done']:
+                chunk += 1  # committed before a restart
+                continue
+
+            results = await pool.score(score_batch, df, domain, None)
+            if results.attrs.get('mock', False):
+                raise ValueError(f"No {domain} model loaded, refusing to store mock scores")
+            observe_timings(domain, results.attrs.get('timings'))
+            ROWS_SCORED.inc(len(results), domain=domain, source="job")
+            await pool.read(timed, "serialize", domain, write_chunk, job_id, chunk, results)
+            if not await pool.read(timed, "persist", domain, self.store.commit_chunk, job_id, chunk, results):
+                print(f"⚠️ Scoring job {job_id}: chunk {chunk} was committed elsewhere, stopping here")
+                return None
+            chunk += 1
+
+_RUNNER = None
+
+metrics.gauge("edupulse_jobs_queued", "Background scoring jobs waiting for a job worker",
+              fn=lambda: _RUNNER.depth if _RUNNER is not None else 0)
+
+def get_job_runner():
+    global _RUNNER
+    if _RUNNER is None:
+        _RUNNER = JobRunner(PredictionJobStore())
+    return _RUNNER
+
+async def start_job_runner(resume=True):
+    await get_job_runner().start(resume)
+
+async def stop_job_runner():
+    if _RUNNER is not None:
+        await _RUNNER.stop()
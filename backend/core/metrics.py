@@ -0,0 +1,338 @@
+# Path: backend/core/metrics.py
+# In-process metrics in the Prometheus text format (GET /metrics), plus an
+# opt-in sampling profiler for individual requests.
+#
+#   edupulse_stage_seconds{stage,domain}        upload_read, csv_decode, features, inference,
+#                                               attribution, assemble, persist, serialize, microbatch
+#   edupulse_request_seconds{method,handler,status}
+#   edupulse_rows_scored_total{domain,source}   source = upload | single
+#   edupulse_cache_hits_total{domain}           rows that skipped the model
+#   edupulse_model_load_seconds{domain}
+#   edupulse_*_depth / *_pending                queue gauges, read at scrape time
+#
+# Values are per process: with SCORING_EXECUTOR=process, stages that run in the
+# workers are reported back through results.attrs['timings'].
+import bisect
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter as _Tally
+from contextlib import contextmanager
+from backend.core.config import (METRICS_ENABLED, PROFILE_SAMPLE_RATE, PROFILE_INTERVAL_MS,
+                                 PROFILE_DIR)
+from ml_engine.predictor import registry
+
+# Seconds. Upload stages range from ~1 ms (tiny CSVs) to tens of seconds (1M rows)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    """
+    Base for counters and gauges. With `fn`, values aren't stored here but read
+    at scrape time: fn() returns a number or {label values tuple: number}.
+    """
+    kind = "untyped"
+
+    def __init__(self, name, help_text, labels=(), fn=None):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.fn = fn
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        # Missing labels are exported as "" rather than raising in a hot path
+        return tuple(str(labels.get(n, "")) for n in self.labels)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self):
+        if self.fn is not None:
+            try:
+                values = self.fn()
+            except Exception as e:
+                print(f"⚠️ Metric {self.name} failed: {e}")
+                return []
+            items = list(values.items()) if isinstance(values, dict) else [((), values)]
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return self.header() + [f"{self.name}{_format_labels(self.labels, k)} {_format_value(v)}"
+                                for k, v in items]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # Per-bucket counts (last slot = above every bucket), sum, count
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][slot] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        with self._lock:
+            items = [(k, (list(v[0]), v[1], v[2])) for k, v in self._values.items()]
+        lines = self.header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self, enabled=METRICS_ENABLED):
+        self.enabled = enabled
+        self._metrics = {}
+
+    def _add(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, labels=(), fn=None):
+        return self._add(Counter(name, help_text, labels, fn))
+
+    def gauge(self, name, help_text, labels=(), fn=None):
+        return self._add(Gauge(name, help_text, labels, fn))
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, help_text, labels, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram("edupulse_stage_seconds", "Time spent per pipeline stage",
+                                  ("stage", "domain"))
+REQUEST_SECONDS = metrics.histogram("edupulse_request_seconds", "HTTP request latency (until the response starts)",
+                                    ("method", "handler", "status"))
+ROWS_SCORED = metrics.counter("edupulse_rows_scored_total", "Students scored", ("domain", "source"))
+CACHE_HITS = metrics.counter("edupulse_cache_hits_total", "Scored rows served from the prediction cache",
+                             ("domain",))
+MODEL_LOAD_SECONDS = metrics.histogram("edupulse_model_load_seconds", "Model file load time", ("domain",))
+UPLOADS_REJECTED = metrics.counter("edupulse_uploads_rejected_total", "Uploads answered 503 (scoring queue full)")
+WEBHOOK_SUMMARIES = metrics.counter("edupulse_webhook_summaries_total", "Call summary webhooks received",
+                                    ("result",))
+CALLS_QUEUED = metrics.counter("edupulse_calls_queued_total", "Agent calls queued", ("source",))
+CASCADE_ROWS = metrics.counter("edupulse_cascade_rows_total", "Rows scored in cascade mode, by final tier",
+                               ("domain", "tier"))
+CASCADE_AUDITS = metrics.counter("edupulse_cascade_audits_total", "Linear-tier rows re-scored by the full model",
+                                 ("domain", "result"))
+
+# Includes loads done lazily by request threads and hot reloads by the watcher
+registry.add_load_listener(lambda domain, entry: MODEL_LOAD_SECONDS.observe(entry.load_seconds, domain=domain))
+
+def observe_stage(stage_name, seconds, domain=""):
+    if metrics.enabled:
+        STAGE_SECONDS.observe(seconds, stage=stage_name, domain=domain)
+
+def observe_timings(domain, timings):
+    """Stage timings measured elsewhere (e.g. in a scoring worker): {stage: seconds}."""
+    if metrics.enabled and timings:
+        for stage_name, seconds in timings.items():
+            STAGE_SECONDS.observe(seconds, stage=stage_name, domain=domain)
+
+@contextmanager
+def stage(stage_name, domain=""):
+    """Times the enclosed block into edupulse_stage_seconds (also across awaits)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage_name, time.perf_counter() - start, domain)
+
+def timed(stage_name, domain, fn, *args):
+    """fn(*args), timed as `stage_name`. Use inside pool calls so queue wait isn't counted."""
+    start = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        observe_stage(stage_name, time.perf_counter() - start, domain)
+
+def render_metrics():
+    return metrics.render()
+
+# --- SAMPLING PROFILER ---
+
+# Innermost frames of a thread that is parked, not working
+IDLE_FRAMES = {("wait", "threading.py"), ("get", "queue.py"), ("select", "selectors.py"),
+               ("_worker", "thread.py")}
+
+class SamplingProfiler:
+    """
+    Wall-clock stack sampler: every `interval_ms` a daemon thread records the
+    stack of every other thread (event loop and scoring threads alike).
+    stop() writes collapsed stacks ("frame;frame;frame count" per line), the
+    input format of flamegraph.pl and speedscope.
+
+    Samples cover the whole process, so requests running at the same time
+    show up in each other's profiles.
+    """
+
+    def __init__(self, name, interval_ms=PROFILE_INTERVAL_MS, out_dir=PROFILE_DIR):
+        self.name = name
+        self.interval = interval_ms / 1000.0
+        self.out_dir = out_dir
+        self.samples = _Tally()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                # Skip ourselves and parked threads (idle pool workers, queue waits)
+                if ident == own or (frame.f_code.co_name, os.path.basename(frame.f_code.co_filename)) in IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack.append(names.get(ident, str(ident)))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        """Stops sampling and writes the profile. Returns its path (None if nothing was sampled)."""
+        self._stop.set()
+        self._thread.join()
+        if not self.samples:
+            return None
+        os.makedirs(self.out_dir, exist_ok=True)
+        safe_name = "".join(c if c.isalnum() else "_" for c in self.name).strip("_")
+        path = os.path.join(self.out_dir, f"{time.strftime('%Y%m%d-%H%M%S')}_{next(_PROFILE_SEQ)}_{safe_name}.folded")
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+_PROFILE_SEQ = itertools.count()
+_PROFILE_LOCK = threading.Lock()
+_PROFILE_ACTIVE = False
+
+@contextmanager
+def maybe_profile(name, sample_rate=PROFILE_SAMPLE_RATE):
+    """
+    Profiles the enclosed block for a `sample_rate` fraction of calls
+    (PROFILE_SAMPLE_RATE, 0 = off). At most one profile runs at a time.
+    """
+    global _PROFILE_ACTIVE
+    if sample_rate <= 0 or random.random() >= sample_rate:
+        yield
+        return
+    with _PROFILE_LOCK:
+        if _PROFILE_ACTIVE:
+            busy = True
+        else:
+            busy, _PROFILE_ACTIVE = False, True
+    if busy:
+        yield
+        return
+
+    profiler = SamplingProfiler(name).start()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        try:
+            path = profiler.stop()
+            if path:
+                print(f"🔬 Profiled {name} ({(time.perf_counter() - start) * 1000:.0f} ms, "
+                      f"{sum(profiler.samples.values())} samples): {path}")
+        finally:
+            with _PROFILE_LOCK:
+                _PROFILE_ACTIVE = False
+
+# --- ASGI MIDDLEWARE ---
+
+class MetricsMiddleware:
+    """
+    Times every HTTP request into edupulse_request_seconds, labelled with the
+    endpoint function (predict_students, not the raw path) and status.
+    Runs a PROFILE_SAMPLE_RATE share of requests under the sampling profiler,
+    streamed bodies included.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not metrics.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_timed(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                # Latency to the first byte: streamed responses keep going after this
+                endpoint = scope.get("endpoint")
+                REQUEST_SECONDS.observe(time.perf_counter() - start, method=scope["method"],
+                                        handler=getattr(endpoint, "__name__", "unmatched"),
+                                        status=status["code"])
+            await send(message)
+
+        with maybe_profile(f"{scope['method']} {scope['path']}"):
+            await self.app(scope, receive, send_timed)
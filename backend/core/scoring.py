@@ -0,0 +1,303 @@
+import random
+import time
+import numpy as np
+import pandas as pd
+from backend.core.config import SCORING_CHUNK_SIZE, SCORING_MODE, CASCADE_MARGIN, CASCADE_AUDIT_RATE
+from backend.core.cache import prediction_cache, hash_feature_rows
+from ml_engine.predictor import (registry, get_model_features, linear_tier, HIGH_RISK_THRESHOLD,
+                                 MODERATE_RISK_THRESHOLD)
+from ml_engine.attribution import NO_FACTOR
+from ml_engine.cascade import ambiguous, model_margin, risk_bands
+
+def load_model(domain: str):
+    """Current model for a domain from the shared registry (None if missing)."""
+    return registry.get(domain)
+
+def build_feature_matrix(df, features):
+    """
+    Builds the (n_rows, n_features) float matrix in one pass.
+    Missing columns are filled with 0. Returns the matrix and a boolean mask
+    of rows holding values that could not be parsed as numbers.
+    """
+    X = np.zeros((len(df), len(features)), dtype=np.float64)
+    invalid = np.zeros(len(df), dtype=bool)
+
+    for j, f in enumerate(features):
+        if f not in df.columns:
+            continue
+        raw = df[f]
+        col = pd.to_numeric(raw, errors='coerce')
+        # Blank cells stay NaN (the model decides), junk strings are flagged
+        invalid |= (col.isna() & raw.notna()).to_numpy()
+        X[:, j] = col.to_numpy(dtype=np.float64, na_value=np.nan)
+
+    return X, invalid
+
+def accepts_nan(model):
+    """
+    True for models that score NaN features themselves (RandomForest and its
+    flat form). GradientBoosting / LogisticRegression raise on NaN instead.
+    """
+    if hasattr(model, 'allow_nan'):  # FlatEnsemble
+        return model.allow_nan
+    if hasattr(model, '__sklearn_tags__'):  # scikit-learn >= 1.6
+        return model.__sklearn_tags__().input_tags.allow_nan
+    return model._get_tags().get('allow_nan', False)
+
+def predict_risk_scores(model, X, invalid=None, chunk_size=SCORING_CHUNK_SIZE):
+    """
+    Vectorized equivalent of int(model.predict_proba(row)[0][1] * 100) per row.
+    Rows that fail to score get the "Magic 50" error fallback: junk values,
+    blanks for a model that can't take NaN, and (last resort) rows that still
+    make predict_proba raise.
+    """
+    n = len(X)
+    if invalid is None:
+        invalid = np.zeros(n, dtype=bool)
+
+    if model is None:
+        # Mock Fallback (only if model missing)
+        return np.array([random.randint(20, 90) for _ in range(n)], dtype=np.int64)
+
+    if not accepts_nan(model):
+        # Else one blank cell fails its whole chunk into the per-row retry
+        invalid = invalid | np.isnan(X).any(axis=1)
+
+    scores = np.full(n, 50, dtype=np.int64)
+    valid_idx = np.flatnonzero(~invalid)
+
+    for start in range(0, len(valid_idx), chunk_size):
+        idx = valid_idx[start:start + chunk_size]
+        try:
+            probs = model.predict_proba(X[idx])
+            scores[idx] = (probs[:, 1] * 100).astype(np.int64)
+        except Exception:
+            # Last resort: one row that still breaks the model must not sink
+            # the whole chunk, so retry row by row like the old loop did.
+            for i in idx:
+                try:
+                    scores[i] = int(model.predict_proba(X[i:i + 1])[0][1] * 100)
+                except Exception:
+                    scores[i] = 50
+
+    return scores
+
+def risk_labels(scores):
+    return np.select(
+        [scores >= HIGH_RISK_THRESHOLD, scores >= MODERATE_RISK_THRESHOLD],
+        ["High Risk", "Moderate"],
+        default="Safe"
+    )
+
+def financial_flags(df):
+    """True when family income is low and there is no scholarship."""
+    if 'family_income' not in df.columns or 'scholarship' not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    income = df['family_income'].astype(str).str.lower()
+    scholarship = df['scholarship'].astype(str).str.lower()
+    low_income = income.str.contains('low', regex=False)
+    no_scholarship = scholarship.str.contains('no', regex=False)
+    return (low_income & no_scholarship).to_numpy()
+
+def _numeric_column(df, col):
+    if col not in df.columns:
+        return np.zeros(len(df), dtype=np.float64)
+    return pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+
+def cached_risk_scores(cache, domain, version, model, X, invalid, chunk_size=SCORING_CHUNK_SIZE):
+    """
+    predict_risk_scores with a row-level cache in front of it.
+    Only cache misses reach the model. Returns (scores, cache_hits).
+    """
+    scores = np.full(len(X), 50, dtype=np.int64)
+    valid = np.flatnonzero(~invalid)
+    hashes = hash_feature_rows(X[valid])
+
+    cached, hit = cache.lookup_rows(domain, version, hashes)
+    scores[valid[hit]] = cached[hit]
+
+    miss = valid[~hit]
+    if len(miss):
+        fresh = predict_risk_scores(model, X[miss], None, chunk_size)
+        scores[miss] = fresh
+        cache.store_rows(domain, version, hashes[~hit], fresh)
+    return scores, int(hit.sum())
+
+def cascade_risk_scores(linear_model, margin, X, invalid, score_rows, audit_rate=CASCADE_AUDIT_RATE,
+                        chunk_size=SCORING_CHUNK_SIZE, rng=None):
+    """
+    Cascade inference: the linear tier scores every row; only rows it puts
+    in the grey zone (see ml_engine/cascade.py) get `score_rows(rows)`, the
+    ensemble. An `audit_rate` sample of the finalized rows is scored by the
+    ensemble too, to measure how often the cascade changes a label.
+    Returns (scores, escalated_mask, stats).
+    """
+    scores = predict_risk_scores(linear_model, X, invalid, chunk_size)
+    escalated = ambiguous(scores, margin) & ~invalid
+    finalized = np.flatnonzero(~escalated & ~invalid)
+    rng = rng if rng is not None else np.random.default_rng()
+    audit = finalized[rng.random(len(finalized)) < audit_rate]
+
+    # One ensemble call for escalated + audited rows (sorted, disjoint)
+    rows = np.union1d(np.flatnonzero(escalated), audit)
+    full = score_rows(rows) if len(rows) else np.zeros(0, dtype=np.int64)
+    audit_full = full[np.searchsorted(rows, audit)]
+    scores[escalated] = full[np.searchsorted(rows, np.flatnonzero(escalated))]
+
+    stats = {
+        "rows": len(X),
+        "escalated": int(escalated.sum()),
+        "audited": len(audit),
+        "audit_disagreements": int((risk_bands(scores[audit]) != risk_bands(audit_full)).sum()),
+    }
+    return scores, escalated, stats
+
+def risk_factors(attributor, X, invalid, scores):
+    """
+    top_risk_factor per row ("Low Attendance"). Safe students get "None":
+    whatever nudges a 5% score up isn't something to act on.
+    Without an attributor, the old "Model Prediction" placeholder.
+    """
+    if attributor is None:
+        return np.full(len(scores), "Model Prediction", dtype=object)
+    try:
+        factors = attributor.top_factors(X, invalid)
+    except Exception as e:
+        # Attribution is advisory: never fail the scores because of it
+        print(f"Risk attribution failed: {e}")
+        return np.full(len(scores), "Model Prediction", dtype=object)
+    return np.where((scores < MODERATE_RISK_THRESHOLD) & ~invalid, NO_FACTOR, factors)
+
+def score_frame(df, domain, model, chunk_size=SCORING_CHUNK_SIZE, version=None, cache=None, scores=None,
+                attributor=None, linear=None):
+    """
+    Scores a whole (column-normalized) upload DataFrame at once.
+    Returns a DataFrame with one column per StudentRiskProfile field;
+    results.attrs['cache_hits'] counts rows that skipped the model and
+    results.attrs['timings'] holds {stage: seconds} for features/inference/
+    attribution/assemble.
+
+    version/cache: enable the row-level prediction cache
+    scores: precomputed risk scores (whole-file cache hit), skips inference
+    attributor: RiskAttributor filling top_risk_factor (ml_engine/attribution.py)
+    linear: the domain's linear tier (LoadedModel) -> cascade scoring;
+            results.attrs['cascade'] then holds its routing/audit counts
+    model=None: mock scores, flagged with results.attrs['mock']
+    """
+    features = get_model_features(domain)
+    timings = {}
+
+    # 1. Feature matrix + predictions
+    X = invalid = None
+    cascade = linear is not None and model is not None
+    if attributor is not None or scores is None or cascade:
+        start = time.perf_counter()
+        X, invalid = build_feature_matrix(df, features)
+        timings['features'] = time.perf_counter() - start
+
+    def score_rows(rows, row_invalid):
+        # The ensemble, behind the row-level cache when there is one
+        if cache is not None and model is not None and version is not None:
+            return cached_risk_scores(cache, domain, version, model, X[rows], row_invalid, chunk_size)
+        return predict_risk_scores(model, X[rows], row_invalid, chunk_size), 0
+
+    escalated = None
+    if scores is not None:
+        cache_hits = len(df)
+        if cascade:
+            # Whole-file cache hit: re-route (cheap) only to pick each row's attributor
+            linear_scores = predict_risk_scores(linear.model, X, invalid, chunk_size)
+            escalated = ambiguous(linear_scores, model_margin(linear.model, CASCADE_MARGIN)) & ~invalid
+    elif cascade:
+        start = time.perf_counter()
+        hits = []
+        def ensemble(rows):
+            row_scores, row_hits = score_rows(rows, np.zeros(len(rows), dtype=bool))
+            hits.append(row_hits)
+            return row_scores
+        scores, escalated, cascade_stats = cascade_risk_scores(
+            linear.model, model_margin(linear.model, CASCADE_MARGIN), X, invalid, ensemble,
+            chunk_size=chunk_size)
+        cache_hits = sum(hits)
+        timings['inference'] = time.perf_counter() - start
+    else:
+        start = time.perf_counter()
+        scores, cache_hits = score_rows(slice(None), invalid)
+        timings['inference'] = time.perf_counter() - start
+
+    # 2. Main risk driver per student, for the whole batch at once. In a
+    # cascade each row is explained by the tier that scored it.
+    start = time.perf_counter()
+    if escalated is not None and attributor is not None and linear.attributor is not None:
+        factors = np.empty(len(df), dtype=object)
+        factors[escalated] = risk_factors(attributor, X[escalated], invalid[escalated], scores[escalated])
+        factors[~escalated] = risk_factors(linear.attributor, X[~escalated], invalid[~escalated],
+                                           scores[~escalated])
+    else:
+        factors = risk_factors(attributor, X, invalid, scores)
+    if attributor is not None:
+        timings['attribution'] = time.perf_counter() - start
+
+    # 3. Identity columns (fall back to the row index like the old loop)
+    start_assemble = time.perf_counter()
+    index = df.index.astype(str)
+    if 'student_id' in df.columns:
+        student_ids = df['student_id'].astype(str).to_numpy()
+    else:
+        student_ids = ("STU_" + index).to_numpy()
+    if 'name' in df.columns:
+        names = df['name'].astype(str).to_numpy()
+    else:
+        names = ("Student " + index).to_numpy()
+
+    results = pd.DataFrame({
+        'student_id': student_ids,
+        'name': names,
+        'risk_score': scores,
+        'risk_label': risk_labels(scores),
+        'cgpa': _numeric_column(df, 'cgpa'),
+        'attendance': _numeric_column(df, 'attendance_rate'),
+        'financial_flag': financial_flags(df),
+        'study_hours': _numeric_column(df, 'study_hours_per_day'),
+        'top_risk_factor': factors,
+    })
+    results.attrs['cache_hits'] = cache_hits
+    # No model: the scores are random placeholders, nothing may act on them
+    results.attrs['mock'] = model is None
+    if cascade and 'inference' in timings:
+        results.attrs['cascade'] = cascade_stats
+    timings['assemble'] = time.perf_counter() - start_assemble
+    # Reported back to the caller (the pool may be another process)
+    results.attrs['timings'] = timings
+    return results
+
+def linear_tier_entry(domain):
+    """The domain's linear tier when SCORING_MODE=cascade and one was trained, else None."""
+    if SCORING_MODE != "cascade" or not registry.has_model(linear_tier(domain)):
+        return None
+    return registry.entry(linear_tier(domain))
+
+def scoring_version(domain):
+    """Version of whatever produces the domain's final scores (for the whole-file cache)."""
+    version = registry.version(domain)
+    linear = linear_tier_entry(domain)
+    if version is not None and linear is not None:
+        version = f"{version}|cascade:{linear.version}"
+    return version
+
+def score_batch(df, domain, scores=None):
+    """Pool entry point: resolves the model(s) inside the worker, then scores (cached)."""
+    entry = registry.entry(domain)
+    if entry is None:
+        return score_frame(df, domain, None)
+    return score_frame(df, domain, entry.model, version=entry.version,
+                       cache=prediction_cache, scores=scores, attributor=entry.attributor,
+                       linear=linear_tier_entry(domain))
+
+def to_ndjson(results):
+    """One JSON object per line, straight from the scored frame."""
+    return results.to_json(orient='records', lines=True)
+
+def score_students(domain, students):
+    """Micro-batch entry point: list of student dicts -> list of profile dicts."""
+    return score_batch(pd.DataFrame(students), domain).to_dict('records')
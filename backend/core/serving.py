@@ -0,0 +1,100 @@
+# Path: backend/core/serving.py
+# Per-worker bookkeeping for multi-process serving (SERVE_WORKERS > 1):
+# startup time and memory of each worker, and a host-wide lock so startup
+# chores that must happen once (re-queuing unfinished calls) aren't done by
+# every worker.
+import hashlib
+import os
+import tempfile
+import time
+from backend.core.config import SERVE_WORKERS, DATABASE_URL
+from backend.core.metrics import metrics
+from ml_engine.predictor import registry
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process serving only
+    fcntl = None
+
+_CLAIMS = {}
+_IMPORTED_AT = time.monotonic()
+
+def process_age_seconds():
+    """Seconds since this process was started (since import where /proc isn't available)."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the ")" that closes the command name; starttime is field 22
+            started_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - started_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return time.monotonic() - _IMPORTED_AT
+
+def process_memory(pid="self"):
+    """
+    MB of a process (this one by default): rss (everything resident), pss
+    (shared pages split between the processes mapping them, so it sums to
+    real usage across workers), shared and private.
+    """
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    except OSError:
+        if pid != "self":
+            raise
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        return {"rss": rss, "pss": rss, "shared": 0.0, "private": rss}
+    return {
+        "rss": fields.get("Rss", 0.0),
+        "pss": fields.get("Pss", 0.0),
+        "shared": fields.get("Shared_Clean", 0.0) + fields.get("Shared_Dirty", 0.0),
+        "private": fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0),
+    }
+
+def claim_once(name):
+    """
+    True in exactly one worker per host and database (the first to ask),
+    always True with a single worker. The claim lasts until the process exits.
+    """
+    if SERVE_WORKERS <= 1 or fcntl is None:
+        return True
+    if name in _CLAIMS:
+        return True
+    key = hashlib.sha256(f"{DATABASE_URL}|{name}".encode()).hexdigest()[:16]
+    f = open(os.path.join(tempfile.gettempdir(), f"edupulse-{key}.lock"), "w")
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return False
+    _CLAIMS[name] = f
+    return True
+
+def model_memory():
+    """(MB of loaded model arrays + attribution tables, MB of that memory-mapped)"""
+    total = mapped = 0
+    for entry in registry.entries().values():
+        total += entry.nbytes
+        if entry.memory_mapped:
+            mapped += entry.nbytes
+    return total / 1e6, mapped / 1e6
+
+_STARTUP = metrics.gauge("edupulse_worker_startup_seconds", "Process start to ready to serve", ("pid",))
+metrics.gauge("edupulse_process_memory_bytes", "Memory of the worker answering this scrape", ("kind",),
+              fn=lambda: {(k,): int(v * 1024 * 1024) for k, v in process_memory().items()})
+
+def report_worker_ready():
+    """Called once the worker has loaded its models: logs and exports startup time + memory."""
+    seconds = process_age_seconds()
+    _STARTUP.set(round(seconds, 3), pid=os.getpid())
+    mem = process_memory()
+    model_mb, mapped_mb = model_memory()
+    print(f"👷 Worker {os.getpid()} ready in {seconds:.2f}s | RSS {mem['rss']:.0f} MB "
+          f"(PSS {mem['pss']:.0f}, shared {mem['shared']:.0f}, private {mem['private']:.0f}) | "
+          f"models {model_mb:.1f} MB, {mapped_mb:.1f} MB memory-mapped")
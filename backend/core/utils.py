@@ -0,0 +1,24 @@
+# Path: backend/core/utils.py
+import io
+import pandas as pd
+
+def normalize_columns(df):
+    """Normalize columns to lowercase/underscore (e.g. 'Attendance Rate' -> 'attendance_rate')."""
+    df.columns = [str(c).strip().lower().replace(' ', '_') for c in df.columns]
+    return df
+
+def iter_csv_batches(fileobj, batch_rows, encoding='utf-8'):
+    """
+    Streams a binary file object (e.g. UploadFile.file) as DataFrames of at
+    most `batch_rows` rows. The file is decoded incrementally, so memory use
+    stays flat no matter how large the upload is.
+    The row index keeps counting across batches.
+    """
+    text = io.TextIOWrapper(fileobj, encoding=encoding, newline='')
+    try:
+        with pd.read_csv(text, chunksize=batch_rows) as reader:
+            for batch in reader:
+                yield normalize_columns(batch)
+    finally:
+        # Don't let the wrapper close the underlying upload file
+        text.detach()
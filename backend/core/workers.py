@@ -0,0 +1,80 @@
+# Path: backend/core/workers.py
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+from backend.core.config import SCORING_EXECUTOR, SCORING_WORKERS, SCORING_QUEUE_LIMIT
+from backend.core.metrics import metrics
+
+class PoolSaturated(Exception):
+    """Raised when the scoring queue is full. Endpoints turn this into a 503."""
+
+class ScoringPool:
+    """
+    Runs CPU-bound scoring off the event loop.
+
+    - score(): model work, in a thread or process pool
+    - read():  CSV parsing / serialization, always in threads (file handles
+               can't be sent to another process)
+
+    Admission is bounded: at most `max_workers + queue_limit` uploads can be
+    in flight. Anything beyond that is rejected instead of piling up.
+    """
+
+    def __init__(self, kind=SCORING_EXECUTOR, max_workers=SCORING_WORKERS, queue_limit=SCORING_QUEUE_LIMIT):
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_pending = max_workers + queue_limit
+        self.pending = 0
+        self._lock = threading.Lock()
+
+        if kind == "process":
+            self.executor = ProcessPoolExecutor(max_workers=max_workers)
+            self.io_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scoring-io")
+        elif kind == "thread":
+            self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scoring")
+            self.io_executor = self.executor
+        else:
+            raise ValueError(f"Unknown SCORING_EXECUTOR: {kind}")
+
+    def try_acquire(self):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                raise PoolSaturated(f"{self.pending} uploads already queued")
+            self.pending += 1
+
+    def release(self):
+        with self._lock:
+            self.pending -= 1
+
+    async def score(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(fn, *args))
+
+    async def read(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.io_executor, partial(fn, *args))
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        if self.io_executor is not self.executor:
+            self.io_executor.shutdown(wait=True, cancel_futures=True)
+
+# Created on first use so importing this module never forks processes
+_POOL = None
+
+def get_scoring_pool():
+    global _POOL
+    if _POOL is None:
+        _POOL = ScoringPool()
+        print(f"⚙️ Scoring pool: {_POOL.kind} x{_POOL.max_workers} (queue {_POOL.max_pending - _POOL.max_workers})")
+    return _POOL
+
+metrics.gauge("edupulse_scoring_pending", "Uploads admitted to the scoring pool (running + waiting)",
+              fn=lambda: _POOL.pending if _POOL is not None else 0)
+
+def shutdown_scoring_pool():
+    global _POOL
+    if _POOL is not None:
+        _POOL.shutdown()
+        _POOL = None
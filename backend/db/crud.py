@@ -0,0 +1,272 @@
+# Path: backend/db/crud.py
+from datetime import datetime, timezone
+from sqlalchemy.dialects import sqlite, postgresql
+from backend.core.config import DB_UPSERT_BATCH, PERSIST_PREDICTIONS
+from backend.db.database import SessionLocal, StudentDB, CallLogDB, CallJobDB, PredictionJobDB
+
+# Columns written for every scored student (everything except the surrogate id)
+STUDENT_COLUMNS = ['student_id', 'name', 'risk_score', 'risk_label', 'cgpa', 'attendance',
+                   'financial_flag', 'study_hours', 'top_risk_factor']
+
+def utc_now():
+    """Timezone-aware now, for every timestamp this module writes."""
+    return datetime.now(timezone.utc)
+
+def as_utc(value):
+    """SQLite hands DateTime columns back naive; they were written in UTC."""
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+def _dialect_insert(table, bind):
+    dialect = bind.dialect.name
+    if dialect == 'sqlite':
+        return sqlite.insert(table)
+    if dialect == 'postgresql':
+        return postgresql.insert(table)
+    raise NotImplementedError(f"ON CONFLICT inserts are not supported on {dialect}")
+
+def upsert_statement(table, key, bind):
+    """INSERT ... ON CONFLICT (key) DO UPDATE for the session's dialect."""
+    stmt = _dialect_insert(table, bind)
+    updates = {c.name: stmt.excluded[c.name] for c in table.columns
+               if c.name != key and not c.primary_key}
+    return stmt.on_conflict_do_update(index_elements=[table.c[key]], set_=updates)
+
+def last_per_key(records, key):
+    """Keeps the last record for each key, in first-seen order."""
+    return list({r[key]: r for r in records}.values())
+
+def bulk_upsert_students(db, records, batch_size=DB_UPSERT_BATCH):
+    """
+    Upserts scored students keyed on student_id with executemany() batches.
+    A student_id repeated within a batch keeps its last row (the later row
+    wins, as it would row by row): Postgres rejects a batch that hits the
+    same conflict key twice.
+    Does not commit: the caller owns the transaction.
+    """
+    if not records:
+        return 0
+    stmt = upsert_statement(StudentDB.__table__, 'student_id', db.get_bind())
+    for start in range(0, len(records), batch_size):
+        db.execute(stmt, last_per_key(records[start:start + batch_size], 'student_id'))
+    return len(records)
+
+class StudentWriter:
+    """
+    Persists an upload's scored batches as they are scored, each batch in
+    its own short transaction, so the SQLite write lock is never held while
+    the next batch is parsed and scored (other writers would block on it).
+    Upserts are idempotent: an upload that fails halfway leaves the batches
+    scored so far saved, and re-uploading it just overwrites them.
+    A failed write disables the writer instead of failing the prediction
+    request.
+    """
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self.rows = 0
+        self.failed = False
+
+    def write(self, results):
+        if self.failed:
+            return
+        try:
+            with self.session_factory() as db:
+                rows = bulk_upsert_students(db, results[STUDENT_COLUMNS].to_dict('records'))
+                db.commit()
+            self.rows += rows
+        except Exception as e:
+            # The session rolled this batch back; earlier batches stay saved
+            print(f"❌ Saving students failed, skipping the rest of this upload: {e}")
+            self.failed = True
+
+class CallJobStore:
+    """Persists outbound call jobs so queued calls survive a restart."""
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+
+    def create(self, call_id, student_id, provider, priority=0):
+        self.create_many([{'call_id': call_id, 'student_id': student_id,
+                           'provider': provider, 'priority': priority}])
+
+    def create_many(self, jobs):
+        """Inserts queued jobs in one transaction (bulk escalations)."""
+        if not jobs:
+            return
+        now = utc_now()
+        rows = [{'call_id': j['call_id'], 'student_id': j['student_id'], 'provider': j['provider'],
+                 'priority': j.get('priority', 0), 'status': "queued", 'attempts': 0,
+                 'created_at': now, 'updated_at': now} for j in jobs]
+        with self.session_factory() as db:
+            db.execute(CallJobDB.__table__.insert(), rows)
+            db.commit()
+
+    def update(self, call_id, **fields):
+        fields['updated_at'] = utc_now()
+        with self.session_factory() as db:
+            db.query(CallJobDB).filter(CallJobDB.call_id == call_id).update(fields)
+            db.commit()
+
+    def unfinished(self):
+        """Jobs still waiting to be dialed when the process stopped, oldest first."""
+        with self.session_factory() as db:
+            jobs = (db.query(CallJobDB)
+                    .filter(CallJobDB.status == "queued")
+                    .order_by(CallJobDB.id).all())
+            return [{'call_id': j.call_id, 'student_id': j.student_id, 'provider': j.provider,
+                     'attempts': j.attempts or 0, 'priority': j.priority or 0} for j in jobs]
+
+    def mark_interrupted(self):
+        """
+        Jobs left "dialing" by a stopped process may already have reached the
+        student, so they are never redialed automatically: they become
+        "needs_review". Returns how many.
+        """
+        with self.session_factory() as db:
+            count = (db.query(CallJobDB)
+                     .filter(CallJobDB.status == "dialing")
+                     .update({CallJobDB.status: "needs_review",
+                              CallJobDB.last_error: "Process stopped mid-dial; not redialed",
+                              CallJobDB.updated_at: utc_now()}, synchronize_session=False))
+            db.commit()
+        return count
+
+    def requeue(self, call_ids):
+        """Puts calls this process cancelled mid-dial at shutdown back in the queue."""
+        if not call_ids:
+            return 0
+        with self.session_factory() as db:
+            count = (db.query(CallJobDB)
+                     .filter(CallJobDB.call_id.in_(call_ids), CallJobDB.status == "dialing")
+                     .update({CallJobDB.status: "queued",
+                              CallJobDB.last_error: "Cancelled at shutdown; redialed on restart",
+                              CallJobDB.updated_at: utc_now()}, synchronize_session=False))
+            db.commit()
+        return count
+
+class PredictionJobStore:
+    """
+    Progress of background scoring jobs. A chunk is committed together with
+    its students, so after a restart a job resumes at chunks_done.
+    """
+
+    COLUMNS = ['job_id', 'domain', 'status', 'chunk_rows', 'total_rows', 'rows_done', 'chunks_done',
+               'at_risk_count', 'rows_at_start', 'error', 'created_at', 'started_at', 'updated_at',
+               'finished_at']
+
+    def __init__(self, session_factory=SessionLocal, persist_students=PERSIST_PREDICTIONS):
+        self.session_factory = session_factory
+        self.persist_students = persist_students
+
+    def create(self, job_id, domain, chunk_rows, total_rows=None):
+        now = utc_now()
+        with self.session_factory() as db:
+            db.execute(PredictionJobDB.__table__.insert(), [{
+                'job_id': job_id, 'domain': domain, 'status': "queued", 'chunk_rows': chunk_rows,
+                'total_rows': total_rows, 'rows_done': 0, 'chunks_done': 0, 'at_risk_count': 0,
+                'rows_at_start': 0, 'created_at': now, 'updated_at': now}])
+            db.commit()
+        return self.get(job_id)
+
+    def get(self, job_id):
+        with self.session_factory() as db:
+            job = db.query(PredictionJobDB).filter(PredictionJobDB.job_id == job_id).first()
+            return {c: as_utc(getattr(job, c)) for c in self.COLUMNS} if job is not None else None
+
+    def _update(self, job_id, **fields):
+        fields['updated_at'] = utc_now()
+        with self.session_factory() as db:
+            db.query(PredictionJobDB).filter(PredictionJobDB.job_id == job_id).update(fields)
+            db.commit()
+
+    def mark_running(self, job_id, rows_done):
+        self._update(job_id, status="running", started_at=utc_now(), rows_at_start=rows_done, error=None)
+
+    def commit_chunk(self, job_id, chunk, results):
+        """
+        Upserts the chunk's students and advances the job past it in ONE
+        transaction. False (nothing written) if chunk isn't the next one,
+        i.e. someone else already committed it.
+        """
+        job = PredictionJobDB
+        with self.session_factory() as db:
+            advanced = (db.query(job)
+                        .filter(job.job_id == job_id, job.chunks_done == chunk)
+                        .update({job.chunks_done: chunk + 1,
+                                 job.rows_done: job.rows_done + len(results),
+                                 job.at_risk_count: job.at_risk_count
+                                                    + int((results['risk_label'] == "High Risk").sum()),
+                                 job.updated_at: utc_now()}, synchronize_session=False))
+            if not advanced:
+                db.rollback()
+                return False
+            if self.persist_students:
+                bulk_upsert_students(db, results[STUDENT_COLUMNS].to_dict('records'))
+            db.commit()
+        return True
+
+    def finish(self, job_id, status, error=None):
+        """Marks a job completed / failed; a completed job's total_rows becomes exact."""
+        fields = {'status': status, 'error': error, 'finished_at': utc_now()}
+        if status == "completed":
+            fields['total_rows'] = PredictionJobDB.rows_done
+        self._update(job_id, **fields)
+
+    def unfinished(self):
+        """Jobs that were queued or running when the process stopped, oldest first."""
+        with self.session_factory() as db:
+            jobs = (db.query(PredictionJobDB.job_id)
+                    .filter(PredictionJobDB.status.in_(["queued", "running"]))
+                    .order_by(PredictionJobDB.id).all())
+            return [job_id for (job_id,) in jobs]
+
+def recently_contacted(student_ids, since, chunk_size=500):
+    """
+    Subset of student_ids that should not be called again: a call_logs entry
+    at or after `since`, or a call job that is still queued or dialing (or
+    was cut off mid-dial and may have got through).
+    """
+    contacted = set()
+    since_iso = since.isoformat()
+    with SessionLocal() as db:
+        # Chunked IN lists stay under SQLite's bound-parameter limit
+        for start in range(0, len(student_ids), chunk_size):
+            chunk = student_ids[start:start + chunk_size]
+            logged = (db.query(CallLogDB.student_id)
+                      .filter(CallLogDB.student_id.in_(chunk), CallLogDB.timestamp >= since_iso))
+            pending = (db.query(CallJobDB.student_id)
+                       .filter(CallJobDB.student_id.in_(chunk),
+                               CallJobDB.status.in_(["queued", "dialing", "needs_review"])))
+            contacted.update(sid for (sid,) in logged.union(pending))
+    return contacted
+
+def insert_call_summaries(summaries, session_factory=SessionLocal):
+    """
+    Writes a batch of call summaries to call_logs in ONE transaction.
+    Summaries whose call_id is already stored (or repeated in the batch)
+    are skipped (ON CONFLICT DO NOTHING), so a retried webhook never
+    creates a second row.
+    Returns the number of rows actually inserted.
+    """
+    if not summaries:
+        return 0
+    timestamp = utc_now().isoformat()
+    records = [{'call_id': s.get('call_id'), 'student_id': s['student_id'],
+                'transcript': s['transcript'], 'sentiment': s['sentiment'],
+                'action_item': s['action_item'], 'timestamp': timestamp} for s in summaries]
+
+    with session_factory() as db:
+        table = CallLogDB.__table__
+        # One multi-row INSERT; RETURNING lists only the rows that went in
+        stmt = (_dialect_insert(table, db.get_bind()).values(records)
+                .on_conflict_do_nothing(index_elements=[table.c.call_id])
+                .returning(table.c.id))
+        inserted = len(db.execute(stmt).all())
+        db.commit()
+    return inserted
+
+def save_call_summary(summary):
+    """Stores one finished call's summary in call_logs."""
+    return insert_call_summaries([summary])
@@ -1,17 +1,53 @@
 # Path: backend/db/database.py
-from sqlalchemy import create_engine, Column, Integer, String, Float, Boolean, DateTime
+from sqlalchemy import create_engine, event, inspect, text, Column, Integer, String, Float, Boolean, DateTime
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from backend.core.config import (DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, SQLITE_BUSY_TIMEOUT_MS,
+                                 SQLITE_CACHE_KB, SQLITE_MMAP_BYTES)
 
-# 1. Create the SQLite Database URL
-# This will create a file named 'sql_app.db' in your backend folder
-SQLALCHEMY_DATABASE_URL = "sqlite:///./sql_app.db"
+# 1. The Database URL
+# Defaults to a file named 'sql_app.db' in the working directory.
+# Set DATABASE_URL to point the same code at Postgres.
+SQLALCHEMY_DATABASE_URL = DATABASE_URL
+
+def tune_sqlite_connection(dbapi_connection, connection_record):
+    """
+    Runs on every new SQLite connection:
+    - WAL lets readers keep going while one writer commits
+    - synchronous=NORMAL is durable under WAL and far fewer fsyncs
+    - busy_timeout waits for the write lock instead of "database is locked"
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_KB}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_BYTES}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+def create_db_engine(url=SQLALCHEMY_DATABASE_URL, tuned=True):
+    """Engine with a pool sized to the worker count (and SQLite pragmas when tuned)."""
+    if not url.startswith("sqlite"):
+        return create_engine(url, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_pre_ping=True)
+
+    # check_same_thread=False is needed only for SQLite
+    connect_args = {"check_same_thread": False}
+    if url in ("sqlite://", "sqlite:///:memory:"):
+        # One shared connection, otherwise every connection is a new empty DB
+        return create_engine(url, connect_args=connect_args, poolclass=StaticPool)
+    if not tuned:
+        return create_engine(url, connect_args=connect_args)
+
+    connect_args["timeout"] = SQLITE_BUSY_TIMEOUT_MS / 1000
+    engine = create_engine(url, connect_args=connect_args,
+                           pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
+    event.listen(engine, "connect", tune_sqlite_connection)
+    return engine
 
 # 2. Create the Engine
-# check_same_thread=False is needed only for SQLite
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+engine = create_db_engine()
 
 # 3. Create the SessionLocal class
 # We use this to create a database session for each request
@@ -41,12 +77,46 @@ class CallLogDB(Base):
     __tablename__ = "call_logs"
 
     id = Column(Integer, primary_key=True, index=True)
+    call_id = Column(String, unique=True, index=True, nullable=True)  # dedupes retried webhooks
     student_id = Column(String, index=True)
     transcript = Column(String)
     sentiment = Column(String)
     action_item = Column(String)
     timestamp = Column(String) # In real app, use DateTime
 
+class CallJobDB(Base):
+    __tablename__ = "call_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    call_id = Column(String, unique=True, index=True)
+    student_id = Column(String, index=True)
+    provider = Column(String)
+    status = Column(String, index=True)  # "queued", "dialing", "completed", "failed", "needs_review"
+    attempts = Column(Integer, default=0)
+    priority = Column(Integer, default=0)  # lower runs first; 0 = manual call
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+
+class PredictionJobDB(Base):
+    __tablename__ = "prediction_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String, unique=True, index=True)
+    domain = Column(String)
+    status = Column(String, index=True)  # "queued", "running", "completed", "failed"
+    chunk_rows = Column(Integer)         # rows per committed chunk
+    total_rows = Column(Integer, nullable=True)  # estimated from the upload's lines until completed
+    rows_done = Column(Integer, default=0)
+    chunks_done = Column(Integer, default=0)     # chunks 0..chunks_done-1 are committed
+    at_risk_count = Column(Integer, default=0)
+    rows_at_start = Column(Integer, default=0)   # rows_done when the current run started (ETA)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True))
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
 # 5. Dependency Injection
 # This function is used in endpoints.py to get a DB session
 def get_db():
@@ -56,6 +126,28 @@ def get_db():
     finally:
         db.close()
 
+# (table, column) -> statements that add it to a table created by older code
+ADDED_COLUMNS = {
+    ("call_logs", "call_id"): [
+        "ALTER TABLE call_logs ADD COLUMN call_id VARCHAR",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_call_logs_call_id ON call_logs (call_id)",
+    ],
+    ("call_jobs", "priority"): [
+        "ALTER TABLE call_jobs ADD COLUMN priority INTEGER DEFAULT 0",
+    ],
+}
+
+def add_missing_columns(bind):
+    """create_all() never alters existing tables, so add columns newer code expects."""
+    inspector = inspect(bind)
+    for (table, column), statements in ADDED_COLUMNS.items():
+        if column in {c['name'] for c in inspector.get_columns(table)}:
+            continue
+        with bind.begin() as conn:
+            for statement in statements:
+                conn.execute(text(statement))
+
 # 6. Auto-create Tables
 # This runs when this file is imported to ensure tables exist
-Base.metadata.create_all(bind=engine)
\ No newline at end of file
+Base.metadata.create_all(bind=engine)
+add_missing_columns(engine)
\ No newline at end of file
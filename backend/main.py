@@ -1,6 +1,17 @@
-from fastapi import FastAPI
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from backend.api.v1 import endpoints
+from backend.core.workers import shutdown_scoring_pool
+from backend.core.dispatch import start_call_dispatcher, stop_call_dispatcher
+from backend.core.jobs import start_job_runner, stop_job_runner
+from backend.core.metrics import MetricsMiddleware, metrics, render_metrics
+from backend.core.config import SCORING_MODE, SERVE_WORKERS, SERVE_HOST, SERVE_PORT
+from backend.core.serving import claim_once, report_worker_ready
+from ml_engine.predictor import registry, ensure_flat_artifacts
 import uvicorn
 
 # Initialize App
@@ -20,9 +31,50 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency histograms + opt-in profiling (PROFILE_SAMPLE_RATE)
+app.add_middleware(MetricsMiddleware)
+
 # --- ROUTER REGISTRATION ---
 app.include_router(endpoints.router, prefix="/api/v1")
 
+# --- LIFECYCLE ---
+@app.on_event("startup")
+def warm_models():
+    # Load + warm every domain now so the first upload isn't the slow one
+    registry.load_all(warm=True)
+    if SCORING_MODE == "cascade":
+        registry.load_linear_tiers(warm=True)
+    registry.start_watcher()
+
+@app.on_event("startup")
+async def start_agent_calls():
+    # Also re-queues calls that were pending when the server last stopped
+    # (in one worker only, or every worker would dial them)
+    await start_call_dispatcher(resume=claim_once("resume_calls"))
+
+@app.on_event("startup")
+async def start_jobs():
+    # Picks up background scoring jobs from their last committed chunk
+    await start_job_runner(resume=claim_once("resume_jobs"))
+
+@app.on_event("startup")
+def worker_ready():
+    report_worker_ready()
+
+@app.on_event("shutdown")
+async def stop_agent_calls():
+    await stop_call_dispatcher()
+
+@app.on_event("shutdown")
+async def stop_jobs():
+    # Before the scoring pool goes away; unfinished jobs resume on next start
+    await stop_job_runner()
+
+@app.on_event("shutdown")
+def stop_workers():
+    registry.stop_watcher()
+    shutdown_scoring_pool()
+
 # --- HEALTH CHECK ---
 @app.get("/")
 def root():
@@ -31,6 +83,26 @@ def root():
         "docs_url": "http://localhost:8000/docs"
     }
 
+# --- METRICS (Prometheus scrape target) ---
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def prometheus_metrics():
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (METRICS_ENABLED=0)")
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 # --- RUNNER ---
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    if SERVE_WORKERS > 1:
+        # Production: N worker processes on one socket (python -m backend.main).
+        # Flat artifacts are memory-mapped, so the workers share one physical
+        # copy of the models instead of loading N.
+        os.environ.setdefault("MODEL_FORMAT", "flat")
+        if os.environ["MODEL_FORMAT"] == "flat":
+            # Compile missing artifacts once, in a throwaway process, so this
+            # supervisor doesn't keep the sklearn models in memory
+            with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                pool.submit(ensure_flat_artifacts).result()
+        uvicorn.run("backend.main:app", host=SERVE_HOST, port=SERVE_PORT, workers=SERVE_WORKERS)
+    else:
+        # Development: one process that reloads on code changes
+        uvicorn.run("backend.main:app", host=SERVE_HOST, port=SERVE_PORT, reload=True)
\ No newline at end of file
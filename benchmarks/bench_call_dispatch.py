@@ -0,0 +1,60 @@
+# Path: benchmarks/bench_call_dispatch.py
+# Load test for the outbound call dispatcher against the mock telephony provider.
+# Usage (from the repo root):
+#   python benchmarks/bench_call_dispatch.py [calls] [concurrency] [rate_per_minute] [call_seconds]
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from backend.db.database import Base, create_db_engine
+from backend.db.crud import CallJobStore
+from ai_agent.agent_logic import CallDispatcher, RateLimiter
+from ai_agent.mock_call import MockTelephonyProvider
+
+async def main(calls, concurrency, rate_per_minute, call_seconds):
+    path = os.path.join(tempfile.mkdtemp(), "bench_calls.db")
+    engine = create_db_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    store = CallJobStore(sessionmaker(bind=engine))
+
+    provider = MockTelephonyProvider(min_seconds=call_seconds * 0.5, max_seconds=call_seconds * 1.5,
+                                     failure_rate=0.05)
+    finished = asyncio.Event()
+    done = {"n": 0}
+
+    async def on_complete(summary):
+        done["n"] += 1
+
+    dispatcher = CallDispatcher(store, {"mock": (provider, RateLimiter(rate_per_minute))}, "mock",
+                                concurrency, max_attempts=3, retry_base_seconds=0.2,
+                                on_complete=on_complete)
+    await dispatcher.start()
+
+    start = time.perf_counter()
+    for i in range(calls):
+        await dispatcher.enqueue(f"STU_{i:06d}")
+    enqueue_seconds = time.perf_counter() - start
+
+    while dispatcher.stats["completed"] + dispatcher.stats["failed"] < calls:
+        await asyncio.sleep(0.05)
+    elapsed = time.perf_counter() - start
+    await dispatcher.stop()
+
+    print(f"🏁 {calls} calls, concurrency {concurrency}, limit {rate_per_minute:.0f}/min, ~{call_seconds}s per call")
+    print(f"   enqueue (persisted): {enqueue_seconds:.2f} s ({calls / enqueue_seconds:.0f} jobs/s)")
+    print(f"   completed {dispatcher.stats['completed']}, failed {dispatcher.stats['failed']}, "
+          f"retried {dispatcher.stats['retried']}")
+    print(f"   throughput: {dispatcher.stats['completed'] / elapsed * 60:.0f} calls/minute "
+          f"(ceiling: {min(rate_per_minute, concurrency / call_seconds * 60):.0f})")
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    calls = int(args[0]) if len(args) > 0 else 500
+    concurrency = int(args[1]) if len(args) > 1 else 50
+    rate = float(args[2]) if len(args) > 2 else 6000
+    call_seconds = float(args[3]) if len(args) > 3 else 0.5
+    asyncio.run(main(calls, concurrency, rate, call_seconds))
@@ -0,0 +1,54 @@
+# Path: benchmarks/bench_cascade.py
+# Single-model vs cascade (linear tier first, ensemble for the grey zone)
+# inference on each domain's training data: time, share of rows escalated
+# and label agreement with scoring everything through the ensemble.
+# Needs model_{domain}_linear.pkl (written by train_models.py).
+# Usage (from the repo root): python benchmarks/bench_cascade.py [domain ...]
+import os
+import sys
+import time
+import warnings
+import numpy as np
+import pandas as pd
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_DIR)
+from ml_engine.predictor import (ModelRegistry, DOMAINS, DATASET_DIR, DOMAIN_DATASETS, get_model_features,
+                                 linear_tier)
+from ml_engine.cascade import model_margin, risk_bands
+from backend.core.scoring import predict_risk_scores, cascade_risk_scores
+
+warnings.filterwarnings("ignore")
+
+def _best_of(fn, repeats=3):
+    best, result = float("inf"), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
+
+def main(domains):
+    registry = ModelRegistry(watch_interval=0, attribution=False)
+    print(f"{'domain':<12} {'model':<28} {'margin':>6} {'single ms':>10} {'cascade ms':>11} "
+          f"{'speedup':>8} {'escalated':>10} {'agreement':>10}")
+    for domain in domains:
+        if not registry.has_model(linear_tier(domain)):
+            print(f"{domain:<12} ⚠️ no linear tier, run train_models.py")
+            continue
+        features = get_model_features(domain)
+        X = pd.read_csv(os.path.join(DATASET_DIR, DOMAIN_DATASETS[domain]), usecols=features)[features]
+        X = X.to_numpy(dtype=np.float64)
+        invalid = np.zeros(len(X), dtype=bool)
+        model, linear = registry.get(domain), registry.get(linear_tier(domain))
+        margin = model_margin(linear)
+
+        full, t_single = _best_of(lambda: predict_risk_scores(model, X, invalid))
+        (scores, escalated, _), t_cascade = _best_of(lambda: cascade_risk_scores(
+            linear, margin, X, invalid, lambda rows: predict_risk_scores(model, X[rows]), audit_rate=0.0))
+        agreement = (risk_bands(scores) == risk_bands(full)).mean()
+        print(f"{domain:<12} {type(model).__name__:<28} {margin:>6} {t_single:>10.1f} {t_cascade:>11.1f} "
+              f"{t_single / t_cascade:>7.1f}x {escalated.mean():>10.1%} {agreement:>10.2%}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or DOMAINS)
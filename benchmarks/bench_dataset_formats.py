@@ -0,0 +1,86 @@
+# Path: benchmarks/bench_dataset_formats.py
+# CSV vs columnar (.cols, memory-mapped) training-data loads: time and peak RSS.
+# The domain's dataset is tiled up to `rows` rows in a temp directory.
+# Usage (from the repo root): python benchmarks/bench_dataset_formats.py [rows] [domain]
+import multiprocessing as mp
+import os
+import resource
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+ML_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ml_engine")
+sys.path.insert(0, ML_DIR)
+from columnar import columnar_path, convert_csv, load_features, load_column
+from predictor import get_model_features
+
+DATASETS = {'engineering': 'engineering.csv', 'med': 'medical.csv', 'ca': 'ca.csv',
+            'mba': 'mba.csv', 'school': 'school.csv'}
+
+def _load(fmt, path, features, out):
+    start = time.perf_counter()
+    if fmt == "csv":
+        # What train_models.py used to do: parse everything, keep the features
+        df = pd.read_csv(path)
+        X, y = df[features].to_numpy(), df['dropout_status'].to_numpy()
+    elif fmt == "csv-usecols":
+        df = pd.read_csv(path, usecols=features + ['dropout_status'])
+        X, y = df[features].to_numpy(), df['dropout_status'].to_numpy()
+    else:
+        X, y = load_features(path, features), load_column(path, 'dropout_status')
+    # Touch every value so mmap'd pages are really read
+    checksum = float(np.nansum(X, dtype=np.float64)) + float(y.sum())
+    out.put((time.perf_counter() - start, peak_rss_mb(), checksum))
+
+def peak_rss_mb():
+    # VmHWM, not ru_maxrss: Linux carries ru_maxrss over from the parent across exec
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def measure(fmt, path, features):
+    # Fresh process per load so peak RSS isn't polluted by the previous one
+    ctx = mp.get_context("spawn")
+    out = ctx.Queue()
+    proc = ctx.Process(target=_load, args=(fmt, path, features, out))
+    proc.start()
+    result = out.get()
+    proc.join()
+    return result
+
+def main(rows, domain):
+    features = get_model_features(domain)
+    source = pd.read_csv(os.path.join(ML_DIR, "dataset", DATASETS[domain]))
+    reps = -(-rows // len(source))
+    df = pd.concat([source] * reps, ignore_index=True).iloc[:rows]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, DATASETS[domain])
+        start = time.perf_counter()
+        df.to_csv(csv_path, index=False)
+        convert_csv(csv_path, features)
+        print(f"🧪 {domain}: {rows} rows (setup {time.perf_counter() - start:.1f}s)")
+        del df, source
+
+        cols_path = columnar_path(csv_path)
+        cols_size = sum(os.path.getsize(os.path.join(cols_path, f)) for f in os.listdir(cols_path))
+        print(f"   CSV {os.path.getsize(csv_path) / 1e6:.1f} MB | .cols {cols_size / 1e6:.1f} MB "
+              f"(features.npy {os.path.getsize(os.path.join(cols_path, 'features.npy')) / 1e6:.1f} MB)")
+
+        results = {}
+        for fmt, path in [("csv", csv_path), ("csv-usecols", csv_path), ("npy-mmap", cols_path)]:
+            seconds, peak_mb, checksum = measure(fmt, path, features)
+            results[fmt] = checksum
+            print(f"   {fmt:<12} load {seconds * 1000:>8.0f} ms   peak RSS {peak_mb:>7.0f} MB")
+
+        # float32 storage must not change the features (they are all float32-exact here)
+        assert abs(results["csv"] - results["npy-mmap"]) <= 1e-6 * abs(results["csv"]), results
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    domain = sys.argv[2] if len(sys.argv) > 2 else "engineering"
+    main(rows, domain)
@@ -0,0 +1,86 @@
+# Path: benchmarks/bench_db_upsert.py
+# Per-row ORM inserts vs bulk INSERT ... ON CONFLICT into the students table.
+# Usage (from the repo root): python benchmarks/bench_db_upsert.py [rows]
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from backend.db.database import Base, StudentDB
+from backend.db.crud import bulk_upsert_students, STUDENT_COLUMNS
+
+def make_rows(n, seed=42):
+    rng = np.random.default_rng(seed)
+    scores = rng.integers(0, 100, n)
+    return pd.DataFrame({
+        'student_id': [f"STU_{i:07d}" for i in range(n)],
+        'name': [f"Student {i}" for i in range(n)],
+        'risk_score': scores,
+        'risk_label': np.where(scores >= 75, "High Risk", np.where(scores >= 40, "Moderate", "Safe")),
+        'cgpa': rng.uniform(4, 10, n).round(2),
+        'attendance': rng.uniform(40, 100, n).round(1),
+        'financial_flag': rng.random(n) < 0.2,
+        'study_hours': rng.uniform(0, 10, n).round(1),
+        'top_risk_factor': "Model Prediction",
+    })[STUDENT_COLUMNS].to_dict('records')
+
+def fresh_session(path):
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)(), engine
+
+def orm_per_row_commit(db, rows):
+    for r in rows:
+        db.add(StudentDB(**r))
+        db.commit()
+
+def orm_per_row_one_commit(db, rows):
+    for r in rows:
+        db.add(StudentDB(**r))
+        db.flush()
+    db.commit()
+
+def bulk_upsert(db, rows):
+    bulk_upsert_students(db, rows)
+    db.commit()
+
+def run(name, fn, rows, path):
+    db, engine = fresh_session(path)
+    start = time.perf_counter()
+    fn(db, rows)
+    elapsed = time.perf_counter() - start
+    db.close()
+    engine.dispose()
+    print(f"   {name:<28} {elapsed:8.3f} s  {len(rows) / elapsed:10.0f} rows/s")
+    return elapsed
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 30000
+    rows = make_rows(n)
+    path = os.path.join(tempfile.mkdtemp(), "bench_upsert.db")
+
+    print(f"🏁 Persisting {n} scored students (SQLite file)")
+    # A commit per row is painfully slow, so time it on a slice and scale up
+    sample = rows[:min(n, 2000)]
+    t_commit = run("ORM, commit per row*", orm_per_row_commit, sample, path) * (n / len(sample))
+    t_flush = run("ORM, flush per row", orm_per_row_one_commit, rows, path)
+    t_bulk = run("bulk upsert (executemany)", bulk_upsert, rows, path)
+
+    # Upserting the same rows again exercises the ON CONFLICT path
+    db, engine = fresh_session(path)
+    bulk_upsert(db, rows)
+    start = time.perf_counter()
+    bulk_upsert(db, rows)
+    t_reupsert = time.perf_counter() - start
+    print(f"   {'bulk upsert (all conflicts)':<28} {t_reupsert:8.3f} s  {n / t_reupsert:10.0f} rows/s")
+
+    print(f"\n   * extrapolated from {len(sample)} rows: ~{t_commit:.1f} s for {n}")
+    print(f"🏆 bulk upsert is {t_commit / t_bulk:.0f}x faster than commit-per-row, "
+          f"{t_flush / t_bulk:.1f}x faster than flush-per-row")
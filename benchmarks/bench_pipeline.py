@@ -0,0 +1,188 @@
+# Path: benchmarks/bench_pipeline.py
+# End-to-end benchmark of the scoring pipeline, stage by stage, with a
+# machine-readable result file and regression alerts against a baseline.
+#
+# For every (domain, rows) it generates a balanced upload (fast_generator.py,
+# same profiles as sample_generator.py) and times, in a fresh process:
+#   parse      CSV bytes -> DataFrames (iter_csv_batches, as the endpoint does)
+#   features   build_feature_matrix
+#   predict    predict_risk_scores (predict_proba, chunked)
+#   attribution top_risk_factor for every row (RiskAttributor.top_factors)
+#   assemble   score_frame with the scores already known (labels, flags, ids)
+#   serialize  StudentRiskProfile objects -> PredictionResponse JSON (pydantic)
+#   request    POST /predict/{domain} through the FastAPI test client (all of the above)
+# plus model load time and the process's peak RSS.
+#
+# Usage (from the repo root):
+#   python benchmarks/bench_pipeline.py [--domains ...] [--sizes 1000 10000 ...] [--out results.json]
+#   python benchmarks/bench_pipeline.py --baseline benchmarks/baseline.json [--threshold 0.2]
+# Exit code 1 when any stage is slower (or peak RSS higher) than the baseline
+# by more than the threshold.
+import argparse
+import io
+import json
+import multiprocessing as mp
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, "ml_engine"))
+
+DOMAINS = ['engineering', 'med', 'ca', 'mba', 'school']
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+STAGES = ['parse_ms', 'features_ms', 'predict_ms', 'attribution_ms', 'assemble_ms', 'serialize_ms', 'request_ms']
+# Differences below this are timer noise, whatever the percentage
+NOISE_FLOOR_MS = 5.0
+
+def peak_rss_mb():
+    # VmHWM, not ru_maxrss: Linux carries ru_maxrss over from the parent across exec
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+def _run_case(domain, rows, seed, db_path, out):
+    # Each case is measured cold, without caches or DB writes in the way
+    os.environ.update({"PERSIST_PREDICTIONS": "0", "PREDICTION_CACHE_ROWS": "0",
+                       "PREDICTION_CACHE_FILES": "0", "MODEL_WATCH_INTERVAL": "0",
+                       "DATABASE_URL": f"sqlite:///{db_path}"})
+    import numpy as np
+    import pandas as pd
+    from fastapi.testclient import TestClient
+    from fast_generator import build_name_pool, upload_chunk
+    from backend.core.config import CSV_BATCH_ROWS
+    from backend.core.utils import iter_csv_batches
+    from backend.core.scoring import build_feature_matrix, predict_risk_scores, score_frame
+    from backend.api.v1.models import PredictionResponse, StudentRiskProfile
+    from ml_engine.predictor import registry, get_model_features
+
+    rng = np.random.default_rng(np.random.SeedSequence([seed, rows, DOMAINS.index(domain)]))
+    payload = upload_chunk(domain, rng, 0, rows, build_name_pool(seed)).to_csv(index=False).encode()
+    result = {"domain": domain, "rows": rows, "upload_mb": round(len(payload) / 1e6, 2)}
+
+    entry = registry.entry(domain)
+    result["model_load_ms"] = round(entry.load_seconds * 1000, 1) if entry else None
+    model = entry.model if entry else None
+
+    df, ms = _timed(lambda: pd.concat(list(iter_csv_batches(io.BytesIO(payload), CSV_BATCH_ROWS))))
+    result["parse_ms"] = ms
+    (X, invalid), result["features_ms"] = _timed(build_feature_matrix, df, get_model_features(domain))
+    scores, result["predict_ms"] = _timed(predict_risk_scores, model, X, invalid)
+    attributor = entry.attributor if entry else None
+    _, result["attribution_ms"] = _timed(lambda: attributor.top_factors(X, invalid) if attributor else None)
+    frame, result["assemble_ms"] = _timed(lambda: score_frame(df, domain, model, scores=scores))
+
+    def serialize():
+        data = [StudentRiskProfile(**r) for r in frame.to_dict('records')]
+        return PredictionResponse(status="success", total_students=len(data),
+                                  at_risk_count=int((frame['risk_label'] == "High Risk").sum()),
+                                  data=data).model_dump_json()
+    body, result["serialize_ms"] = _timed(serialize)
+    result["response_mb"] = round(len(body) / 1e6, 2)
+    del body, frame
+
+    from backend.main import app
+    with TestClient(app) as client:
+        response, result["request_ms"] = _timed(
+            client.post, f"/api/v1/predict/{domain}", files={"file": ("upload.csv", payload, "text/csv")})
+        if response.status_code != 200:
+            raise RuntimeError(f"/predict/{domain} returned {response.status_code}: {response.text[:200]}")
+
+    for key in STAGES:
+        result[key] = round(result[key], 1)
+    result["request_rows_per_s"] = round(rows / (result["request_ms"] / 1000))
+    result["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    out.put(result)
+
+def run_case(domain, rows, seed):
+    # Fresh process per case: peak RSS and model load are per case, not cumulative
+    ctx = mp.get_context("spawn")
+    out = ctx.Queue()
+    with tempfile.TemporaryDirectory() as tmp:
+        proc = ctx.Process(target=_run_case, args=(domain, rows, seed, os.path.join(tmp, "bench.db"), out))
+        proc.start()
+        proc.join()
+        if proc.exitcode != 0:
+            raise RuntimeError(f"{domain}/{rows} crashed (exit code {proc.exitcode})")
+        return out.get()
+
+def environment():
+    import numpy, pandas, sklearn
+    try:
+        commit = subprocess.run(["git", "-C", REPO_DIR, "rev-parse", "--short", "HEAD"],
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {"commit": commit, "python": platform.python_version(), "numpy": numpy.__version__,
+            "pandas": pandas.__version__, "sklearn": sklearn.__version__, "cpus": os.cpu_count(),
+            "model_format": os.getenv("MODEL_FORMAT", "sklearn"), "platform": platform.platform()}
+
+def compare(results, baseline, threshold):
+    """Alerts for every metric that got worse than baseline by more than `threshold`."""
+    base = {(r["domain"], r["rows"]): r for r in baseline["results"]}
+    alerts = []
+    for r in results:
+        b = base.get((r["domain"], r["rows"]))
+        if b is None:
+            continue
+        for key in STAGES + ["peak_rss_mb"]:
+            old, new = b.get(key), r.get(key)  # stages added later have no baseline
+            if not old or new is None:
+                continue
+            floor = NOISE_FLOOR_MS if key.endswith("_ms") else 0.0
+            if new > old * (1 + threshold) and new - old > floor:
+                alerts.append(f"{r['domain']}/{r['rows']}: {key} {old} -> {new} (+{(new / old - 1):.0%})")
+    return alerts
+
+def print_table(results):
+    print(f"\n{'domain':<12} {'rows':>9} " + " ".join(f"{k[:-3]:>10}" for k in STAGES) + f" {'rss MB':>8}")
+    for r in results:
+        print(f"{r['domain']:<12} {r['rows']:>9} " + " ".join(f"{r[k]:>10.1f}" for k in STAGES)
+              + f" {r['peak_rss_mb']:>8.0f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scoring pipeline benchmark")
+    parser.add_argument("--domains", nargs="+", default=DOMAINS, choices=DOMAINS)
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=os.path.join("benchmarks", "results", "pipeline.json"))
+    parser.add_argument("--baseline", help="earlier result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    results = []
+    for domain in args.domains:
+        for rows in args.sizes:
+            r = run_case(domain, rows, args.seed)
+            print(f"⏱️ {domain} {rows:>9,} rows: request {r['request_ms']:.0f} ms "
+                  f"({r['request_rows_per_s']:,} rows/s), peak RSS {r['peak_rss_mb']:.0f} MB")
+            results.append(r)
+    print_table(results)
+
+    report = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "environment": environment(), "results": results}
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"📝 Wrote {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            alerts = compare(results, json.load(f), args.threshold)
+        if alerts:
+            print(f"🚨 {len(alerts)} regressions over {args.threshold:.0%}:")
+            for alert in alerts:
+                print(f"   {alert}")
+            raise SystemExit(1)
+        print(f"✅ No regressions over {args.threshold:.0%} against {args.baseline}")
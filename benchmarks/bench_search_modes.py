@@ -0,0 +1,56 @@
+# Path: benchmarks/bench_search_modes.py
+# Exhaustive GridSearchCV vs successive halving (+ GB early stopping) for
+# every MODEL_ZOO entry: wall clock, CV accuracy and held-out accuracy.
+# Usage (from the repo root):
+#   python benchmarks/bench_search_modes.py [domain] [train_rows] [--json out.json]
+import json
+import os
+import sys
+import warnings
+
+START_DIR = os.getcwd()
+ML_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ml_engine")
+sys.path.insert(0, ML_DIR)
+os.chdir(ML_DIR)  # train_models.py uses dataset/ and models/ relative paths
+from train_models import MODEL_ZOO, DOMAIN_DATASETS, load_domain_data, search_algorithm
+from predictor import get_model_features
+
+warnings.filterwarnings("ignore")
+
+def main(domain, train_rows, json_path):
+    X_train, X_test, y_train, y_test = load_domain_data(DOMAIN_DATASETS[domain], get_model_features(domain))
+    if train_rows:
+        # Smaller train split for a quick run; the test split stays the same
+        X_train, y_train = X_train.iloc[:train_rows], y_train.iloc[:train_rows]
+    print(f"🔬 {domain}: {len(X_train)} train rows, {len(X_test)} test rows")
+
+    rows = []
+    print(f"\n{'algo':<20} {'search':<8} {'fits':>5} {'seconds':>9} {'cv':>7} {'test':>7}")
+    for algo_name in MODEL_ZOO:
+        for mode in ("grid", "halving"):
+            r = search_algorithm(algo_name, X_train, y_train, X_test, y_test, mode=mode)
+            rows.append({"algo": algo_name, "search": mode, "n_fits": r["n_fits"],
+                         "seconds": round(r["seconds"], 2), "cv_score": round(r["cv_score"], 4),
+                         "test_score": round(r["test_score"], 4), "best_params": r["best_params"]})
+            print(f"{algo_name:<20} {mode:<8} {r['n_fits']:>5} {r['seconds']:>9.1f} "
+                  f"{r['cv_score']:>7.2%} {r['test_score']:>7.2%}")
+
+    grid = sum(r["seconds"] for r in rows if r["search"] == "grid")
+    halving = sum(r["seconds"] for r in rows if r["search"] == "halving")
+    print(f"\n⏱️ grid {grid:.1f}s vs halving {halving:.1f}s ({grid / max(halving, 1e-9):.1f}x faster)")
+
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump({"domain": domain, "train_rows": len(X_train), "results": rows}, f, indent=2, default=str)
+        print(f"📝 Wrote {json_path}")
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    json_path = None
+    if "--json" in args:
+        i = args.index("--json")
+        json_path = os.path.join(START_DIR, args[i + 1])
+        del args[i:i + 2]
+    domain = args[0] if len(args) > 0 else "engineering"
+    train_rows = int(args[1]) if len(args) > 1 else 0
+    main(domain, train_rows, json_path)
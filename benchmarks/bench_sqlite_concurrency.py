@@ -0,0 +1,90 @@
+# Path: benchmarks/bench_sqlite_concurrency.py
+# Concurrent webhook-style writes + prediction-style reads against SQLite,
+# with the old bare engine vs the tuned one (WAL, pragmas, pool).
+# Usage (from the repo root): python benchmarks/bench_sqlite_concurrency.py [writers] [readers] [seconds]
+import os
+import sys
+import tempfile
+import threading
+import time
+from sqlalchemy import select, func
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from backend.db.database import Base, StudentDB, CallLogDB, create_db_engine
+from backend.db.crud import bulk_upsert_students
+
+def seed(engine, n=20000):
+    db = sessionmaker(bind=engine)()
+    bulk_upsert_students(db, [
+        {'student_id': f"STU_{i:06d}", 'name': f"Student {i}", 'risk_score': i % 100,
+         'risk_label': "Safe", 'cgpa': 7.0, 'attendance': 80.0, 'financial_flag': False,
+         'study_hours': 3.0, 'top_risk_factor': "Model Prediction"} for i in range(n)])
+    db.commit()
+    db.close()
+
+def run(label, tuned, writers, readers, seconds):
+    path = os.path.join(tempfile.mkdtemp(), "bench_concurrency.db")
+    engine = create_db_engine(f"sqlite:///{path}", tuned=tuned)
+    Base.metadata.create_all(bind=engine)
+    seed(engine)
+    Session = sessionmaker(bind=engine)
+
+    stop = threading.Event()
+    counts = {'writes': 0, 'reads': 0, 'locked': 0, 'errors': 0}
+    lock = threading.Lock()
+
+    def bump(key):
+        with lock:
+            counts[key] += 1
+
+    def writer(wid):
+        i = 0
+        while not stop.is_set():
+            db = Session()
+            try:
+                db.add(CallLogDB(student_id=f"STU_{i % 20000:06d}", transcript="...",
+                                 sentiment="Neutral", action_item="None", timestamp=str(time.time())))
+                db.commit()
+                bump('writes')
+            except Exception as e:
+                db.rollback()
+                bump('locked' if 'locked' in str(e) else 'errors')
+            finally:
+                db.close()
+            i += 1
+
+    def reader(rid):
+        while not stop.is_set():
+            db = Session()
+            try:
+                db.execute(select(func.avg(StudentDB.risk_score)).where(StudentDB.risk_score >= 40)).scalar()
+                bump('reads')
+            except Exception as e:
+                bump('locked' if 'locked' in str(e) else 'errors')
+            finally:
+                db.close()
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    engine.dispose()
+
+    print(f"   {label:<26} writes/s {counts['writes'] / seconds:8.0f}   reads/s {counts['reads'] / seconds:8.0f}"
+          f"   'database is locked' {counts['locked']:5d}   other errors {counts['errors']}")
+    return counts['writes'] / seconds
+
+if __name__ == "__main__":
+    writers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    readers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 5
+
+    print(f"🏁 {writers} writer threads + {readers} reader threads for {seconds:.0f}s each")
+    before = run("bare engine (old)", False, writers, readers, seconds)
+    after = run("tuned (WAL + pragmas)", True, writers, readers, seconds)
+    print(f"🏆 write throughput x{after / before:.1f}")
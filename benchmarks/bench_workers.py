@@ -0,0 +1,162 @@
+# Path: benchmarks/bench_workers.py
+# Multi-worker serving: startup time, memory per worker and upload throughput
+# for N uvicorn workers (python -m backend.main with SERVE_WORKERS=N).
+#
+# For every (model format, workers) it starts a server on a free port, waits
+# until every worker has logged "ready", posts the same upload from
+# --clients threads for --seconds, then reads each worker's memory from
+# /proc/<pid>/smaps_rollup. PSS splits shared pages between the workers
+# mapping them, so "host MB" (the PSS sum) is what the workers really cost
+# together: with memory-mapped flat models it should grow by much less than
+# one model copy per worker.
+#
+# Usage (from the repo root, Linux):
+#   python benchmarks/bench_workers.py [--workers 1 2 4] [--formats flat sklearn] [--rows 1000]
+#                                      [--clients 8] [--seconds 20] [--out results.json]
+import argparse
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, "ml_engine"))
+
+READY = re.compile(r"Worker (\d+) ready in ([\d.]+)s .*\| models ([\d.]+) MB, ([\d.]+) MB memory-mapped")
+STARTUP_TIMEOUT_S = 300
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def upload_payload(domain, rows, seed=42):
+    import numpy as np
+    from fast_generator import build_name_pool, upload_chunk
+    rng = np.random.default_rng(seed)
+    return upload_chunk(domain, rng, 0, rows, build_name_pool(seed)).to_csv(index=False).encode()
+
+def start_server(workers, model_format, port, db_path):
+    env = dict(os.environ, SERVE_WORKERS=str(workers), SERVE_HOST="127.0.0.1", SERVE_PORT=str(port),
+               MODEL_FORMAT=model_format, MODEL_WATCH_INTERVAL="0", PERSIST_PREDICTIONS="0",
+               PREDICTION_CACHE_ROWS="0", PREDICTION_CACHE_FILES="0", PYTHONUNBUFFERED="1",
+               DATABASE_URL=f"sqlite:///{db_path}")
+    cmd = [sys.executable, "-m", "backend.main"]
+    if workers == 1:
+        # SERVE_WORKERS=1 serves with reload (a file-watching supervisor): time one plain worker instead
+        cmd = [sys.executable, "-m", "uvicorn", "backend.main:app", "--host", "127.0.0.1", "--port", str(port)]
+    return subprocess.Popen(cmd, cwd=REPO_DIR, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                            text=True)
+
+def wait_ready(proc, workers):
+    """{pid: (startup s, model MB, mapped MB)} once every worker has logged ready."""
+    ready, lines = {}, []
+    deadline = time.monotonic() + STARTUP_TIMEOUT_S
+
+    def _read():
+        for line in proc.stdout:
+            lines.append(line)
+            match = READY.search(line)
+            if match:
+                ready[int(match.group(1))] = tuple(float(g) for g in match.groups()[1:])
+    threading.Thread(target=_read, daemon=True).start()
+
+    while len(ready) < workers:
+        if proc.poll() is not None or time.monotonic() > deadline:
+            raise RuntimeError("server didn't start:\n" + "".join(lines[-30:]))
+        time.sleep(0.2)
+    return ready
+
+def hammer(url, payload, clients, seconds):
+    """(requests/s, errors) with `clients` threads posting the upload back to back."""
+    import requests
+    done, errors = [0], [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + seconds
+
+    def _client():
+        session = requests.Session()
+        while time.monotonic() < stop_at:
+            response = session.post(url, files={"file": ("upload.csv", payload, "text/csv")})
+            with lock:
+                if response.status_code == 200:
+                    done[0] += 1
+                else:
+                    errors[0] += 1
+
+    start = time.monotonic()
+    threads = [threading.Thread(target=_client) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return done[0] / (time.monotonic() - start), errors[0]
+
+def run_case(workers, model_format, domain, payload, rows, clients, seconds):
+    from backend.core.serving import process_memory
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        proc = start_server(workers, model_format, port, os.path.join(tmp, "bench.db"))
+        try:
+            ready = wait_ready(proc, workers)
+            req_s, errors = hammer(f"http://127.0.0.1:{port}/api/v1/predict/{domain}", payload, clients, seconds)
+            memory = {pid: process_memory(pid) for pid in ready}
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    per_worker = list(memory.values())
+    return {
+        "format": model_format, "workers": workers, "domain": domain, "rows": rows,
+        "startup_s": round(max(r[0] for r in ready.values()), 2),
+        "model_mb": round(max(r[1] for r in ready.values()), 1),
+        "mapped_mb": round(max(r[2] for r in ready.values()), 1),
+        "rss_mb_per_worker": round(sum(m["rss"] for m in per_worker) / workers, 1),
+        "private_mb_per_worker": round(sum(m["private"] for m in per_worker) / workers, 1),
+        "host_mb": round(sum(m["pss"] for m in per_worker), 1),
+        "requests_per_s": round(req_s, 2),
+        "rows_per_s": round(req_s * rows),
+        "errors": errors,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multi-worker serving benchmark")
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4])
+    parser.add_argument("--formats", nargs="+", default=["flat", "sklearn"], choices=["flat", "sklearn"])
+    parser.add_argument("--domain", default="ca")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--out", default=os.path.join("benchmarks", "results", "workers.json"))
+    args = parser.parse_args()
+
+    from ml_engine.predictor import ensure_flat_artifacts
+    ensure_flat_artifacts()  # else the first flat server spends its startup exporting
+    payload = upload_payload(args.domain, args.rows)
+
+    results = []
+    for model_format in args.formats:
+        for workers in args.workers:
+            r = run_case(workers, model_format, args.domain, payload, args.rows, args.clients, args.seconds)
+            print(f"⏱️ {model_format} x{workers}: ready in {r['startup_s']:.1f}s, {r['requests_per_s']:.1f} req/s, "
+                  f"RSS {r['rss_mb_per_worker']:.0f} MB/worker, host {r['host_mb']:.0f} MB")
+            results.append(r)
+
+    print(f"\n{'format':<8} {'workers':>7} {'startup s':>9} {'models MB':>9} {'mmap MB':>8} {'RSS/worker':>10} "
+          f"{'private/w':>9} {'host MB':>8} {'req/s':>7} {'rows/s':>9}")
+    for r in results:
+        print(f"{r['format']:<8} {r['workers']:>7} {r['startup_s']:>9.1f} {r['model_mb']:>9.1f} {r['mapped_mb']:>8.1f} "
+              f"{r['rss_mb_per_worker']:>10.0f} {r['private_mb_per_worker']:>9.0f} {r['host_mb']:>8.0f} "
+              f"{r['requests_per_s']:>7.1f} {r['rows_per_s']:>9,}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w") as f:
+        json.dump({"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "cpus": os.cpu_count(), "results": results},
+                  f, indent=2)
+    print(f"📝 Wrote {args.out}")
@@ -13,6 +13,10 @@ import StudyPlanner from "./components/StudyPlanner";
 
 
 const API_BASE = "http://localhost:8000/api/v1";
+// Uploads bigger than this are scored as a background job (POST /jobs) and polled
+const JOB_UPLOAD_BYTES = 5 * 1024 * 1024;
+const JOB_POLL_MS = 1000;
+const JOB_PAGE_ROWS = 10000;
 
 // --- CONFIGURATION WITH DYNAMIC FIELDS ---
 const DOMAINS = [
@@ -120,6 +124,7 @@ export default function App() {
   const [loading, setLoading] = useState(false);
   const [stats, setStats] = useState({ total: 0, risk: 0, aid: 0 });
   const [selectedStudent, setSelectedStudent] = useState(null);
+  const [jobProgress, setJobProgress] = useState(null);
 
   // --- SORTING STATE ---
   const [sortConfig, setSortConfig] = useState({
@@ -172,6 +177,32 @@ export default function App() {
     await processFile(file);
   };
 
+  // Large files: queue a job, poll its progress, then page through the results
+  const runJob = async (payload) => {
+    const { data: job } = await axios.post(`${API_BASE}/jobs/${domain.id}`, payload);
+    let status = job;
+    while (status.status === "queued" || status.status === "running") {
+      setJobProgress(status);
+      await new Promise((r) => setTimeout(r, JOB_POLL_MS));
+      status = (await axios.get(`${API_BASE}/jobs/${job.job_id}`)).data;
+    }
+    if (status.status !== "completed") {
+      alert(`Error: ${status.error || "Scoring job failed"}`);
+      return null;
+    }
+
+    const rows = [];
+    let offset = 0;
+    while (offset !== null) {
+      const { data: page } = await axios.get(`${API_BASE}/jobs/${job.job_id}/results`, {
+        params: { offset, limit: JOB_PAGE_ROWS },
+      });
+      rows.push(...page.data);
+      offset = page.next_offset;
+    }
+    return { data: rows, total_students: status.rows_done, at_risk_count: status.at_risk_count };
+  };
+
   const processFile = async (file) => {
     setLoading(true);
     const payload = new FormData();
@@ -179,21 +210,26 @@ export default function App() {
 
     try {
       await new Promise((r) => setTimeout(r, 1500));
-      const res = await axios.post(`${API_BASE}/predict/${domain.id}`, payload);
+      const result =
+        file.size > JOB_UPLOAD_BYTES
+          ? await runJob(payload)
+          : (await axios.post(`${API_BASE}/predict/${domain.id}`, payload)).data;
+      if (!result) return;
 
-      setStudents(res.data.data);
+      setStudents(result.data);
       setStats({
-        total: res.data.total_students,
-        risk: res.data.at_risk_count,
-        aid: res.data.data.filter((s) => s.financial_flag).length,
+        total: result.total_students,
+        risk: result.at_risk_count,
+        aid: result.data.filter((s) => s.financial_flag).length,
       });
 
-      if (mode === "single" && res.data.data.length > 0) {
-        setSelectedStudent(res.data.data[0]);
+      if (mode === "single" && result.data.length > 0) {
+        setSelectedStudent(result.data[0]);
       }
     } catch (err) {
       alert(`Error: ${err.response?.data?.detail || "Backend Offline"}`);
     } finally {
+      setJobProgress(null);
       setLoading(false);
     }
   };
@@ -505,6 +541,17 @@ export default function App() {
                     <p className="text-sm text-slate-500 mt-2">
                       Drag & drop or click to browse
                     </p>
+                    {jobProgress && (
+                      <p className="text-sm text-indigo-600 font-medium mt-3">
+                        Scoring {jobProgress.rows_done.toLocaleString()}
+                        {jobProgress.total_rows
+                          ? ` / ${jobProgress.total_rows.toLocaleString()}`
+                          : ""}{" "}
+                        students
+                        {jobProgress.eta_seconds != null &&
+                          ` (~${Math.ceil(jobProgress.eta_seconds)}s left)`}
+                      </p>
+                    )}
                   </div>
                 </motion.div>
               )}
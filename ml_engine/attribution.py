@@ -0,0 +1,237 @@
+# Path: ml_engine/attribution.py
+# Per-student risk drivers ("top_risk_factor") for a whole scored matrix at once.
+#
+# Trees: every node's value is the sample-weighted mean of the leaves under it.
+# Walking root -> leaf, each split moves the prediction by
+# value[child] - value[parent], credited to the split feature. Those path sums
+# are precomputed for every node, so a row's contributions are one table
+# lookup per tree at the leaf it lands in (no per-row tree walks in Python).
+# Linear: coef * (x - reference), in log-odds.
+import os
+import numpy as np
+import pandas as pd
+
+try:
+    from ml_engine.flat_model import FlatEnsemble, compile_model
+except ImportError:  # running as a script from inside ml_engine/
+    from flat_model import FlatEnsemble, compile_model
+
+# Rows attributed at once. Bounds the (rows x trees) leaf-index matrix while
+# keeping per-call overhead of sklearn's apply() small.
+ATTRIBUTION_BLOCK_ROWS = 16384
+
+# How each feature reads on a counselor's screen ("Low Attendance")
+FACTOR_NAMES = {
+    'attendance_rate': "Attendance",
+    'cgpa': "CGPA",
+    'study_hours_per_day': "Study Hours",
+    'past_failures': "Past Failures",
+    'project_score': "Project Score",
+    'coding_skills': "Coding Skills",
+    'clinical_score': "Clinical Score",
+    'hospital_hours': "Hospital Hours",
+    'audit_hours': "Audit Hours",
+    'law_score': "Law Score",
+    'internship_score': "Internship Score",
+    'case_studies': "Case Studies",
+    'homework_rate': "Homework Rate",
+    'parent_meetings': "Parent Meetings",
+}
+NO_FACTOR = "None"
+INVALID_FACTOR = "Invalid Input"
+
+def _levels(flat):
+    """Node indices of every tree, grouped by depth (roots first)."""
+    is_leaf = flat.feature < 0
+    levels = []
+    frontier = np.asarray(flat.roots, dtype=np.intp)
+    while len(frontier):
+        levels.append(frontier)
+        frontier = flat.children[frontier[~is_leaf[frontier]]].ravel()
+    return levels
+
+def path_contribution_table(flat):
+    """
+    (table, node_value): table[node] is the per-feature sum of value changes
+    along the path from the node's root to it (float32, n_nodes x n_features).
+    """
+    levels = _levels(flat)
+    is_leaf = flat.feature < 0
+    value = flat.value.astype(np.float64, copy=True)
+
+    # Internal values as the weighted mean of their children, bottom-up.
+    # Boosting leaves are Newton-updated after fitting, so the stored internal
+    # values wouldn't add up; forests already satisfy this.
+    if flat.weight is not None:
+        for level in reversed(levels):
+            internal = level[~is_leaf[level]]
+            left, right = flat.children[internal, 0], flat.children[internal, 1]
+            w_left, w_right = flat.weight[left], flat.weight[right]
+            total = w_left + w_right
+            total[total == 0] = 1.0
+            value[internal] = (w_left * value[left] + w_right * value[right]) / total
+
+    table = np.zeros((len(value), flat.n_features_in_), dtype=np.float32)
+    for level in levels:
+        internal = level[~is_leaf[level]]
+        split_on = flat.feature[internal]
+        for side in (0, 1):
+            child = flat.children[internal, side]
+            table[child] = table[internal]
+            table[child, split_on] += (value[child] - value[internal]).astype(np.float32)
+    return table, value
+
+class RiskAttributor:
+    """
+    Feature contributions to the risk score for many rows at once.
+
+    contributions(X) -> (n_rows, n_features), in probability units for
+    forests and log-odds for boosting / linear models. Positive = pushes
+    the student towards dropout.
+    """
+
+    def __init__(self, kind, features, reference=None, table=None, roots=None, scale=1.0,
+                 apply_fn=None, coef=None):
+        self.kind = kind
+        self.features = list(features)
+        self.reference = None if reference is None else np.asarray(reference, dtype=np.float64)
+        self.table = table
+        self.roots = roots
+        self.scale = scale
+        self.apply_fn = apply_fn
+        self.coef = coef
+
+        names = [FACTOR_NAMES.get(f, f.replace('_', ' ').title()) for f in self.features]
+        self._low = np.array([f"Low {n}" for n in names], dtype=object)
+        self._high = np.array([f"High {n}" for n in names], dtype=object)
+        self._missing = np.array([f"Missing {n}" for n in names], dtype=object)
+        self._plain = np.array(names, dtype=object)
+
+    @property
+    def nbytes(self):
+        return self.table.nbytes if self.table is not None else 0
+
+    def _tree_contributions(self, X):
+        leaves = self.apply_fn(X)
+        out = np.zeros((len(X), len(self.features)), dtype=np.float64)
+        for t in range(leaves.shape[1]):
+            out += self.table[leaves[:, t]]
+        return out * self.scale
+
+    def contributions(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if self.kind == 'linear':
+            deviation = X if self.reference is None else X - self.reference
+            # A blank cell contributes nothing rather than NaN
+            return np.nan_to_num(deviation * self.coef, nan=0.0)
+
+        out = np.empty((len(X), len(self.features)), dtype=np.float64)
+        for start in range(0, len(X), ATTRIBUTION_BLOCK_ROWS):
+            block = X[start:start + ATTRIBUTION_BLOCK_ROWS]
+            out[start:start + len(block)] = self._tree_contributions(block)
+        return out
+
+    def top_factors(self, X, invalid=None):
+        """The strongest risk driver per row as a label ("Low Attendance"), NO_FACTOR if none."""
+        X = np.asarray(X, dtype=np.float64)
+        rows = np.arange(len(X))
+        contrib = self.contributions(X)
+        top = contrib.argmax(axis=1) if len(X) else np.zeros(0, dtype=np.intp)
+        value = X[rows, top]
+
+        if self.reference is not None:
+            labels = np.where(value > self.reference[top], self._high[top], self._low[top])
+        else:
+            labels = self._plain[top]
+        labels = np.where(np.isnan(value), self._missing[top], labels)
+        labels = np.where(contrib[rows, top] > 0, labels, NO_FACTOR)
+        if invalid is not None:
+            labels = np.where(invalid, INVALID_FACTOR, labels)
+        return labels
+
+def _sklearn_apply(model, flat):
+    """Leaf index per (row, tree) in the flat node table, via sklearn's own tree walk."""
+    offsets = np.asarray(flat.roots, dtype=np.intp)
+
+    def apply(X):
+        try:
+            leaves = model.apply(np.asarray(X, dtype=np.float32))
+        except ValueError:
+            # e.g. NaN into a model fitted without missing values
+            return flat.apply(X)
+        if leaves.ndim == 3:  # GradientBoosting: (rows, stages, 1), as floats
+            leaves = leaves[:, :, 0]
+        return leaves.astype(np.intp, copy=False) + offsets
+    return apply
+
+def build_attributor(model, features, reference=None):
+    """RiskAttributor for a fitted RandomForest / GradientBoosting / LogisticRegression (or FlatEnsemble)."""
+    flat = compile_model(model)
+    if reference is None and flat.reference is not None:
+        reference = flat.reference
+    if flat.kind == 'linear':
+        return RiskAttributor('linear', features, reference, coef=np.asarray(flat.coef, dtype=np.float64))
+
+    # Exported artifacts carry the table (memory-mapped when the model is)
+    table = flat.contrib if flat.contrib is not None else path_contribution_table(flat)[0]
+    scale = 1.0 / flat.n_trees if flat.kind == 'forest' else flat.learning_rate
+    # sklearn's apply() is C and much faster than the flat walker on deep forests
+    apply_fn = flat.apply if isinstance(model, FlatEnsemble) else _sklearn_apply(model, flat)
+    return RiskAttributor(flat.kind, features, reference, table=table, roots=flat.roots,
+                          scale=scale, apply_fn=apply_fn)
+
+def dataset_reference(csv_path, features):
+    """Mean feature row of a training CSV (the "typical student"), or None if it isn't there."""
+    if not os.path.exists(csv_path):
+        return None
+    df = pd.read_csv(csv_path, usecols=lambda c: c in set(features))
+    if not set(features) <= set(df.columns):
+        return None
+    return df[features].mean().to_numpy(dtype=np.float64)
+
+# --- CONSISTENCY CHECK ---
+if __name__ == "__main__":
+    import sys
+    import time
+    import joblib
+    from predictor import MODEL_DIR, DOMAINS, DATASET_DIR, DOMAIN_DATASETS, get_model_features
+
+    # Usage: python attribution.py [domain ...]   (run from ml_engine/)
+    for domain in sys.argv[1:] or DOMAINS:
+        path = os.path.join(MODEL_DIR, f"model_{domain}.pkl")
+        if not os.path.exists(path):
+            print(f"⚠️ Missing: {path}")
+            continue
+        features = get_model_features(domain)
+        csv_path = os.path.join(DATASET_DIR, DOMAIN_DATASETS[domain])
+        model = joblib.load(path)
+        X = pd.read_csv(csv_path, usecols=features)[features].to_numpy(dtype=np.float64)
+
+        start = time.perf_counter()
+        attributor = build_attributor(model, features, dataset_reference(csv_path, features))
+        t_build = time.perf_counter() - start
+
+        # Path contributions + bias must add back up to the model output
+        flat = compile_model(model)
+        contrib = attributor.contributions(X)
+        if flat.kind == 'linear':
+            expected = X @ flat.coef + flat.intercept
+            got = contrib.sum(axis=1) + attributor.reference @ flat.coef + flat.intercept
+        else:
+            _, node_value = path_contribution_table(flat)
+            p = model.predict_proba(X)[:, 1]
+            if flat.kind == 'forest':
+                expected, bias = p, node_value[flat.roots].mean()
+            else:
+                expected = np.log(p / (1 - p))
+                bias = flat.init_raw + flat.learning_rate * node_value[flat.roots].sum()
+            got = contrib.sum(axis=1) + bias
+        max_diff = float(np.max(np.abs(expected - got)))
+        assert max_diff < 1e-3, f"{domain}: contributions don't add up (max diff {max_diff:.3g})"
+
+        start = time.perf_counter(); model.predict_proba(X); t_predict = time.perf_counter() - start
+        start = time.perf_counter(); factors = attributor.top_factors(X); t_attr = time.perf_counter() - start
+        common = pd.Series(factors).value_counts().head(3)
+        print(f"✅ {domain}: {type(model).__name__} adds up (max diff {max_diff:.1g}) | build {t_build * 1000:.0f} ms, "
+              f"table {attributor.nbytes / 1e6:.1f} MB | {len(X)} rows: predict {t_predict * 1000:.0f} ms, "
+              f"attribution {t_attr * 1000:.0f} ms | top: {', '.join(f'{k} ({v})' for k, v in common.items())}")
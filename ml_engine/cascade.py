@@ -0,0 +1,66 @@
+# Path: ml_engine/cascade.py
+# Two-tier (cascade) scoring helpers: a cheap linear model scores everyone,
+# and only rows it places near a label threshold go to the full ensemble.
+#
+#   linear score < 40 - margin          -> "Safe", final
+#   linear score >= 75 + margin         -> "High Risk", final
+#   anything in [40 - margin, 75 + margin) -> ensemble
+#
+# The margin is calibrated per domain at training time (calibrate_margin) and
+# stored on the linear model as `cascade_margin_`.
+import numpy as np
+
+try:
+    from ml_engine.predictor import HIGH_RISK_THRESHOLD, MODERATE_RISK_THRESHOLD
+except ImportError:  # running as a script from inside ml_engine/
+    from predictor import HIGH_RISK_THRESHOLD, MODERATE_RISK_THRESHOLD
+
+# Used when a linear tier carries no calibrated margin
+DEFAULT_MARGIN = 5
+# Margins tried by calibrate_margin, smallest (cheapest) first
+MARGIN_CANDIDATES = [0, 2, 5, 8, 10, 15, 20, 25]
+
+def risk_scores(model, X):
+    """int(P(risk) * 100) per row, same rounding as the API."""
+    return (model.predict_proba(X)[:, 1] * 100).astype(np.int64)
+
+def risk_bands(scores):
+    """0 = Safe, 1 = Moderate, 2 = High Risk"""
+    return np.digitize(scores, [MODERATE_RISK_THRESHOLD, HIGH_RISK_THRESHOLD])
+
+def ambiguous(linear_scores, margin):
+    """Rows the linear tier can't settle on its own."""
+    return (linear_scores >= MODERATE_RISK_THRESHOLD - margin) & (linear_scores < HIGH_RISK_THRESHOLD + margin)
+
+def model_margin(linear_model, override=None):
+    if override is not None:
+        return override
+    return getattr(linear_model, "cascade_margin_", DEFAULT_MARGIN)
+
+def cascade_report(linear_scores, full_scores, margin):
+    """What cascading with `margin` would do on rows scored by both tiers."""
+    grey = ambiguous(linear_scores, margin)
+    final = ~grey
+    cascaded = np.where(grey, full_scores, linear_scores)
+    return {
+        "margin": margin,
+        "escalation_rate": float(grey.mean()) if len(grey) else 0.0,
+        # Agreement of the rows the linear tier finalized alone
+        "finalized_agreement": float((risk_bands(linear_scores[final]) == risk_bands(full_scores[final])).mean())
+                               if final.any() else 1.0,
+        # Labels of the whole cascade vs scoring everything with the ensemble
+        "label_agreement": float((risk_bands(cascaded) == risk_bands(full_scores)).mean()) if len(grey) else 1.0,
+    }
+
+def calibrate_margin(linear_scores, full_scores, target_agreement=0.99, candidates=MARGIN_CANDIDATES):
+    """
+    Smallest margin whose cascaded labels match the ensemble's on at least
+    `target_agreement` of the rows. Returns its cascade_report (the widest
+    candidate's if none gets there).
+    """
+    report = None
+    for margin in candidates:
+        report = cascade_report(linear_scores, full_scores, margin)
+        if report["label_agreement"] >= target_agreement:
+            break
+    return report
@@ -0,0 +1,144 @@
+# Path: ml_engine/columnar.py
+# Columnar on-disk datasets: one .npy file per column plus a meta.json,
+# so training reads only the columns it needs, memory-mapped.
+#
+#   dataset/engineering.cols/
+#       meta.json             rows, column dtypes, category labels, source CSV stamp
+#       attendance_rate.npy   float32
+#       family_income.npy     int8 codes (labels in meta.json)
+#       student_id.npy        fixed-width UTF-8 bytes
+#       dropout_status.npy    int8
+#       features.npy          (rows, n_features) float32 block in model feature order
+#
+# Usage (from ml_engine/): python columnar.py   -> converts every dataset/*.csv
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+# Strings with at most this many distinct values are stored as int8 codes
+MAX_CATEGORIES = 127
+LABEL_COLUMN = 'dropout_status'
+
+def columnar_path(csv_path):
+    """dataset/engineering.csv -> dataset/engineering.cols"""
+    return os.path.splitext(csv_path)[0] + ".cols"
+
+def _source_stamp(csv_path):
+    if not os.path.exists(csv_path):
+        return None
+    st = os.stat(csv_path)
+    return [st.st_mtime_ns, st.st_size]
+
+def _encode(series):
+    """Column -> (array, meta) with the most compact dtype that fits."""
+    if series.name == LABEL_COLUMN:
+        return series.to_numpy(dtype=np.int8), {"kind": "label"}
+    if pd.api.types.is_numeric_dtype(series):
+        return series.to_numpy(dtype=np.float32, na_value=np.nan), {"kind": "numeric"}
+
+    values = series.astype(str)
+    if values.nunique() <= MAX_CATEGORIES:
+        codes = values.astype('category')
+        return (codes.cat.codes.to_numpy(dtype=np.int8),
+                {"kind": "category", "categories": list(codes.cat.categories)})
+    # Bytes, not numpy unicode (4 bytes per character)
+    return values.str.encode('utf-8').to_numpy(dtype=bytes), {"kind": "text"}
+
+def write_columnar(df, path, feature_block=None, source_csv=None):
+    """
+    Writes df as a .cols directory (atomically: built aside, then renamed).
+    feature_block: model feature names to also store as one float32 matrix.
+    """
+    tmp_path = f"{path}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    meta = {"rows": len(df), "columns": {}, "feature_block": None,
+            "source_csv": _source_stamp(source_csv) if source_csv else None}
+    for col in df.columns:
+        array, col_meta = _encode(df[col])
+        np.save(os.path.join(tmp_path, f"{col}.npy"), array)
+        col_meta["dtype"] = str(array.dtype)
+        meta["columns"][col] = col_meta
+
+    if feature_block:
+        block = np.ascontiguousarray(df[feature_block].to_numpy(dtype=np.float32, na_value=np.nan))
+        np.save(os.path.join(tmp_path, "features.npy"), block)
+        meta["feature_block"] = list(feature_block)
+
+    with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+
+    old_path = f"{path}.old"
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    return path
+
+def read_meta(path):
+    with open(os.path.join(path, "meta.json")) as f:
+        return json.load(f)
+
+def is_current(path, csv_path):
+    """True if the .cols directory exists and wasn't built from an older CSV."""
+    if not os.path.exists(os.path.join(path, "meta.json")):
+        return False
+    stamp = read_meta(path).get("source_csv")
+    if stamp is None:
+        # Unstamped: nothing ties it to a CSV that exists now, so the CSV wins
+        return not os.path.exists(csv_path)
+    return stamp == _source_stamp(csv_path)
+
+def load_column(path, col, mmap=True):
+    return np.load(os.path.join(path, f"{col}.npy"), mmap_mode='r' if mmap else None)
+
+def load_features(path, features, mmap=True):
+    """
+    (rows, n_features) float32 matrix. Zero-copy from features.npy when it
+    matches `features`, otherwise stacked from the individual column files.
+    """
+    meta = read_meta(path)
+    if meta.get("feature_block") == list(features):
+        return np.load(os.path.join(path, "features.npy"), mmap_mode='r' if mmap else None)
+    return np.column_stack([load_column(path, f, mmap) for f in features]).astype(np.float32, copy=False)
+
+def read_columnar(path, columns=None, mmap=True):
+    """
+    DataFrame with only `columns` (default: all). Categoricals come back as
+    pandas categoricals built on the stored codes.
+    """
+    meta = read_meta(path)
+    data = {}
+    for col in columns or list(meta["columns"]):
+        col_meta = meta["columns"][col]
+        array = load_column(path, col, mmap)
+        if col_meta["kind"] == "category":
+            data[col] = pd.Categorical.from_codes(np.asarray(array), col_meta["categories"])
+        elif col_meta["kind"] == "text":
+            data[col] = np.char.decode(array, 'utf-8')
+        else:
+            data[col] = array
+    return pd.DataFrame(data)
+
+def convert_csv(csv_path, feature_block=None):
+    df = pd.read_csv(csv_path)
+    return write_columnar(df, columnar_path(csv_path), feature_block, source_csv=csv_path)
+
+if __name__ == "__main__":
+    import time
+    from train_models import DATA_DIR, DOMAIN_DATASETS
+    from predictor import get_model_features
+
+    for domain, domain_file in DOMAIN_DATASETS.items():
+        csv_path = f"{DATA_DIR}/{domain_file}"
+        if not os.path.exists(csv_path):
+            print(f"⚠️ Missing: {csv_path}")
+            continue
+        start = time.perf_counter()
+        path = convert_csv(csv_path, get_model_features(domain))
+        size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+        print(f"✅ {csv_path} -> {path} ({os.path.getsize(csv_path) / 1e6:.1f} MB -> {size / 1e6:.1f} MB, "
+              f"{time.perf_counter() - start:.1f}s)")
@@ -0,0 +1,226 @@
+# Path: ml_engine/fast_generator.py
+# Vectorized synthetic data at load-test scale (millions of rows).
+#
+# Same distributions as generate_data.py (labeled training sets) and
+# sample_generator.py (balanced upload batches), but:
+#   - every column is drawn with NumPy in one call per chunk (no per-row Python)
+#   - names / emails come from a Faker pool built once, then combined vectorized
+#   - chunks run in a process pool, each with its own SeedSequence child, so
+#     the output is identical for a given --seed whatever the worker count
+#   - each chunk is written to a part file and appended to the output in order,
+#     so memory stays bounded by --chunk-rows
+#
+# Usage (from ml_engine/):
+#   python fast_generator.py training --rows 10000000 [--domains engineering med] [--workers 8]
+#   python fast_generator.py uploads  --rows 1000000  [--out some/dir]
+#
+# Output goes to dataset/generated/ or sample_batch_uploads/generated/ unless
+# --out says otherwise, so the committed training CSVs and 50-row upload
+# fixtures are never replaced by accident. Pass --out dataset to train on it.
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+NAME_POOL_SIZE = 2000
+EMAIL_DOMAINS = np.array(["example.com", "example.org", "example.net"])
+
+# domain -> generate_data.py output file and domain-specific columns
+# extra: (column, choices); ints: column -> [low, high) like np.random.randint
+TRAINING_SPECS = {
+    'engineering': {'file': 'engineering.csv', 'extra': ('department', ['CS', 'EC', 'ME']),
+                    'cgpa': (6.8, 1.2, 4, 10), 'ints': {'project_score': (20, 100), 'coding_skills': (1, 10)},
+                    'survival_col': 'cgpa'},
+    'med': {'file': 'medical.csv', 'extra': ('specialization', ['General', 'Dental']),
+            'cgpa': (7.5, 1.0, 5, 10), 'ints': {'clinical_score': (30, 100), 'hospital_hours': (0, 50)},
+            'survival_col': 'clinical_score'},
+    'ca': {'file': 'ca.csv', 'extra': ('course_stream', ['B.Com', 'CA']),
+           'cgpa': (7.0, 1.4, 4, 10), 'ints': {'audit_hours': (0, 500), 'law_score': (30, 100)},
+           'survival_col': 'law_score'},
+    'mba': {'file': 'mba.csv', 'extra': ('specialization', ['HR', 'Marketing']),
+            'cgpa': (7.2, 1.0, 5, 10), 'ints': {'internship_score': (1, 10), 'case_studies': (5, 50)},
+            'survival_col': 'cgpa'},
+    'school': {'file': 'school.csv', 'extra': ('class_level', ['10th', '12th']),
+               'cgpa': (7.5, 1.5, 4, 10), 'ints': {'homework_rate': (20, 100), 'parent_meetings': (0, 5)},
+               'survival_col': 'homework_rate'},
+}
+
+# sample_generator.py: per risk type, inclusive ranges (random.randint / uniform)
+UPLOAD_FILES = {'engineering': 'batch_engineering.csv', 'med': 'batch_medical.csv',
+                'ca': 'batch_ca.csv', 'mba': 'batch_mba.csv', 'school': 'batch_school.csv'}
+UPLOAD_DOMAIN_COLUMNS = {'engineering': ['project_score', 'coding_skills'],
+                         'med': ['clinical_score', 'hospital_hours'],
+                         'ca': ['audit_hours', 'law_score'],
+                         'mba': ['internship_score', 'case_studies'],
+                         'school': ['homework_rate', 'parent_meetings']}
+RISK_PROFILES = {
+    'high': {'attendance_rate': (40, 65), 'cgpa': (3.0, 5.5), 'study_hours_per_day': (0, 2),
+             'past_failures': (2, 4), 'project_score': (20, 50), 'coding_skills': (1, 3),
+             'clinical_score': (40, 60), 'hospital_hours': (0, 5), 'audit_hours': (0, 50),
+             'law_score': (20, 45), 'internship_score': (1, 3), 'case_studies': (0, 5),
+             'homework_rate': (20, 50), 'parent_meetings': (0, 1)},
+    'moderate': {'attendance_rate': (66, 84), 'cgpa': (5.6, 7.5), 'study_hours_per_day': (3, 5),
+                 'past_failures': (0, 1), 'project_score': (51, 75), 'coding_skills': (4, 6),
+                 'clinical_score': (61, 79), 'hospital_hours': (10, 20), 'audit_hours': (100, 250),
+                 'law_score': (50, 70), 'internship_score': (4, 7), 'case_studies': (10, 25),
+                 'homework_rate': (55, 80), 'parent_meetings': (2, 3)},
+    'safe': {'attendance_rate': (85, 100), 'cgpa': (7.6, 10.0), 'study_hours_per_day': (6, 10),
+             'past_failures': (0, 0), 'project_score': (80, 100), 'coding_skills': (7, 10),
+             'clinical_score': (85, 100), 'hospital_hours': (25, 40), 'audit_hours': (300, 500),
+             'law_score': (75, 100), 'internship_score': (8, 10), 'case_studies': (30, 50),
+             'homework_rate': (85, 100), 'parent_meetings': (4, 5)},
+}
+FLOAT_PROFILE_COLUMNS = {'attendance_rate': 1, 'cgpa': 2}  # uniform, rounded to n places
+
+def build_name_pool(seed, size=NAME_POOL_SIZE):
+    """First and last names from Faker, drawn once and shared by every chunk."""
+    from faker import Faker
+    fake = Faker('en_IN')
+    fake.seed_instance(seed)
+    first = np.array([fake.first_name() for _ in range(size)])
+    last = np.array([fake.last_name() for _ in range(size)])
+    return first, last
+
+def identity_columns(rng, start, n, pool):
+    """student_id / name / email / phone_number for rows start..start+n."""
+    first, last = pool
+    f = first[rng.integers(0, len(first), n)]
+    l = last[rng.integers(0, len(last), n)]
+    # Row numbers make IDs unique across chunks (random 6-digit IDs collide at scale)
+    ids = pd.Series(np.arange(start, start + n)).astype(str).str.zfill(8)
+    emails = (pd.Series(np.char.lower(f)) + "." + pd.Series(np.char.lower(l)).str.replace(" ", "", regex=False)
+              + pd.Series(rng.integers(1, 100, n)).astype(str) + "@"
+              + pd.Series(EMAIL_DOMAINS[rng.integers(0, len(EMAIL_DOMAINS), n)]))
+    return {
+        'student_id': ("STU_" + ids).to_numpy(),
+        'name': (pd.Series(f) + " " + pd.Series(l)).to_numpy(),
+        'email': emails.to_numpy(),
+        'phone_number': ("+91" + pd.Series(rng.integers(6000000000, 9999999999, n)).astype(str)).to_numpy(),
+    }
+
+def training_chunk(domain, rng, start, n, pool):
+    """One chunk of generate_data.py's labeled dataset for `domain`."""
+    spec = TRAINING_SPECS[domain]
+    data = identity_columns(rng, start, n, pool)
+    data['gender'] = np.array(['Male', 'Female'])[rng.integers(0, 2, n)]
+    data['age'] = rng.integers(18, 24, n)
+    data['attendance_rate'] = (rng.beta(10, 2, n) * 100).clip(20, 100).round(1)
+    data['study_hours_per_day'] = rng.gamma(3.0, 1.5, n).clip(0, 14).round(1)
+    data['past_failures'] = rng.poisson(0.3, n).clip(0, 5)
+    data['family_income'] = rng.choice(['High', 'Medium', 'Low'], n, p=[0.3, 0.5, 0.2])
+    data['scholarship'] = rng.choice(['Yes', 'No'], n, p=[0.15, 0.85])
+
+    extra_col, choices = spec['extra']
+    data[extra_col] = np.array(choices)[rng.integers(0, len(choices), n)]
+    mean, std, low, high = spec['cgpa']
+    data['cgpa'] = rng.normal(mean, std, n).clip(low, high).round(2)
+    for col, (low, high) in spec['ints'].items():
+        data[col] = rng.integers(low, high, n)
+    df = pd.DataFrame(data)
+
+    # Survival score + grey-zone dropout labels (generate_data.py's equation)
+    score = df[spec['survival_col']]
+    survival = (score / score.max()) * 0.4 + (df['attendance_rate'] / 100.0) * 0.3 \
+        + np.log1p(df['study_hours_per_day']) * 0.05 - (df['past_failures'] ** 1.5) * 0.15
+    survival += rng.normal(0, 0.1, n)
+    if domain == 'engineering':
+        survival += df['coding_skills'] / 20.0
+    grey = rng.choice([0, 1], n, p=[0.6, 0.4])
+    df['dropout_status'] = np.where(survival < 0.35, 1, np.where(survival > 0.65, 0, grey))
+    return df
+
+def upload_chunk(domain, rng, start, n, pool):
+    """One chunk of sample_generator.py's balanced (1/3 high, moderate, safe) upload."""
+    data = identity_columns(rng, start, n, pool)
+    del data['email'], data['phone_number']
+    data['family_income'] = np.array(['High', 'Medium', 'Low'])[rng.integers(0, 3, n)]
+    data['scholarship'] = np.array(['Yes', 'No'])[rng.integers(0, 2, n)]
+
+    risk = rng.permutation(np.arange(n) % 3)  # 0=high, 1=moderate, 2=safe
+    columns = ['attendance_rate', 'cgpa', 'study_hours_per_day', 'past_failures'] + UPLOAD_DOMAIN_COLUMNS[domain]
+    for col in columns:
+        out = np.empty(n, dtype=np.float64 if col in FLOAT_PROFILE_COLUMNS else np.int64)
+        for code, profile in enumerate(RISK_PROFILES.values()):
+            mask = risk == code
+            low, high = profile[col]
+            if col in FLOAT_PROFILE_COLUMNS:
+                out[mask] = rng.uniform(low, high, mask.sum()).round(FLOAT_PROFILE_COLUMNS[col])
+            else:
+                out[mask] = rng.integers(low, high + 1, mask.sum())
+        data[col] = out
+    order = ['student_id', 'name', 'attendance_rate', 'cgpa', 'study_hours_per_day', 'past_failures',
+             'family_income', 'scholarship'] + UPLOAD_DOMAIN_COLUMNS[domain]
+    return pd.DataFrame(data)[order]
+
+CHUNK_BUILDERS = {'training': training_chunk, 'uploads': upload_chunk}
+
+_POOL = None
+
+def _init_worker(pool):
+    global _POOL
+    _POOL = pool
+
+def _write_chunk(kind, domain, seed_seq, start, n, part_path):
+    rng = np.random.default_rng(seed_seq)
+    df = CHUNK_BUILDERS[kind](domain, rng, start, n, _POOL)
+    df.to_csv(part_path, index=False, header=(start == 0))
+    return part_path
+
+def generate(kind, domain, rows, out_path, chunk_rows, workers, seed, pool):
+    """Writes `rows` rows to out_path chunk by chunk; returns seconds taken."""
+    start_time = time.perf_counter()
+    starts = list(range(0, rows, chunk_rows))
+    # Children of one SeedSequence per (seed, kind, domain): chunk i is always the same
+    domain_key = sum(map(ord, f"{kind}:{domain}"))
+    seeds = np.random.SeedSequence([seed, domain_key]).spawn(len(starts))
+
+    part_dir = tempfile.mkdtemp(prefix=".parts_", dir=os.path.dirname(os.path.abspath(out_path)))
+    tmp_path = f"{out_path}.tmp"
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(pool,)) as executor, \
+                open(tmp_path, "wb") as out:
+            futures = [executor.submit(_write_chunk, kind, domain, seeds[i], s, min(chunk_rows, rows - s),
+                                       os.path.join(part_dir, f"{i:06d}.csv"))
+                       for i, s in enumerate(starts)]
+            # Append parts in order as they finish; later parts keep generating meanwhile
+            for future in futures:
+                part_path = future.result()
+                with open(part_path, "rb") as part:
+                    shutil.copyfileobj(part, out, 16 * 1024 * 1024)
+                os.remove(part_path)
+        os.replace(tmp_path, out_path)
+    finally:
+        shutil.rmtree(part_dir, ignore_errors=True)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return time.perf_counter() - start_time
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vectorized synthetic data generator")
+    parser.add_argument("kind", choices=list(CHUNK_BUILDERS))
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--domains", nargs="+", default=list(TRAINING_SPECS), choices=list(TRAINING_SPECS))
+    parser.add_argument("--out", default=None,
+                        help="output dir (default: dataset/generated/ or sample_batch_uploads/generated/)")
+    parser.add_argument("--chunk-rows", type=int, default=250_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    out_dir = args.out or os.path.join("dataset" if args.kind == "training" else "sample_batch_uploads",
+                                       "generated")
+    os.makedirs(out_dir, exist_ok=True)
+    names = build_name_pool(args.seed)
+    files = {d: TRAINING_SPECS[d]['file'] for d in TRAINING_SPECS} if args.kind == "training" else UPLOAD_FILES
+
+    print(f"🚀 Generating {args.rows:,} {args.kind} rows per domain "
+          f"({args.chunk_rows:,}-row chunks, {args.workers} workers, seed {args.seed})")
+    for domain in args.domains:
+        path = os.path.join(out_dir, files[domain])
+        seconds = generate(args.kind, domain, args.rows, path, args.chunk_rows, args.workers, args.seed, names)
+        print(f"✅ {path}: {os.path.getsize(path) / 1e6:.0f} MB in {seconds:.1f}s "
+              f"({args.rows / seconds:,.0f} rows/s)")
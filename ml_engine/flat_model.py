@@ -0,0 +1,292 @@
+# Path: ml_engine/flat_model.py
+# Compiles trained sklearn models into flat NumPy arrays and scores them
+# without touching sklearn at inference time.
+import os
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+
+# Rows evaluated at once. Bounds the (rows x trees) node-index matrix.
+EVAL_BLOCK_ROWS = 2048
+
+class FlatEnsemble:
+    """
+    A tree ensemble (or linear model) stored as contiguous arrays.
+
+    All trees share one node table; `roots` holds the first node of each
+    tree and `children[node]` holds (left, right). Leaves have feature -1.
+
+    `weight` is each node's weighted training sample count, `reference`
+    the mean feature row of the data it was checked on and `contrib` the
+    precomputed path contribution table; all optional and only used for
+    risk attribution (attribution.py).
+
+    kind:
+        'forest'   -> P(risk) = mean of leaf values (class-1 fraction)
+        'boosting' -> P(risk) = sigmoid(init + learning_rate * sum of leaf values)
+        'linear'   -> P(risk) = sigmoid(X . coef + intercept)
+    """
+
+    def __init__(self, kind, n_features, classes, feature=None, threshold=None,
+                 children=None, missing_left=None, value=None, roots=None,
+                 max_depth=0, learning_rate=1.0, init_raw=0.0, coef=None, intercept=0.0,
+                 weight=None, reference=None, contrib=None):
+        self.kind = kind
+        self.n_features_in_ = n_features
+        self.classes_ = np.asarray(classes)
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.missing_left = missing_left
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.learning_rate = learning_rate
+        self.init_raw = init_raw
+        self.coef = coef
+        self.intercept = intercept
+        self.weight = weight
+        self.reference = reference
+        self.contrib = contrib
+
+    @property
+    def n_trees(self):
+        return 0 if self.roots is None else len(self.roots)
+
+    @property
+    def allow_nan(self):
+        # Forests route NaN like sklearn's RandomForest; the models GradientBoosting
+        # and LogisticRegression come from reject NaN, so the flat forms don't score it either
+        return self.kind == 'forest'
+
+    @property
+    def nbytes(self):
+        arrays = [self.feature, self.threshold, self.children,
+                  self.missing_left, self.value, self.roots, self.coef, self.weight]
+        return sum(a.nbytes for a in arrays if a is not None)
+
+    def apply(self, X):
+        """Leaf node index reached by every row in every tree: shape (n_rows, n_trees)."""
+        # sklearn compares float32 features against float64 thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        has_nan = bool(np.isnan(flat_X).any())
+        children = self.children.ravel()
+
+        # One slot per (row, tree), walked level by level. Slots that reach
+        # a leaf drop out, so deep trees only cost what their paths cost.
+        # Tree-major order keeps each tree's nodes hot in cache.
+        node = np.repeat(self.roots, n_rows)
+        active = np.flatnonzero(self.feature.take(node) >= 0)
+        current = node.take(active)
+        row_offset = (active % n_rows) * n_features
+
+        while len(active):
+            x = flat_X.take(row_offset + self.feature.take(current))
+            go_right = ~(x <= self.threshold.take(current))
+            if has_nan:
+                missing = np.isnan(x)
+                go_right[missing] = ~self.missing_left.take(current[missing])
+            current = children.take(2 * current + go_right)
+
+            still = self.feature.take(current) >= 0
+            if not still.all():
+                done = ~still
+                node[active[done]] = current[done]
+                active, current, row_offset = active[still], current[still], row_offset[still]
+
+        return node.reshape(self.n_trees, n_rows).T
+
+    def _positive_proba(self, X):
+        if self.kind == 'linear':
+            raw = np.asarray(X, dtype=np.float64) @ self.coef + self.intercept
+            return 1.0 / (1.0 + np.exp(-raw))
+
+        leaf_values = self.value.take(self.apply(X))
+
+        # Accumulate tree by tree (same order as sklearn) so averages like
+        # 15/20 trees land on exactly the same float and int(p * 100) agrees.
+        total = np.zeros(len(leaf_values), dtype=np.float64)
+        if self.kind == 'forest':
+            for t in range(self.n_trees):
+                total += leaf_values[:, t]
+            return total / self.n_trees
+
+        total += self.init_raw
+        for t in range(self.n_trees):
+            total += self.learning_rate * leaf_values[:, t]
+        return 1.0 / (1.0 + np.exp(-total))
+
+    def predict_proba(self, X):
+        X = np.asarray(X)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected {self.n_features_in_} features, got shape {X.shape}")
+
+        positive = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), EVAL_BLOCK_ROWS):
+            positive[start:start + EVAL_BLOCK_ROWS] = self._positive_proba(X[start:start + EVAL_BLOCK_ROWS])
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, X):
+        return self.classes_[(self.predict_proba(X)[:, 1] > 0.5).astype(int)]
+
+    # Saved as a plain dict of arrays so loading never depends on how this
+    # module was imported (script vs package), and arrays stay mmap-able.
+    _FIELDS = ['kind', 'n_features_in_', 'classes_', 'feature', 'threshold', 'children',
+               'missing_left', 'value', 'roots', 'max_depth', 'learning_rate', 'init_raw',
+               'coef', 'intercept', 'weight', 'reference', 'contrib']
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self._FIELDS}
+
+    @classmethod
+    def from_dict(cls, d):
+        flat = cls(d['kind'], d['n_features_in_'], d['classes_'])
+        for name in cls._FIELDS:
+            # Artifacts exported before a field existed simply lack it
+            setattr(flat, name, d.get(name))
+        return flat
+
+def _flatten_trees(trees, leaf_value):
+    """Packs sklearn Tree objects into one node table with global child indices."""
+    features, thresholds, children, missing, values, weights, roots = [], [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+
+    for tree in trees:
+        is_leaf = tree.children_left == -1
+        features.append(np.where(is_leaf, -1, tree.feature).astype(np.int32))
+        thresholds.append(tree.threshold.astype(np.float64))
+        children.append(np.column_stack([tree.children_left, tree.children_right]) + offset)
+        if hasattr(tree, 'missing_go_to_left'):
+            missing.append(tree.missing_go_to_left.astype(bool))
+        else:
+            missing.append(np.zeros(tree.node_count, dtype=bool))
+        values.append(leaf_value(tree).astype(np.float64))
+        weights.append(tree.weighted_n_node_samples.astype(np.float64))
+        roots.append(offset)
+        offset += tree.node_count
+        max_depth = max(max_depth, tree.max_depth)
+
+    return dict(
+        feature=np.concatenate(features),
+        threshold=np.concatenate(thresholds),
+        children=np.concatenate(children).astype(np.intp),
+        missing_left=np.concatenate(missing),
+        value=np.concatenate(values),
+        weight=np.concatenate(weights),
+        roots=np.asarray(roots, dtype=np.intp),
+        max_depth=max_depth,
+    )
+
+def _class_one_fraction(tree):
+    # Same normalization as DecisionTreeClassifier.predict_proba
+    v = tree.value[:, 0, :]
+    total = v.sum(axis=1)
+    total[total == 0.0] = 1.0
+    return v[:, 1] / total
+
+def compile_model(model):
+    """Turns a fitted binary RandomForest / GradientBoosting / LogisticRegression into a FlatEnsemble."""
+    if isinstance(model, FlatEnsemble):
+        return model
+    classes = getattr(model, 'classes_', None)
+    if classes is None or len(classes) != 2:
+        raise TypeError("Only fitted binary classifiers can be compiled")
+    n_features = int(model.n_features_in_)
+
+    if isinstance(model, RandomForestClassifier):
+        arrays = _flatten_trees([est.tree_ for est in model.estimators_], _class_one_fraction)
+        return FlatEnsemble('forest', n_features, classes, **arrays)
+
+    if isinstance(model, GradientBoostingClassifier):
+        arrays = _flatten_trees([est.tree_ for est in model.estimators_[:, 0]],
+                                lambda tree: tree.value[:, 0, 0])
+        init_raw = float(model._raw_predict_init(np.zeros((1, n_features)))[0, 0])
+        return FlatEnsemble('boosting', n_features, classes, learning_rate=float(model.learning_rate),
+                            init_raw=init_raw, **arrays)
+
+    if isinstance(model, LogisticRegression):
+        return FlatEnsemble('linear', n_features, classes,
+                            coef=model.coef_[0].astype(np.float64), intercept=float(model.intercept_[0]))
+
+    raise TypeError(f"Can't compile {type(model).__name__}")
+
+def check_parity(model, flat, X, atol=1e-9):
+    """
+    Compares the flat engine against sklearn on X.
+    Returns (max_abs_diff, risk_score_mismatches). Raises if they disagree.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    expected = model.predict_proba(X)[:, 1]
+    got = flat.predict_proba(X)[:, 1]
+    max_diff = float(np.max(np.abs(expected - got))) if len(X) else 0.0
+    mismatches = int(np.sum((expected * 100).astype(int) != (got * 100).astype(int)))
+    if max_diff > atol or mismatches:
+        raise AssertionError(f"Flat model disagrees with sklearn: max diff {max_diff:.3g}, "
+                             f"{mismatches} risk score mismatches")
+    return max_diff, mismatches
+
+def flat_path_for(model_path):
+    """model_engineering.pkl -> model_engineering_flat.joblib"""
+    return os.path.splitext(model_path)[0] + "_flat.joblib"
+
+def export_flat(model, model_path, X_check=None):
+    """
+    Compiles `model`, verifies it against sklearn on X_check, and writes it
+    next to the .pkl. Uncompressed so the arrays can be memory-mapped, with
+    the attribution table included so serving workers share it too.
+    """
+    try:
+        from ml_engine.attribution import path_contribution_table
+    except ImportError:  # running as a script from inside ml_engine/
+        from attribution import path_contribution_table
+
+    flat = compile_model(model)
+    if X_check is not None:
+        check_parity(model, flat, X_check)
+        flat.reference = np.nanmean(np.asarray(X_check, dtype=np.float64), axis=0)
+    if flat.kind != 'linear':
+        flat.contrib, _ = path_contribution_table(flat)
+    path = flat_path_for(model_path)
+    tmp_path = f"{path}.tmp"
+    joblib.dump(flat.to_dict(), tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+def load_flat(path, mmap_mode=None):
+    """mmap_mode='r': arrays stay in the file, shared between processes through the page cache."""
+    return FlatEnsemble.from_dict(joblib.load(path, mmap_mode=mmap_mode))
+
+# --- PARITY CHECK ---
+if __name__ == "__main__":
+    import sys
+    import time
+    import pandas as pd
+    from predictor import MODEL_DIR, DOMAINS, DATASET_DIR, DOMAIN_DATASETS, get_model_features
+
+    # Usage: python flat_model.py [domain ...]   (run from ml_engine/)
+
+    for domain in sys.argv[1:] or DOMAINS:
+        path = os.path.join(MODEL_DIR, f"model_{domain}.pkl")
+        if not os.path.exists(path):
+            print(f"⚠️ Missing: {path}")
+            continue
+        model = joblib.load(path)
+        X = pd.read_csv(os.path.join(DATASET_DIR, DOMAIN_DATASETS[domain]), usecols=get_model_features(domain))
+        X = X[get_model_features(domain)].to_numpy(dtype=np.float64)
+
+        flat = compile_model(model)
+        max_diff, _ = check_parity(model, flat, X)
+
+        start = time.perf_counter(); model.predict_proba(X); t_sk = time.perf_counter() - start
+        start = time.perf_counter(); flat.predict_proba(X); t_flat = time.perf_counter() - start
+        start = time.perf_counter(); model.predict_proba(X[:1]); t_sk1 = time.perf_counter() - start
+        start = time.perf_counter(); flat.predict_proba(X[:1]); t_flat1 = time.perf_counter() - start
+
+        print(f"✅ {domain}: {type(model).__name__} parity OK (max diff {max_diff:.2g}) | "
+              f"{len(X)} rows sklearn {t_sk * 1000:.0f} ms vs flat {t_flat * 1000:.0f} ms | "
+              f"1 row {t_sk1 * 1000:.2f} ms vs {t_flat1 * 1000:.2f} ms | "
+              f"pkl {os.path.getsize(path) / 1e6:.1f} MB vs arrays {flat.nbytes / 1e6:.1f} MB")
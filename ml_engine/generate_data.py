@@ -3,12 +3,29 @@ import numpy as np
 from faker import Faker
 import random
 import os
+import sys
+from columnar import columnar_path, write_columnar
+from predictor import get_model_features
 
 fake = Faker('en_IN')
 NUM_ROWS = 30000
 OUTPUT_DIR = "dataset" 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# "csv" (default) or "both" (CSV plus columnar .cols directories, see columnar.py).
+# There is no columnar-only output: retraining, risk attribution and the flat
+# model check still read the CSV.
+OUTPUT_FORMAT = os.getenv("DATASET_OUTPUT_FORMAT", "csv")
+OUTPUT_FORMATS = ("csv", "both")
+
+def save_dataset(df, file_name, domain):
+    """Writes one domain's data in OUTPUT_FORMAT."""
+    csv_path = f"{OUTPUT_DIR}/{file_name}"
+    df.to_csv(csv_path, index=False)
+    if OUTPUT_FORMAT == "both":
+        # Stamped with the CSV it matches, so training notices when they drift
+        write_columnar(df, columnar_path(csv_path), get_model_features(domain), source_csv=csv_path)
+
 def generate_base_data(n=NUM_ROWS):
     print(f"   -> Simulating {n} student lives...")
     
@@ -107,7 +124,7 @@ def generate_engineering():
     survival += (df['coding_skills'] / 20.0)
     
     df = assign_dropout_status(df, survival)
-    df.to_csv(f"{OUTPUT_DIR}/engineering.csv", index=False)
+    save_dataset(df, "engineering.csv", "engineering")
 
 def generate_medical():
     df = generate_base_data()
@@ -119,7 +136,7 @@ def generate_medical():
     
     survival = calculate_survival_score(df, 'clinical_score') 
     df = assign_dropout_status(df, survival)
-    df.to_csv(f"{OUTPUT_DIR}/medical.csv", index=False)
+    save_dataset(df, "medical.csv", "med")
 
 def generate_commerce():
     df = generate_base_data()
@@ -130,7 +147,7 @@ def generate_commerce():
     
     survival = calculate_survival_score(df, 'law_score')
     df = assign_dropout_status(df, survival)
-    df.to_csv(f"{OUTPUT_DIR}/ca.csv", index=False)
+    save_dataset(df, "ca.csv", "ca")
 
 def generate_mba():
     df = generate_base_data()
@@ -141,7 +158,7 @@ def generate_mba():
     
     survival = calculate_survival_score(df, 'cgpa')
     df = assign_dropout_status(df, survival)
-    df.to_csv(f"{OUTPUT_DIR}/mba.csv", index=False)
+    save_dataset(df, "mba.csv", "mba")
 
 def generate_school():
     df = generate_base_data()
@@ -152,9 +169,15 @@ def generate_school():
     
     survival = calculate_survival_score(df, 'homework_rate')
     df = assign_dropout_status(df, survival)
-    df.to_csv(f"{OUTPUT_DIR}/school.csv", index=False)
+    save_dataset(df, "school.csv", "school")
 
 if __name__ == "__main__":
+    # Usage: python generate_data.py [csv|both]
+    if len(sys.argv) > 1:
+        OUTPUT_FORMAT = sys.argv[1]
+    if OUTPUT_FORMAT not in OUTPUT_FORMATS:
+        sys.exit(f"❌ Unknown output format {OUTPUT_FORMAT!r}: use one of {', '.join(OUTPUT_FORMATS)} "
+                 f"(the CSV is always needed, so columnar-only output is not offered)")
     print("🚀 Generating REAL-WORLD Simulation Data...")
     generate_engineering()
     generate_medical()
@@ -1,32 +1,41 @@
-import joblib
 import pandas as pd
 import os
 import numpy as np
 
-# Load models only once when server starts to save time (Caching)
-MODEL_DIR = "models"
-MODELS = {}
+try:
+    from ml_engine.predictor import registry, normalize_domain, get_model_features
+except ImportError:  # running as a script from inside ml_engine/
+    from predictor import registry, normalize_domain, get_model_features
 
 def load_models():
-    """Load all available models into memory."""
-    model_files = {
-        'engineering': 'model_eng.pkl',
-        'medical': 'model_med.pkl',
-        'commerce': 'model_ca.pkl',
-        'mba': 'model_mba.pkl',
-        'school': 'model_school.pkl'
-    }
-    
-    for domain, fname in model_files.items():
-        path = os.path.join(MODEL_DIR, fname)
-        if os.path.exists(path):
-            MODELS[domain] = joblib.load(path)
-            print(f"Loaded {domain} model.")
-        else:
-            print(f"Warning: {fname} not found.")
+    """Load all available models into memory (shared with the backend API)."""
+    registry.load_all(warm=True)
+
+def predict_dropout_risk_batch(students: list, domain: str):
+    """
+    Scores many students with ONE predict_proba call.
+
+    Input:
+        students (list): student dicts, same shape as predict_dropout_risk's input
+        domain (str): 'engineering', 'medical', etc.
 
-# Initialize models immediately
-load_models()
+    Output:
+        list of risk percentages (0 to 100), or {"error": ...} for the whole batch
+    """
+    domain = normalize_domain(domain)
+    model = registry.get(domain)
+
+    if model is None:
+        return {"error": "Invalid Domain or Model not loaded"}
+
+    # One DataFrame with the exact training columns (missing -> 0)
+    input_df = pd.DataFrame(students).reindex(columns=get_model_features(domain), fill_value=0)
+
+    try:
+        probabilities = model.predict_proba(input_df)[:, 1]
+        return [round(p * 100, 2) for p in probabilities]
+    except Exception as e:
+        return {"error": str(e)}
 
 def predict_dropout_risk(student_data: dict, domain: str):
     """
@@ -38,26 +47,10 @@ def predict_dropout_risk(student_data: dict, domain: str):
     Output:
         probability (float): 0 to 100 (Risk Percentage)
     """
-    domain = domain.lower()
-    
-    if domain not in MODELS:
-        return {"error": "Invalid Domain or Model not loaded"}
-    
-    model = MODELS[domain]
-    
-    # Convert dict to DataFrame (Expected by Pipeline)
-    input_df = pd.DataFrame([student_data])
-    
-    try:
-        # The pipeline handles all encoding/scaling automatically!
-        # predict_proba returns [[prob_0, prob_1]]
-        probability_class_1 = model.predict_proba(input_df)[0][1]
-        
-        risk_percentage = round(probability_class_1 * 100, 2)
-        return risk_percentage
-        
-    except Exception as e:
-        return {"error": str(e)}
+    result = predict_dropout_risk_batch([student_data], domain)
+    if isinstance(result, dict):
+        return result
+    return result[0]
 
 # --- TEST RUN ---
 if __name__ == "__main__":
@@ -78,6 +71,7 @@ if __name__ == "__main__":
         'programming_skills_score': 3
     }
     
+    load_models()
     print("Testing Prediction for Engineering Student...")
     score = predict_dropout_risk(test_input, 'engineering')
     print(f"Dropout Risk: {score}%")
\ No newline at end of file
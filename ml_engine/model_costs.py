@@ -0,0 +1,112 @@
+# Path: ml_engine/model_costs.py
+# What a trained model costs to serve: serialized size, joblib.load time,
+# single-row and 10k-row predict_proba latency. Used by the training arena to
+# pick champions under budgets, and written next to every model_*.pkl as
+# model_*.meta.json.
+import json
+import os
+import tempfile
+import time
+import joblib
+import numpy as np
+
+# Batch size of the "batch" latency (a typical large cohort upload chunk)
+BATCH_ROWS = 10_000
+# Single-row latency is the median of this many calls (after one warm-up call)
+ROW_REPEATS = 50
+# Load and batch timings are the best of this many runs
+REPEATS = 3
+
+def meta_path_for(model_path):
+    """models/model_med.pkl -> models/model_med.meta.json"""
+    return os.path.splitext(model_path)[0] + ".meta.json"
+
+def _best_ms(fn, repeats=REPEATS):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def _batch(X, rows=BATCH_ROWS):
+    """`rows` rows of X (tiled if X is shorter), as the float64 matrix the API scores."""
+    X = np.asarray(X, dtype=np.float64)
+    if len(X) >= rows:
+        return np.ascontiguousarray(X[:rows])
+    return np.resize(X, (rows, X.shape[1]))
+
+def measure_costs(model, X):
+    """
+    Serving costs of `model` on rows like X. Sizes in MB, times in ms:
+    {size_mb, load_ms, row_ms, batch_ms, batch_rows}
+    """
+    batch = _batch(X)
+    row = batch[:1]
+
+    fd, tmp_path = tempfile.mkstemp(suffix=".pkl")
+    os.close(fd)
+    try:
+        joblib.dump(model, tmp_path)
+        size_mb = os.path.getsize(tmp_path) / 1e6
+        load_ms = _best_ms(lambda: joblib.load(tmp_path))
+    finally:
+        os.remove(tmp_path)
+
+    model.predict_proba(row)  # warm-up
+    row_times = []
+    for _ in range(ROW_REPEATS):
+        start = time.perf_counter()
+        model.predict_proba(row)
+        row_times.append(time.perf_counter() - start)
+
+    return {
+        "size_mb": round(size_mb, 3),
+        "load_ms": round(load_ms, 2),
+        "row_ms": round(float(np.median(row_times)) * 1000, 3),
+        "batch_ms": round(_best_ms(lambda: model.predict_proba(batch)), 2),
+        "batch_rows": BATCH_ROWS,
+    }
+
+def over_budget(costs, budgets):
+    """Names of the budgets `costs` exceeds. A budget of 0 / None is off."""
+    return [key for key in ("row_ms", "batch_ms", "size_mb") if budgets.get(key) and costs[key] > budgets[key]]
+
+def write_model_meta(model_path, meta):
+    """model_*.meta.json next to the model, atomically (like save_model)."""
+    path = meta_path_for(model_path)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+    return path
+
+def read_model_meta(model_path):
+    path = meta_path_for(model_path)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+# --- MEASURE THE PUBLISHED MODELS ---
+if __name__ == "__main__":
+    import sys
+    import warnings
+    import pandas as pd
+    from predictor import MODEL_DIR, DOMAINS, DATASET_DIR, DOMAIN_DATASETS, get_model_features
+
+    # Usage: python model_costs.py [domain ...]   (run from ml_engine/)
+    warnings.filterwarnings("ignore")  # fitted with feature names, timed on arrays like the API
+    print(f"{'model':<28} {'algo':<28} {'MB':>8} {'load ms':>8} {'row ms':>7} {'10k ms':>8}")
+    for domain in sys.argv[1:] or DOMAINS:
+        features = get_model_features(domain)
+        X = pd.read_csv(os.path.join(DATASET_DIR, DOMAIN_DATASETS[domain]), usecols=features,
+                        nrows=BATCH_ROWS)[features]
+        for name in (f"model_{domain}", f"model_{domain}_linear"):
+            path = os.path.join(MODEL_DIR, f"{name}.pkl")
+            if not os.path.exists(path):
+                continue
+            model = joblib.load(path)
+            c = measure_costs(model, X)
+            print(f"{name:<28} {type(model).__name__:<28} {c['size_mb']:>8.2f} {c['load_ms']:>8.1f} "
+                  f"{c['row_ms']:>7.2f} {c['batch_ms']:>8.1f}")
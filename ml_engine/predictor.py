@@ -0,0 +1,363 @@
+# Path: ml_engine/predictor.py
+# Shared model registry used by the backend API and by interference.py.
+import os
+import threading
+import time
+import joblib
+import numpy as np
+
+try:
+    from ml_engine.flat_model import compile_model, flat_path_for, load_flat, export_flat
+    from ml_engine.attribution import build_attributor, dataset_reference
+except ImportError:  # running as a script from inside ml_engine/
+    from flat_model import compile_model, flat_path_for, load_flat, export_flat
+    from attribution import build_attributor, dataset_reference
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
+DATASET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dataset")
+
+# How often (seconds) to look for retrained models on disk. 0 disables it.
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "5"))
+
+# "sklearn" serves the pickled estimator as-is. "flat" serves the compiled
+# NumPy arrays (model_{domain}_flat.joblib, or compiled on load): much lower
+# single-row latency and memory, but slower than sklearn above ~1k rows per call.
+MODEL_FORMAT = os.getenv("MODEL_FORMAT", "sklearn")
+
+# Flat artifacts are memory-mapped read-only instead of copied into each
+# process: every server worker on a host shares one copy via the page cache.
+MODEL_MMAP = os.getenv("MODEL_MMAP", "1") == "1"
+
+# Build the per-feature attribution tables (top_risk_factor) with every model
+RISK_ATTRIBUTION = os.getenv("RISK_ATTRIBUTION", "1") == "1"
+
+# Canonical domain names match the model files: model_{domain}.pkl
+DOMAINS = ['engineering', 'med', 'ca', 'mba', 'school']
+DOMAIN_ALIASES = {'medical': 'med', 'commerce': 'ca', 'eng': 'engineering'}
+# Training data per canonical domain (in DATASET_DIR)
+DOMAIN_DATASETS = {
+    'engineering': 'engineering.csv',
+    'med': 'medical.csv',
+    'ca': 'ca.csv',
+    'mba': 'mba.csv',
+    'school': 'school.csv',
+}
+
+BASE_FEATURES = ['attendance_rate', 'cgpa', 'study_hours_per_day', 'past_failures']
+DOMAIN_FEATURES = {
+    'engineering': BASE_FEATURES + ['project_score', 'coding_skills'],
+    'med': BASE_FEATURES + ['clinical_score', 'hospital_hours'],
+    'ca': BASE_FEATURES + ['audit_hours', 'law_score'],
+    'mba': BASE_FEATURES + ['internship_score', 'case_studies'],
+    'school': BASE_FEATURES + ['homework_rate', 'parent_meetings'],
+}
+
+# Risk label thresholds (risk_score is 0-100): "High Risk" >= 75, "Moderate" >= 40, else "Safe"
+HIGH_RISK_THRESHOLD = 75
+MODERATE_RISK_THRESHOLD = 40
+
+# Cascade scoring's cheap first tier: model_{domain}_linear.pkl, loaded by the
+# registry under the key "{domain}_linear" (same features as the domain)
+LINEAR_TIER_SUFFIX = "_linear"
+
+def normalize_domain(domain):
+    domain = str(domain).lower().strip()
+    return DOMAIN_ALIASES.get(domain, domain)
+
+def linear_tier(domain):
+    """Registry key of a domain's linear tier: 'engineering' -> 'engineering_linear'"""
+    return normalize_domain(domain) + LINEAR_TIER_SUFFIX
+
+def base_domain(key):
+    """'engineering_linear' -> 'engineering' (plain domains pass through)"""
+    key = normalize_domain(key)
+    if key.endswith(LINEAR_TIER_SUFFIX):
+        return key[:-len(LINEAR_TIER_SUFFIX)]
+    return key
+
+def get_model_features(domain):
+    """
+    CRITICAL: These must match the columns used in train_models.py EXACTLY.
+    """
+    return list(DOMAIN_FEATURES.get(base_domain(domain), BASE_FEATURES))
+
+class LoadedModel:
+    """A model plus the file version it came from (and its RiskAttributor, if any)."""
+
+    def __init__(self, model, path, version, load_seconds, attributor=None):
+        self.model = model
+        self.path = path
+        self.version = version
+        self.load_seconds = load_seconds
+        self.attributor = attributor
+
+    @property
+    def nbytes(self):
+        """Model arrays + attribution table (0 for sklearn objects, which don't say)."""
+        return getattr(self.model, 'nbytes', 0) + (self.attributor.nbytes if self.attributor else 0)
+
+    @property
+    def memory_mapped(self):
+        arrays = (getattr(self.model, 'value', None), getattr(self.model, 'coef', None))
+        return any(isinstance(a, np.memmap) for a in arrays)
+
+class ModelRegistry:
+    """
+    One place that owns every domain model.
+
+    - get() never blocks on a reload: it returns whatever model is current,
+      so in-flight requests keep the object they already hold.
+    - New files are loaded and warmed fully before being swapped in.
+    - A failed load keeps the previous model and logs the reason.
+    """
+
+    def __init__(self, model_dir=MODEL_DIR, watch_interval=MODEL_WATCH_INTERVAL, model_format=MODEL_FORMAT,
+                 attribution=RISK_ATTRIBUTION, mmap=MODEL_MMAP):
+        self.model_dir = model_dir
+        self.watch_interval = watch_interval
+        self.model_format = model_format
+        self.mmap = mmap
+        self.attribution = attribution
+        self._references = {}
+        self._entries = {}
+        self._checked_at = {}
+        # Serializes disk loads; lookups never take it once a model is loaded
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+        self._listeners = []
+        self._load_listeners = []
+
+    def model_path(self, domain):
+        return os.path.join(self.model_dir, f"model_{domain}.pkl")
+
+    @staticmethod
+    def _file_version(path):
+        st = os.stat(path)
+        return f"{st.st_mtime_ns}-{st.st_size}"
+
+    def _artifact_version(self, domain):
+        version = self._file_version(self.model_path(domain))
+        if self.model_format == "flat":
+            flat_path = flat_path_for(self.model_path(domain))
+            if os.path.exists(flat_path):
+                version += "+" + self._file_version(flat_path)
+        return version
+
+    def _read_model(self, path):
+        if self.model_format != "flat":
+            return joblib.load(path)
+
+        # Prefer the exported arrays when they are at least as new as the .pkl
+        flat_path = flat_path_for(path)
+        if os.path.exists(flat_path) and os.path.getmtime(flat_path) >= os.path.getmtime(path):
+            return load_flat(flat_path, mmap_mode="r" if self.mmap else None)
+        model = joblib.load(path)
+        try:
+            return compile_model(model)
+        except TypeError as e:
+            print(f"⚠️ Serving {path} with sklearn: {e}")
+            return model
+
+    def load(self, domain, warm=True):
+        """Loads (or reloads) one domain from disk and swaps it in."""
+        domain = normalize_domain(domain)
+        with self._lock:
+            return self._load(domain, warm)
+
+    def _load(self, domain, warm):
+        path = self.model_path(domain)
+        if not os.path.exists(path):
+            print(f"⚠️ Missing: {path}")
+            return None
+
+        try:
+            version = self._artifact_version(domain)
+            start = time.perf_counter()
+            model = self._read_model(path)
+            entry = LoadedModel(model, path, version, time.perf_counter() - start,
+                                self._build_attributor(domain, model))
+            if warm:
+                self.warm_up(domain, model)
+        except Exception as e:
+            print(f"❌ Failed to load {path}: {e}")
+            return None
+
+        # Single dict assignment: readers see either the old or the new model
+        previous = self._entries.get(domain)
+        self._entries[domain] = entry
+        action = "Reloaded" if previous else "Loaded"
+        mapped = ", mmap" if entry.memory_mapped else ""
+        print(f"✅ {action}: {path} (v{version}, {entry.load_seconds * 1000:.0f} ms{mapped})")
+        for listener in self._load_listeners:
+            try:
+                listener(domain, entry)
+            except Exception as e:
+                print(f"❌ Load listener failed for {domain}: {e}")
+        if previous:
+            for listener in self._listeners:
+                try:
+                    listener(domain, entry)
+                except Exception as e:
+                    print(f"❌ Reload listener failed for {domain}: {e}")
+        return entry
+
+    def _build_attributor(self, domain, model):
+        """Part of the load, so the swap brings model and tables together. None if unsupported."""
+        if not self.attribution:
+            return None
+        features = get_model_features(domain)
+        data_domain = base_domain(domain)
+        if data_domain not in self._references:
+            # Dataset means: what "low" / "high" is measured against (read once)
+            self._references[data_domain] = dataset_reference(
+                os.path.join(DATASET_DIR, DOMAIN_DATASETS.get(data_domain, "")), features)
+        try:
+            return build_attributor(model, features, self._references[data_domain])
+        except (TypeError, ValueError) as e:
+            print(f"⚠️ No risk attribution for {domain}: {e}")
+            return None
+
+    def add_reload_listener(self, fn):
+        """fn(domain, entry) is called after a new model version is swapped in."""
+        self._listeners.append(fn)
+
+    def add_load_listener(self, fn):
+        """fn(domain, entry) is called after every successful load, first or reload."""
+        self._load_listeners.append(fn)
+
+    def warm_up(self, domain, model):
+        """Runs one dummy prediction so the first real request isn't the slow one."""
+        dummy = np.zeros((1, len(get_model_features(domain))))
+        model.predict_proba(dummy)
+
+    def load_all(self, warm=True):
+        for domain in DOMAINS:
+            self.load(domain, warm=warm)
+
+    def has_model(self, key):
+        return os.path.exists(self.model_path(normalize_domain(key)))
+
+    def load_linear_tiers(self, warm=True):
+        """Loads every domain's linear tier that exists on disk (cascade scoring)."""
+        for domain in DOMAINS:
+            if self.has_model(linear_tier(domain)):
+                self.load(linear_tier(domain), warm=warm)
+
+    def entries(self):
+        """Snapshot of everything loaded so far: {key: LoadedModel}"""
+        return dict(self._entries)
+
+    def entry(self, domain):
+        domain = normalize_domain(domain)
+        entry = self._entries.get(domain)
+        if entry is None:
+            with self._lock:
+                # Another thread may have loaded it while we waited
+                entry = self._entries.get(domain) or self._load(domain, warm=True)
+                self._checked_at[domain] = time.monotonic()
+            return entry
+
+        # Cheap stat() check so processes without a watcher thread
+        # (e.g. scoring pool workers) still pick up new versions
+        self._maybe_refresh(domain)
+        return self._entries.get(domain)
+
+    def get(self, domain):
+        entry = self.entry(domain)
+        return entry.model if entry else None
+
+    def version(self, domain):
+        entry = self.entry(domain)
+        return entry.version if entry else None
+
+    def _maybe_refresh(self, domain):
+        if self.watch_interval <= 0:
+            return
+        now = time.monotonic()
+        if now - self._checked_at.get(domain, 0) < self.watch_interval:
+            return
+        self._checked_at[domain] = now
+        self.refresh(domain)
+
+    def refresh(self, domain=None):
+        """Reloads any domain whose file changed on disk. Returns reloaded domains."""
+        reloaded = []
+        # Plus anything else loaded on demand (linear tiers)
+        keys = DOMAINS + [k for k in list(self._entries) if k not in DOMAINS]
+        for d in ([normalize_domain(domain)] if domain else keys):
+            try:
+                version = self._artifact_version(d)
+            except OSError:
+                continue
+            if self._is_current(d, version):
+                continue
+            with self._lock:
+                # Re-check: a request thread may have just reloaded it
+                if not self._is_current(d, version) and self._load(d, warm=True):
+                    reloaded.append(d)
+        return reloaded
+
+    def _is_current(self, domain, version):
+        current = self._entries.get(domain)
+        return current is not None and current.version == version
+
+    def start_watcher(self):
+        """Polls the model directory in a daemon thread and hot-swaps new files."""
+        if self.watch_interval <= 0 or self._watcher is not None:
+            return
+        self._stop.clear()
+
+        def _watch():
+            while not self._stop.wait(self.watch_interval):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"❌ Model watcher error: {e}")
+
+        self._watcher = threading.Thread(target=_watch, name="model-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=self.watch_interval + 1)
+            self._watcher = None
+
+# The shared instance
+registry = ModelRegistry()
+
+def save_model(model, path):
+    """Writes a model atomically so a watching registry never sees half a file."""
+    tmp_path = f"{path}.tmp"
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, path)
+
+def ensure_flat_artifacts(model_dir=MODEL_DIR, sample_rows=10000):
+    """
+    Exports model_*_flat.joblib for every model (and linear tier) whose flat
+    artifact is missing or older than its .pkl, checked against the first
+    `sample_rows` rows of the domain's dataset. Returns the paths written.
+    """
+    import warnings
+    import pandas as pd
+    written = []
+    for domain in DOMAINS:
+        for key in (domain, linear_tier(domain)):
+            path = os.path.join(model_dir, f"model_{key}.pkl")
+            flat_path = flat_path_for(path)
+            if not os.path.exists(path) or (os.path.exists(flat_path)
+                                            and os.path.getmtime(flat_path) >= os.path.getmtime(path)):
+                continue
+            features = get_model_features(domain)
+            csv_path = os.path.join(DATASET_DIR, DOMAIN_DATASETS[domain])
+            X_check = (pd.read_csv(csv_path, usecols=features, nrows=sample_rows)[features].to_numpy(np.float64)
+                       if os.path.exists(csv_path) else None)
+            try:
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")  # fitted with feature names, checked on arrays
+                    written.append(export_flat(joblib.load(path), path, X_check))
+                print(f"💾 Exported flat model to: {flat_path}")
+            except (TypeError, AssertionError) as e:
+                print(f"⚠️ No flat artifact for {path}: {e}")
+    return written
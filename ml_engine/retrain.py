@@ -0,0 +1,216 @@
+# Path: ml_engine/retrain.py
+# Incremental retraining from newly labeled outcome deltas.
+#
+# New outcome rows (same columns as dataset/*.csv, incl. dropout_status) go in
+# dataset/deltas/{domain}/*.csv. For each domain with pending deltas:
+#   1. warm-start the published model on the delta (+ a small replay sample of
+#      history); LogisticRegression is refit on all of history + the delta
+#   2. compare old vs new on rows neither model trained on (the champion's test
+#      split + every delta's held-out rows) and publish only if it didn't regress;
+#      a published model gets its linear tier (cascade) recalibrated against it
+#   3. append the delta to dataset/*.csv, add its held-out rows to the model's
+#      holdout record and move the files to deltas/applied/
+#
+# Usage (from ml_engine/):
+#   python retrain.py [domain ...]              # every domain with pending deltas
+#   python retrain.py engineering --delta a.csv # explicit delta files
+import argparse
+import glob
+import json
+import math
+import os
+import shutil
+import time
+import zlib
+from datetime import datetime, timezone
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score
+from train_models import (MODEL_DIR, DATA_DIR, DOMAIN_DATASETS, read_holdout, write_holdout,
+                          recalibrate_linear_tier)
+from predictor import save_model, get_model_features
+from flat_model import export_flat
+from model_costs import measure_costs, read_model_meta, write_model_meta
+
+DELTA_DIR = os.path.join(DATA_DIR, "deltas")
+RETRAIN_LOG = os.path.join(MODEL_DIR, "retrain_log.jsonl")
+
+# Max accuracy drop on the holdout that still publishes (0.005 = half a point)
+RETRAIN_MAX_REGRESSION = float(os.getenv("RETRAIN_MAX_REGRESSION", "0.005"))
+# History rows replayed per delta row, so new trees / coefficients don't forget the past
+RETRAIN_REPLAY_RATIO = float(os.getenv("RETRAIN_REPLAY_RATIO", "1.0"))
+# Trees added per run: proportional to the delta's share of history, at least this many
+RETRAIN_MIN_TREES = int(os.getenv("RETRAIN_MIN_TREES", "5"))
+# Past this ensemble size, ask for a full retrain instead of growing forever
+RETRAIN_MAX_TREES = int(os.getenv("RETRAIN_MAX_TREES", "400"))
+# 1 in N delta students (by a hash of student_id) is held out
+HOLDOUT_EVERY = 5
+
+def holdout_mask(student_ids):
+    """Held-out rows of a delta: the same students, however the delta is split into files."""
+    return np.array([zlib.crc32(str(s).encode()) % HOLDOUT_EVERY == 0 for s in student_ids])
+
+def pending_deltas(domain):
+    return sorted(glob.glob(os.path.join(DELTA_DIR, domain, "*.csv")))
+
+def load_labeled(path, features):
+    df = pd.read_csv(path)
+    missing = [c for c in features + ['student_id', 'dropout_status'] if c not in df.columns]
+    if missing:
+        raise ValueError(f"{path} is missing columns: {missing}")
+    return df
+
+def extra_trees(n_estimators, delta_rows, history_rows):
+    """Trees to add: the delta's share of the data, never fewer than RETRAIN_MIN_TREES."""
+    share = delta_rows / max(history_rows, 1)
+    return max(RETRAIN_MIN_TREES, math.ceil(n_estimators * share))
+
+def warm_start_update(model, X, y, delta_rows, history_rows):
+    """
+    Continues training `model` on (X, y) in place.
+    - RandomForest: adds trees grown on the new rows
+    - GradientBoosting: adds boosting stages fitted to the new rows' residuals
+    - LogisticRegression: a full refit (lbfgs lands on the optimum of whatever
+      it is given, so X must be all of history + the delta); starting from the
+      current coefficients only makes it converge sooner
+    """
+    if isinstance(model, (RandomForestClassifier, GradientBoostingClassifier)):
+        n_estimators = model.n_estimators + extra_trees(model.n_estimators, delta_rows, history_rows)
+        if n_estimators > RETRAIN_MAX_TREES:
+            raise RuntimeError(f"{type(model).__name__} would grow to {n_estimators} trees "
+                               f"(RETRAIN_MAX_TREES={RETRAIN_MAX_TREES}); run train_orchestrator.py")
+        model.set_params(warm_start=True, n_estimators=n_estimators)
+    elif isinstance(model, LogisticRegression):
+        model.set_params(warm_start=True)
+    else:
+        raise TypeError(f"Can't warm-start {type(model).__name__}")
+
+    model.fit(X, y)
+    # Leave the saved model behaving like a normal estimator
+    model.set_params(warm_start=False)
+    return model
+
+def retrain_domain(domain, delta_paths):
+    features = get_model_features(domain)
+    model_path = f"{MODEL_DIR}/model_{domain}.pkl"
+    history_path = f"{DATA_DIR}/{DOMAIN_DATASETS[domain]}"
+    if not os.path.exists(model_path):
+        print(f"❌ {domain}: no published model, run train_models.py first")
+        return None
+
+    print(f"\n{'='*70}")
+    print(f"🔁 Incremental retrain: {domain.upper()} ({len(delta_paths)} delta files)")
+    print(f"{'='*70}")
+    start = time.perf_counter()
+
+    # 1. Data: history + new rows. The holdout is every history row the
+    # published model never trained on (recorded when it was published)
+    history = pd.read_csv(history_path)
+    recorded = read_holdout(model_path)
+    if recorded is None:
+        print(f"❌ {domain}: {model_path} has no holdout record, run train_models.py once to create it")
+        return None
+    holdout_rows, dataset_rows = recorded
+    if dataset_rows != len(history):
+        print(f"❌ {domain}: {history_path} has {len(history)} rows, the model was trained on {dataset_rows}; "
+              f"run train_models.py")
+        return None
+    delta = pd.concat([load_labeled(p, features) for p in delta_paths], ignore_index=True)
+    history_holdout = np.zeros(len(history), dtype=bool)
+    history_holdout[holdout_rows] = True
+    delta_holdout = holdout_mask(delta['student_id'])
+    holdout = pd.concat([history[history_holdout], delta[delta_holdout]], ignore_index=True)
+    delta_train = delta[~delta_holdout]
+    history_train = history[~history_holdout]
+
+    old_model = joblib.load(model_path)
+    if isinstance(old_model, LogisticRegression):
+        # A linear refit needs all of history, not a replay sample
+        replay = history_train
+    else:
+        # Replay a slice of history so the new trees aren't fit to the delta alone
+        n_replay = min(len(history_train), int(len(delta_train) * RETRAIN_REPLAY_RATIO))
+        replay = history_train.sample(n=n_replay, random_state=len(history))
+    train = pd.concat([delta_train, replay], ignore_index=True)
+    print(f"   📦 {len(delta)} new rows ({len(delta_train)} train / {int(delta_holdout.sum())} holdout), "
+          f"{len(replay)} history rows replayed, holdout {len(holdout)}")
+
+    X_holdout, y_holdout = holdout[features], holdout['dropout_status']
+
+    # 2. Update a copy of the published model
+    old_score = accuracy_score(y_holdout, old_model.predict(X_holdout))
+    new_model = joblib.load(model_path)
+    fit_start = time.perf_counter()
+    try:
+        warm_start_update(new_model, train[features], train['dropout_status'],
+                          len(delta_train), len(history_train))
+    except (TypeError, RuntimeError) as e:
+        print(f"   ⚠️ {e}")
+        return None
+    fit_seconds = time.perf_counter() - fit_start
+    new_score = accuracy_score(y_holdout, new_model.predict(X_holdout))
+
+    # 3. Regression gate
+    published = new_score >= old_score - RETRAIN_MAX_REGRESSION
+    print(f"   🎯 Holdout accuracy {old_score:.2%} -> {new_score:.2%} (fit {fit_seconds:.1f}s)")
+    if published:
+        save_model(new_model, model_path)
+        print(f"💾 Published new version: {model_path}")
+        try:
+            export_flat(new_model, model_path, X_holdout)
+        except (TypeError, AssertionError) as e:
+            print(f"   ⚠️ Flat export skipped: {e}")
+        # Extra trees make it bigger and slower: keep model_*.meta.json honest
+        meta = read_model_meta(model_path) or {}
+        meta.update(costs=measure_costs(new_model, X_holdout), holdout_accuracy=round(new_score, 4),
+                    retrained_at=datetime.now(timezone.utc).isoformat(timespec='seconds'))
+        write_model_meta(model_path, meta)
+        # The cascade's margin was calibrated against the model just replaced
+        recalibrate_linear_tier(model_path, new_model, X_holdout)
+    else:
+        print(f"   🛑 Regressed by more than {RETRAIN_MAX_REGRESSION:.2%}, keeping the current model")
+
+    # 4. The labels are real either way: fold them into history for the next
+    # full retrain. Their held-out rows stay held out for the next update too.
+    delta.reindex(columns=history.columns).to_csv(history_path, mode='a', header=False, index=False)
+    write_holdout(model_path, np.concatenate([holdout_rows, len(history) + np.flatnonzero(delta_holdout)]),
+                  len(history) + len(delta))
+    applied_dir = os.path.join(DELTA_DIR, "applied", domain)
+    os.makedirs(applied_dir, exist_ok=True)
+    for path in delta_paths:
+        if os.path.abspath(path).startswith(os.path.abspath(os.path.join(DELTA_DIR, domain))):
+            shutil.move(path, os.path.join(applied_dir, os.path.basename(path)))
+
+    entry = {
+        "domain": domain, "at": datetime.now(timezone.utc).isoformat(timespec='seconds'), "delta_rows": len(delta),
+        "train_rows": len(train), "holdout_rows": len(holdout), "old_score": round(old_score, 4),
+        "new_score": round(new_score, 4), "published": bool(published),
+        "fit_seconds": round(fit_seconds, 2), "total_seconds": round(time.perf_counter() - start, 2),
+        "model": type(new_model).__name__, "n_estimators": getattr(new_model, 'n_estimators', None),
+    }
+    with open(RETRAIN_LOG, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+    return entry
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm-start retraining from labeled deltas")
+    parser.add_argument("domains", nargs="*", help=f"default: all of {', '.join(DOMAIN_DATASETS)}")
+    parser.add_argument("--delta", nargs="+", help="explicit delta CSVs (one domain only)")
+    args = parser.parse_args()
+
+    domains = args.domains or list(DOMAIN_DATASETS)
+    unknown = [d for d in domains if d not in DOMAIN_DATASETS]
+    if unknown:
+        parser.error(f"unknown domains: {unknown}")
+    if args.delta and len(domains) != 1:
+        parser.error("--delta needs exactly one domain")
+
+    for domain in domains:
+        paths = args.delta or pending_deltas(domain)
+        if not paths:
+            print(f"⏭️ {domain}: no pending deltas")
+            continue
+        retrain_domain(domain, paths)
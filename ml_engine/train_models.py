@@ -2,11 +2,19 @@ import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import train_test_split, GridSearchCV
+from sklearn.base import clone
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401 (enables HalvingGridSearchCV)
+from sklearn.model_selection import train_test_split, GridSearchCV, HalvingGridSearchCV
 from sklearn.metrics import accuracy_score, classification_report
 import joblib
 import os
+import time
 import warnings
+from predictor import save_model, get_model_features, DOMAIN_DATASETS  # dataset file per domain
+from flat_model import export_flat, flat_path_for
+from columnar import columnar_path, is_current, read_meta, load_features, load_column
+from cascade import risk_scores, calibrate_margin
+from model_costs import measure_costs, over_budget, read_model_meta, write_model_meta, meta_path_for
 
 # Suppress warnings for cleaner output
 warnings.filterwarnings("ignore")
@@ -16,7 +24,35 @@ DATA_DIR = "dataset"
 MODEL_DIR = "models"
 os.makedirs(MODEL_DIR, exist_ok=True)
 
+# "auto": use dataset/{name}.cols (columnar, memory-mapped) when it is up to
+# date with the CSV, else the CSV. "csv" / "npy" force one format.
+DATASET_FORMAT = os.getenv("DATASET_FORMAT", "auto")
+
+# Overrides every MODEL_ZOO entry's "search" when set ("grid" or "halving")
+TRAIN_SEARCH_MODE = os.getenv("TRAIN_SEARCH_MODE", "")
+
+# Cascade scoring: the linear tier's margin is the smallest one whose labels
+# match the champion's on this share of the test set
+CASCADE_TARGET_AGREEMENT = float(os.getenv("CASCADE_TARGET_AGREEMENT", "0.99"))
+
+# Serving budgets for the champion (0 = no limit): single-row and 10k-row
+# predict_proba latency, serialized size. Candidates over budget can't win.
+ARENA_ROW_LATENCY_MS = float(os.getenv("ARENA_ROW_LATENCY_MS", "0"))
+ARENA_BATCH_LATENCY_MS = float(os.getenv("ARENA_BATCH_LATENCY_MS", "0"))
+ARENA_MODEL_SIZE_MB = float(os.getenv("ARENA_MODEL_SIZE_MB", "0"))
+# Candidates this close to the best test accuracy count as tied: the cheapest
+# of them (10k-row latency) wins
+ARENA_ACCURACY_TOLERANCE = float(os.getenv("ARENA_ACCURACY_TOLERANCE", "0.002"))
+
 # --- THE ARENA: Define Models & Hyperparameters to Test ---
+# "search": "grid"    -> exhaustive GridSearchCV
+#           "halving" -> HalvingGridSearchCV: every candidate starts on a small
+#                        budget of `resource`, only the best third moves on.
+#                        "exhaust" sizes the first round so the last one uses
+#                        the full budget (all rows / all trees)
+# "early_stopping": estimator params applied in halving mode only
+# Every entry defaults to "grid"; opt in to halving per entry, for every entry
+# with TRAIN_SEARCH_MODE=halving, or per run with train_orchestrator.py --search
 MODEL_ZOO = {
     "RandomForest": {
         "model": RandomForestClassifier(random_state=42),
@@ -24,7 +60,10 @@ MODEL_ZOO = {
             'n_estimators': [50, 100, 200],
             'max_depth': [5, 10, 20, None],  # "Different branches/depth"
             'min_samples_split': [2, 5]
-        }
+        },
+        "search": "grid",
+        # With "halving": halve over forest size, n_estimators becomes the budget, up to 200
+        "halving": {"resource": "n_estimators", "max_resources": 200, "min_resources": "exhaust"}
     },
     "GradientBoosting": {
         "model": GradientBoostingClassifier(random_state=42),
@@ -32,100 +71,339 @@ MODEL_ZOO = {
             'n_estimators': [50, 100],
             'learning_rate': [0.01, 0.1, 0.2],
             'max_depth': [3, 5, 7]
-        }
+        },
+        "search": "grid",
+        "halving": {"resource": "n_samples", "min_resources": "exhaust"},
+        # With "halving": stop adding stages once 10% held-out loss stalls for 10 rounds
+        "early_stopping": {"n_iter_no_change": 10, "validation_fraction": 0.1}
     },
     "LogisticRegression": {
         "model": LogisticRegression(max_iter=1000, random_state=42),
         "params": {
             'C': [0.1, 1, 10]
-        }
+        },
+        "search": "grid"
     }
 }
 
+def search_mode(algo_name, mode=None):
+    return mode or TRAIN_SEARCH_MODE or MODEL_ZOO[algo_name].get("search", "grid")
+
+def build_search(algo_name, mode=None, n_jobs=-1):
+    """The (Halving)GridSearchCV for one MODEL_ZOO entry in the given mode."""
+    config = MODEL_ZOO[algo_name]
+    mode = search_mode(algo_name, mode)
+    if mode == "grid":
+        return GridSearchCV(config["model"], config["params"], cv=3, scoring='accuracy', n_jobs=n_jobs)
+    if mode != "halving":
+        raise ValueError(f"Unknown search mode: {mode}")
+
+    model = clone(config["model"]).set_params(**config.get("early_stopping", {}))
+    halving = dict(config.get("halving", {"resource": "n_samples", "min_resources": "exhaust"}))
+    params = dict(config["params"])
+    if halving["resource"] != "n_samples":
+        params.pop(halving["resource"], None)  # the budget itself isn't searched
+    return HalvingGridSearchCV(model, params, factor=3, cv=3, scoring='accuracy',
+                               n_jobs=n_jobs, random_state=42, **halving)
+
+def dataset_source(domain_file):
+    """Path training reads for this dataset: the .cols directory or the CSV."""
+    csv_path = f"{DATA_DIR}/{domain_file}"
+    cols_path = columnar_path(csv_path)
+    if DATASET_FORMAT == "npy" or (DATASET_FORMAT == "auto" and is_current(cols_path, csv_path)):
+        return cols_path
+    return csv_path
+
+def dataset_stamp(domain_file):
+    """Changes whenever the data training would read changes."""
+    path = dataset_source(domain_file)
+    if os.path.isdir(path):
+        path = os.path.join(path, "meta.json")
+    st = os.stat(path)
+    return (path, st.st_mtime_ns, st.st_size)
+
+def _read_features(path, features):
+    """(X, y) with only the feature + label columns, or None if features are missing."""
+    if os.path.isdir(path):
+        available = set(read_meta(path)["columns"])
+        if not set(features) <= available:
+            print(f"   ⚠️ Missing features! Found: {len(set(features) & available)}/{len(features)}")
+            return None
+        # Memory-mapped float32: nothing but these columns is ever read
+        X = pd.DataFrame(load_features(path, features), columns=features, copy=False)
+        y = pd.Series(load_column(path, 'dropout_status'), name='dropout_status')
+        return X, y
+
+    wanted = set(features) | {'dropout_status'}
+    df = pd.read_csv(path, usecols=lambda c: c in wanted)
+
+    # Validate Features
+    available_features = [f for f in features if f in df.columns]
+    if len(available_features) != len(features):
+        print(f"   ⚠️ Missing features! Found: {len(available_features)}/{len(features)}")
+        return None
+    return df[available_features], df['dropout_status']
+
+def load_domain_data(domain_file, features):
+    """Reads one dataset and returns the fixed 80/20 split (None if unusable)."""
+    file_path = dataset_source(domain_file)
+    if not os.path.exists(file_path):
+        print(f"❌ Error: File not found: {file_path}")
+        return None
+
+    data = _read_features(file_path, features)
+    if data is None:
+        return None
+    X, y = data
+    return train_test_split(X, y, test_size=0.2, random_state=42)
+
+def search_algorithm(algo_name, X_train, y_train, X_test, y_test, n_jobs=-1, mode=None):
+    """
+    Searches one MODEL_ZOO entry and scores its best estimator on the test set.
+    Returns a result dict (estimator, scores, params, timing).
+    """
+    start = time.perf_counter()
+    clf = build_search(algo_name, mode, n_jobs)
+    clf.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+
+    # Evaluate on Test Set
+    y_pred = clf.best_estimator_.predict(X_test)
+    return {
+        "algo": algo_name,
+        "search": search_mode(algo_name, mode),
+        "model": clf.best_estimator_,
+        "test_score": float(accuracy_score(y_test, y_pred)),
+        "cv_score": float(clf.best_score_),
+        "best_params": clf.best_params_,
+        "n_fits": len(clf.cv_results_['params']) * 3,
+        "seconds": fit_seconds,
+    }
+
+def arena_budgets():
+    return {"row_ms": ARENA_ROW_LATENCY_MS, "batch_ms": ARENA_BATCH_LATENCY_MS, "size_mb": ARENA_MODEL_SIZE_MB}
+
+def measure_candidates(results, X_test):
+    """Adds serving costs (size, load, latency) to every search result, one at a time."""
+    for result in results.values():
+        if "costs" not in result:
+            result["costs"] = measure_costs(result["model"], X_test)
+    return results
+
+def print_costs(results):
+    print(f"   {'algo':<20} {'test':>7} {'MB':>8} {'load ms':>8} {'row ms':>7} {'10k ms':>8}")
+    for algo_name in MODEL_ZOO:
+        r = results.get(algo_name)
+        if r is None or "costs" not in r:
+            continue
+        c = r["costs"]
+        flags = over_budget(c, arena_budgets())
+        note = f"  ⛔ over budget: {', '.join(flags)}" if flags else ""
+        print(f"   {algo_name:<20} {r['test_score']:>7.2%} {c['size_mb']:>8.2f} {c['load_ms']:>8.1f} "
+              f"{c['row_ms']:>7.2f} {c['batch_ms']:>8.1f}{note}")
+
+def pick_champion(results, budgets=None, tolerance=ARENA_ACCURACY_TOLERANCE):
+    """
+    Candidates over a budget are out (unless all are). Of the rest, those within
+    `tolerance` of the best test accuracy tie, and the cheapest to serve (10k-row
+    latency) wins. Results without "costs" only compete on accuracy; remaining
+    ties go to the earlier MODEL_ZOO entry.
+    """
+    candidates = [results[algo_name] for algo_name in MODEL_ZOO if results.get(algo_name) is not None]
+    if not candidates:
+        return None
+    budgets = arena_budgets() if budgets is None else budgets
+    fitting = [r for r in candidates if "costs" not in r or not over_budget(r["costs"], budgets)]
+    if not fitting:
+        print("   ⚠️ No candidate fits the serving budgets, picking on accuracy alone")
+        fitting = candidates
+
+    best_score = max(r["test_score"] for r in fitting)
+    tied = [r for r in fitting if r["test_score"] >= best_score - tolerance]
+    return min(tied, key=lambda r: (r["costs"]["batch_ms"] if "costs" in r else 0.0, -r["test_score"]))
+
+def model_meta(result, **extra):
+    """What model_*.meta.json records about one search result."""
+    return {
+        "algo": result["algo"],
+        "params": result["best_params"],
+        "test_accuracy": round(result["test_score"], 4),
+        "cv_accuracy": round(result["cv_score"], 4),
+        "costs": result.get("costs"),
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        **extra,
+    }
+
+def publish_meta(model_name, champion, results):
+    """model_*.meta.json: the champion's accuracy and serving costs, plus how it was picked."""
+    meta = model_meta(champion, selection={
+        "budgets": arena_budgets(),
+        "accuracy_tolerance": ARENA_ACCURACY_TOLERANCE,
+        "candidates": [{"algo": r["algo"], "test_accuracy": round(r["test_score"], 4), "costs": r.get("costs"),
+                        "over_budget": over_budget(r["costs"], arena_budgets()) if "costs" in r else []}
+                       for r in results.values()],
+    })
+    return write_model_meta(f"{MODEL_DIR}/{model_name}.pkl", meta)
+
+def holdout_path_for(model_path):
+    """models/model_med.pkl -> models/model_med.holdout.npz"""
+    return os.path.splitext(model_path)[0] + ".holdout.npz"
+
+def write_holdout(model_path, rows, dataset_rows):
+    """
+    Row positions (in dataset/*.csv) the model never trained on, and the row
+    count of that CSV. retrain.py only appends rows, so positions stay valid
+    and its regression gate compares old and new models on unseen rows.
+    """
+    path = holdout_path_for(model_path)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, rows=np.sort(np.asarray(rows, dtype=np.int64)), dataset_rows=int(dataset_rows))
+    os.replace(tmp_path, path)
+    return path
+
+def read_holdout(model_path):
+    """(rows, dataset_rows), or None for models published without a holdout record."""
+    path = holdout_path_for(model_path)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        return data["rows"], int(data["dataset_rows"])
+
+def publish_holdout(model_name, split):
+    """Records the test split of load_domain_data (its index = CSV row positions)."""
+    X_train, X_test, _, _ = split
+    return write_holdout(f"{MODEL_DIR}/{model_name}.pkl", X_test.index, len(X_train) + len(X_test))
+
+def publish_champion(model_name, best_model, X_test, y_test):
+    """Prints the final report, saves the model atomically and exports the flat arrays."""
+    # Final Report
+    y_final_pred = best_model.predict(X_test)
+    print("\n   --- Final Classification Report ---")
+    print(classification_report(y_test, y_final_pred, target_names=['Safe', 'Risk']))
+
+    # Save the Champion (atomic, so a running API can hot-swap it)
+    save_path = f"{MODEL_DIR}/{model_name}.pkl"
+    save_model(best_model, save_path)
+    print(f"💾 Saved best model to: {save_path}")
+
+    # Export flat NumPy arrays for MODEL_FORMAT=flat (checked against sklearn first)
+    try:
+        flat_path = export_flat(best_model, save_path, X_test)
+        print(f"💾 Exported flat model to: {flat_path}")
+    except (TypeError, AssertionError) as e:
+        print(f"   ⚠️ Flat export skipped: {e}")
+    return save_path
+
+def remove_linear_tier(linear_path, reason):
+    """Deletes a linear tier (and its meta + flat export): cascade mode then scores with the champion alone."""
+    removed = False
+    for path in (linear_path, meta_path_for(linear_path), flat_path_for(linear_path)):
+        if os.path.exists(path):
+            os.remove(path)
+            removed = True
+    print(f"   ℹ️ No linear tier ({reason}){', removed the old one' if removed else ''}")
+
+def publish_linear_tier(model_name, results, champion, X_test):
+    """
+    Keeps the LogisticRegression as {model_name}_linear.pkl, the first tier of
+    SCORING_MODE=cascade, with its margin calibrated against the champion.
+    Any existing tier is removed when there is no LogisticRegression result to
+    calibrate against this champion, or no margin reaches CASCADE_TARGET_AGREEMENT.
+    """
+    linear_path = f"{MODEL_DIR}/{model_name}_linear.pkl"
+    linear = results.get("LogisticRegression")
+    if linear is None:
+        # The old tier's margin was calibrated against the previous champion
+        remove_linear_tier(linear_path, "LogisticRegression has no result in this run")
+        return None
+    if linear["model"] is champion:
+        # Nothing cheaper to put in front of the champion
+        remove_linear_tier(linear_path, "the champion is linear")
+        return None
+
+    report = calibrate_linear_tier(linear["model"], linear_path, champion, X_test)
+    if report is None:
+        return None
+    write_model_meta(linear_path, model_meta(linear, cascade=report))
+    print(f"💾 Saved linear tier to: {linear_path} (margin {report['margin']}, "
+          f"{report['escalation_rate']:.0%} of rows escalated, {report['label_agreement']:.2%} label agreement)")
+    return linear_path
+
+def calibrate_linear_tier(model, linear_path, champion, X):
+    """
+    Sets model.cascade_margin_ against `champion` on X and saves it as the
+    tier. Returns the cascade report, or None (tier removed) when no margin
+    reaches CASCADE_TARGET_AGREEMENT.
+    """
+    report = calibrate_margin(risk_scores(model, X), risk_scores(champion, X), CASCADE_TARGET_AGREEMENT)
+    if report["label_agreement"] < CASCADE_TARGET_AGREEMENT:
+        remove_linear_tier(linear_path, f"best label agreement {report['label_agreement']:.2%} "
+                                        f"< target {CASCADE_TARGET_AGREEMENT:.2%}")
+        return None
+    model.cascade_margin_ = report["margin"]
+    save_model(model, linear_path)
+    return report
+
+def recalibrate_linear_tier(model_path, champion, X):
+    """
+    For a champion replaced outside a full training run (retrain.py): the
+    existing linear tier's margin is calibrated again against it on X, or
+    the tier is removed. None if there is no tier (or it was removed).
+    """
+    linear_path = f"{os.path.splitext(model_path)[0]}_linear.pkl"
+    if not os.path.exists(linear_path):
+        return None
+    report = calibrate_linear_tier(joblib.load(linear_path), linear_path, champion, X)
+    if report is None:
+        return None
+    meta = read_model_meta(linear_path) or {}
+    meta.update(cascade=report)
+    write_model_meta(linear_path, meta)
+    print(f"💾 Recalibrated linear tier {linear_path} (margin {report['margin']}, "
+          f"{report['escalation_rate']:.0%} of rows escalated, {report['label_agreement']:.2%} label agreement)")
+    return report
+
 def train_and_optimize(domain_file, model_name, features):
     print(f"\n{'='*70}")
     print(f"🔬 Optimizing Model for: {model_name.upper()}")
     print(f"{'='*70}")
     
     try:
-        # 1. Load Data
-        file_path = f"{DATA_DIR}/{domain_file}"
-        if not os.path.exists(file_path):
-            print(f"❌ Error: File not found: {file_path}")
+        # 1. Load + Split Data
+        split = load_domain_data(domain_file, features)
+        if split is None:
             return
+        X_train, X_test, y_train, y_test = split
 
-        df = pd.read_csv(file_path)
-        
-        # Validate Features
-        available_features = [f for f in features if f in df.columns]
-        if len(available_features) != len(features):
-            print(f"   ⚠️ Missing features! Found: {len(available_features)}/{len(features)}")
-            return
+        # 2. The Battle: Loop through algorithms
+        results = {}
+        for algo_name in MODEL_ZOO:
+            print(f"   👉 Testing {algo_name}...", end=" ")
+            results[algo_name] = search_algorithm(algo_name, X_train, y_train, X_test, y_test)
+            print(f"Score: {results[algo_name]['test_score']:.2%}")
 
-        X = df[available_features]
-        y = df['dropout_status']
-        
-        # 2. Split Data
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        
-        best_score = 0
-        best_model = None
-        best_algo_name = ""
+        # 3. What each candidate costs to serve
+        measure_candidates(results, X_test)
+        print_costs(results)
 
-        # 3. The Battle: Loop through algorithms
-        for algo_name, config in MODEL_ZOO.items():
-            print(f"   👉 Testing {algo_name}...", end=" ")
-            
-            # Grid Search for Hyperparameter Tuning
-            clf = GridSearchCV(config["model"], config["params"], cv=3, scoring='accuracy', n_jobs=-1)
-            clf.fit(X_train, y_train)
-            
-            # Evaluate on Test Set
-            y_pred = clf.best_estimator_.predict(X_test)
-            score = accuracy_score(y_test, y_pred)
-            
-            print(f"Score: {score:.2%}")
-            
-            # Check if this is the new champion
-            if score > best_score:
-                best_score = score
-                best_model = clf.best_estimator_
-                best_algo_name = algo_name
-
-        # 4. Announce Winner
-        print(f"\n🏆 WINNER: {best_algo_name} with {best_score:.2%} Accuracy")
-        print(f"   ⚙️ Best Params: {best_model.get_params()}")
-        
-        # 5. Final Report
-        y_final_pred = best_model.predict(X_test)
-        print("\n   --- Final Classification Report ---")
-        print(classification_report(y_test, y_final_pred, target_names=['Safe', 'Risk']))
+        # 4. Announce Winner (within the serving budgets)
+        best = pick_champion(results)
+        print(f"\n🏆 WINNER: {best['algo']} with {best['test_score']:.2%} Accuracy "
+              f"({best['costs']['batch_ms']:.1f} ms per 10k rows, {best['costs']['size_mb']:.2f} MB)")
+        print(f"   ⚙️ Best Params: {best['model'].get_params()}")
         
-        # 6. Save the Champion
-        save_path = f"{MODEL_DIR}/{model_name}.pkl"
-        joblib.dump(best_model, save_path)
-        print(f"💾 Saved best model to: {save_path}")
+        # 5. Report, Save + Export the Champion
+        publish_champion(model_name, best['model'], X_test, y_test)
+        publish_holdout(model_name, split)
+        publish_meta(model_name, best, results)
+        publish_linear_tier(model_name, results, best['model'], X_test)
         
     except Exception as e:
         print(f"❌ CRITICAL FAILURE: {e}")
 
 if __name__ == "__main__":
-    # 1. Engineering
-    train_and_optimize("engineering.csv", "model_engineering", 
-          ['attendance_rate', 'cgpa', 'study_hours_per_day', 'past_failures', 'project_score', 'coding_skills'])
-
-    # 2. Medical
-    train_and_optimize("medical.csv", "model_med", 
-          ['attendance_rate', 'cgpa', 'study_hours_per_day', 'past_failures', 'clinical_score', 'hospital_hours'])
-
-    # 3. CA
-    train_and_optimize("ca.csv", "model_ca", 
-          ['attendance_rate', 'cgpa', 'study_hours_per_day', 'past_failures', 'audit_hours', 'law_score'])
-
-    # 4. MBA
-    train_and_optimize("mba.csv", "model_mba", 
-          ['attendance_rate', 'cgpa', 'study_hours_per_day', 'past_failures', 'internship_score', 'case_studies'])
-
-    # 5. School
-    train_and_optimize("school.csv", "model_school", 
-          ['attendance_rate', 'cgpa', 'study_hours_per_day', 'past_failures', 'homework_rate', 'parent_meetings'])
\ No newline at end of file
+    # Sequential run, one domain after another.
+    # train_orchestrator.py runs the same searches in parallel and can resume.
+    for domain, domain_file in DOMAIN_DATASETS.items():
+        train_and_optimize(domain_file, f"model_{domain}", get_model_features(domain))
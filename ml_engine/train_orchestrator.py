@@ -0,0 +1,210 @@
+# Path: ml_engine/train_orchestrator.py
+# Runs every (domain, algorithm) grid search from train_models.py in one
+# shared process pool, checkpoints each finished search and publishes the
+# per-domain champions.
+#
+# Usage (from ml_engine/):
+#   python train_orchestrator.py [--cores N] [--search-jobs N] [--domains a b] [--algos A B]
+#                                [--search grid|halving] [--fresh] [--publish-partial]
+#
+# A domain is published only once every MODEL_ZOO algorithm has a result:
+# with --algos, the others are taken from their checkpoints.
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import joblib
+from sklearn.model_selection import ParameterGrid
+from train_models import (MODEL_ZOO, MODEL_DIR, DOMAIN_DATASETS, dataset_stamp, load_domain_data,
+                          search_algorithm, search_mode, pick_champion, publish_champion,
+                          publish_linear_tier, measure_candidates, print_costs, publish_meta,
+                          publish_holdout)
+from predictor import get_model_features
+
+CHECKPOINT_DIR = os.path.join(MODEL_DIR, "checkpoints")
+REPORT_PATH = os.path.join(MODEL_DIR, "training_report.json")
+
+# Total CPU cores the whole run may use (all searches together)
+TRAIN_CORE_BUDGET = int(os.getenv("TRAIN_CORE_BUDGET", str(os.cpu_count() or 1)))
+
+def checkpoint_path(domain, algo_name):
+    return os.path.join(CHECKPOINT_DIR, f"{domain}__{algo_name}.joblib")
+
+def task_fingerprint(domain, algo_name, mode=None):
+    """Changes when the dataset file or the algorithm's search space changes."""
+    config = MODEL_ZOO[algo_name]
+    key = repr((dataset_stamp(DOMAIN_DATASETS[domain]), get_model_features(domain),
+                sorted(config["model"].get_params().items()),
+                sorted(config["params"].items()), search_mode(algo_name, mode),
+                config.get("halving"), config.get("early_stopping")))
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+def load_checkpoint(domain, algo_name, mode=None):
+    path = checkpoint_path(domain, algo_name)
+    if not os.path.exists(path):
+        return None
+    try:
+        result = joblib.load(path)
+    except Exception as e:
+        print(f"   ⚠️ Unreadable checkpoint {path}, retraining: {e}")
+        return None
+    if result.get("fingerprint") != task_fingerprint(domain, algo_name, mode):
+        return None
+    return result
+
+def save_checkpoint(domain, result):
+    path = checkpoint_path(domain, result["algo"])
+    tmp_path = f"{path}.tmp"
+    joblib.dump(result, tmp_path)
+    os.replace(tmp_path, path)
+
+def estimated_cost(algo_name):
+    """Rough relative cost of a search: fits x trees per fit."""
+    grid = MODEL_ZOO[algo_name]["params"]
+    n_candidates = len(ParameterGrid(grid))
+    trees = grid.get('n_estimators', [1])
+    return n_candidates * 3 * sum(trees) / len(trees)
+
+def _limit_worker_threads():
+    # Each worker gets its cores from --search-jobs, not from BLAS/OpenMP threads
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(1)
+
+def _run_search(domain, algo_name, split, search_jobs, mode):
+    X_train, X_test, y_train, y_test = split
+    result = search_algorithm(algo_name, X_train, y_train, X_test, y_test, n_jobs=search_jobs, mode=mode)
+    result["domain"] = domain
+    result["fingerprint"] = task_fingerprint(domain, algo_name, mode)
+    return result
+
+def orchestrate(domains, algos, cores=TRAIN_CORE_BUDGET, search_jobs=1, fresh=False, mode=None,
+                publish_partial=False):
+    """
+    mode: None uses each MODEL_ZOO entry's "search", or force "grid" / "halving".
+    publish_partial: publish a domain even when some MODEL_ZOO algorithms have
+    no result (neither searched now nor checkpointed).
+    """
+    os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+    run_start = time.perf_counter()
+
+    # 1. Split every domain once; reuse finished searches from checkpoints
+    splits, results, todo = {}, {d: {} for d in domains}, []
+    for domain in domains:
+        split = load_domain_data(DOMAIN_DATASETS[domain], get_model_features(domain))
+        if split is None:
+            continue
+        splits[domain] = split
+        for algo_name in algos:
+            cached = None if fresh else load_checkpoint(domain, algo_name, mode)
+            if cached is not None:
+                cached["cached"] = True
+                results[domain][algo_name] = cached
+            else:
+                todo.append((domain, algo_name))
+
+    # 2. Longest searches first so the big RandomForest grids don't finish last
+    todo.sort(key=lambda task: estimated_cost(task[1]), reverse=True)
+    workers = max(1, cores // search_jobs)
+    print(f"🚀 {len(todo)} searches to run ({sum(len(r) for r in results.values())} from checkpoints) "
+          f"on {workers} workers x {search_jobs} cores")
+
+    failures = []
+    if todo:
+        with ProcessPoolExecutor(max_workers=min(workers, len(todo)), initializer=_limit_worker_threads) as pool:
+            futures = {pool.submit(_run_search, domain, algo_name, splits[domain], search_jobs, mode): (domain, algo_name)
+                       for domain, algo_name in todo}
+            for future in as_completed(futures):
+                domain, algo_name = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"❌ {domain}/{algo_name} failed: {e}")
+                    failures.append((domain, algo_name, str(e)))
+                    continue
+                # Checkpoint right away: a crash later doesn't lose this search
+                save_checkpoint(domain, result)
+                result["cached"] = False
+                results[domain][algo_name] = result
+                print(f"   ✅ {domain}/{algo_name}: {result['test_score']:.2%} in {result['seconds']:.1f}s")
+
+    # 3. Publish each domain whose champion was picked from the whole zoo.
+    # With --algos, the other algorithms come from their checkpoints: the
+    # champion of a subset must not replace a better model it never saw.
+    for domain in splits:
+        for algo_name in MODEL_ZOO:
+            if algo_name not in results[domain] and not (fresh and algo_name in algos):
+                cached = load_checkpoint(domain, algo_name, mode)
+                if cached is not None:
+                    cached["cached"] = True
+                    results[domain][algo_name] = cached
+        missing = [a for a in MODEL_ZOO if a not in results[domain]]
+        if missing and not publish_partial:
+            print(f"⚠️ {domain}: not published, no result for {', '.join(missing)} "
+                  f"(train them, or pass --publish-partial)")
+            continue
+        if missing:
+            print(f"⚠️ {domain}: publishing the best of {', '.join(results[domain])} only (--publish-partial)")
+        model_path = f"{MODEL_DIR}/model_{domain}.pkl"
+        if all(r["cached"] for r in results[domain].values()) and os.path.exists(model_path):
+            continue  # nothing new since the last publish
+        _, X_test, _, y_test = splits[domain]
+        # Measured here, one model at a time: timings from busy pool workers would be noise
+        print(f"\n📏 {domain.upper()} serving costs")
+        measure_candidates(results[domain], X_test)
+        print_costs(results[domain])
+        best = pick_champion(results[domain])
+        print(f"🏆 {domain.upper()} WINNER: {best['algo']} with {best['test_score']:.2%} Accuracy "
+              f"({best['costs']['batch_ms']:.1f} ms per 10k rows, {best['costs']['size_mb']:.2f} MB)")
+        publish_champion(f"model_{domain}", best["model"], X_test, y_test)
+        publish_holdout(f"model_{domain}", splits[domain])
+        publish_meta(f"model_{domain}", best, results[domain])
+        publish_linear_tier(f"model_{domain}", results[domain], best["model"], X_test)
+
+    write_report(results, failures, time.perf_counter() - run_start)
+    return results, failures
+
+def write_report(results, failures, wall_seconds):
+    rows = [{
+        "domain": domain, "algo": algo_name, "search": r.get("search", "grid"),
+        "seconds": round(r["seconds"], 2),
+        "n_fits": r["n_fits"], "cv_score": round(r["cv_score"], 4),
+        "test_score": round(r["test_score"], 4), "best_params": r["best_params"],
+        "from_checkpoint": r["cached"], "costs": r.get("costs"),
+    } for domain, by_algo in results.items() for algo_name, r in by_algo.items()]
+
+    report = {
+        "wall_seconds": round(wall_seconds, 2),
+        # Sum of search times: what a one-at-a-time run would have spent
+        "search_seconds": round(sum(r["seconds"] for r in rows if not r["from_checkpoint"]), 2),
+        "searches": rows,
+        "failures": [{"domain": d, "algo": a, "error": e} for d, a, e in failures],
+    }
+    with open(REPORT_PATH, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+
+    print(f"\n{'domain':<12} {'algo':<20} {'search':<8} {'fits':>5} {'seconds':>9} {'cv':>7} {'test':>7}")
+    for r in rows:
+        mark = " (ckpt)" if r["from_checkpoint"] else ""
+        print(f"{r['domain']:<12} {r['algo']:<20} {r['search']:<8} {r['n_fits']:>5} {r['seconds']:>9.1f} "
+              f"{r['cv_score']:>7.2%} {r['test_score']:>7.2%}{mark}")
+    print(f"⏱️ Wall clock {report['wall_seconds']:.1f}s for {report['search_seconds']:.1f}s of searches")
+    print(f"📝 Report: {REPORT_PATH}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel, resumable training for every domain")
+    parser.add_argument("--cores", type=int, default=TRAIN_CORE_BUDGET, help="global core budget")
+    parser.add_argument("--search-jobs", type=int, default=1, help="n_jobs inside each GridSearchCV")
+    parser.add_argument("--domains", nargs="+", default=list(DOMAIN_DATASETS), choices=list(DOMAIN_DATASETS))
+    parser.add_argument("--algos", nargs="+", default=list(MODEL_ZOO), choices=list(MODEL_ZOO))
+    parser.add_argument("--search", choices=["grid", "halving"], default=None,
+                        help="force one search mode (default: per MODEL_ZOO entry)")
+    parser.add_argument("--fresh", action="store_true", help="ignore checkpoints")
+    parser.add_argument("--publish-partial", action="store_true",
+                        help="publish even if some MODEL_ZOO algorithms have no result or checkpoint")
+    args = parser.parse_args()
+
+    _, failures = orchestrate(args.domains, args.algos, args.cores, max(1, args.search_jobs), args.fresh, args.search,
+                              args.publish_partial)
+    raise SystemExit(1 if failures else 0)
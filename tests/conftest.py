@@ -0,0 +1,39 @@
+# Path: tests/conftest.py
+# Lets the tests import backend.* / ml_engine.* when pytest is run from anywhere.
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Importing backend.db creates its tables: keep the real sql_app.db out of it
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """sessionmaker bound to a fresh SQLite file with every table created."""
+    from sqlalchemy.orm import sessionmaker
+    from backend.db.database import Base, create_db_engine
+
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+@pytest.fixture
+def tmp_registry(tmp_path, monkeypatch):
+    """The shared model registry, serving from an empty temp model dir."""
+    from backend.core.cache import prediction_cache
+    from ml_engine.predictor import registry
+
+    model_dir = tmp_path / "models"
+    model_dir.mkdir()
+    monkeypatch.setattr(registry, "model_dir", str(model_dir))
+    monkeypatch.setattr(registry, "model_format", "sklearn")
+    monkeypatch.setattr(registry, "attribution", False)
+    monkeypatch.setattr(registry, "watch_interval", 0)
+    monkeypatch.setattr(registry, "_entries", {})
+    monkeypatch.setattr(registry, "_checked_at", {})
+    prediction_cache.invalidate()
+    yield registry
+    prediction_cache.invalidate()
@@ -0,0 +1,56 @@
+# Path: tests/test_call_dispatcher.py
+# Calls cancelled by a clean shutdown are redialed on restart; calls a crash
+# left mid-dial go to review instead.
+import asyncio
+from ai_agent.agent_logic import CallDispatcher, RateLimiter
+from backend.db.crud import CallJobStore
+from backend.db.database import CallJobDB
+
+class HangingProvider:
+    """place_call() never returns, so the call stays "dialing"."""
+
+    def __init__(self):
+        self.dialed = asyncio.Event()
+
+    async def place_call(self, call_id, student_id):
+        self.dialed.set()
+        await asyncio.Event().wait()
+
+def dispatcher(store, provider):
+    return CallDispatcher(store, {"mock": (provider, RateLimiter(6000))}, "mock", concurrency=1)
+
+def status(session_factory, call_id):
+    with session_factory() as db:
+        return db.query(CallJobDB.status).filter(CallJobDB.call_id == call_id).scalar()
+
+def test_stop_requeues_calls_in_flight(session_factory):
+    store = CallJobStore(session_factory)
+
+    async def run():
+        provider = HangingProvider()
+        calls = dispatcher(store, provider)
+        await calls.start()
+        call_id = await calls.enqueue("S1")
+        await asyncio.wait_for(provider.dialed.wait(), 5)
+        assert status(session_factory, call_id) == "dialing"
+        await calls.stop()
+        return call_id
+
+    call_id = asyncio.run(run())
+    assert status(session_factory, call_id) == "queued"
+    assert [job['call_id'] for job in store.unfinished()] == [call_id]
+
+def test_crash_mid_dial_needs_review(session_factory):
+    store = CallJobStore(session_factory)
+    store.create("c1", "S1", "mock")
+    store.update("c1", status="dialing", attempts=1)
+
+    async def run():
+        calls = dispatcher(store, HangingProvider())
+        await calls.start()
+        depth = calls.depth
+        await calls.stop()
+        return depth
+
+    assert asyncio.run(run()) == 0
+    assert status(session_factory, "c1") == "needs_review"
@@ -0,0 +1,44 @@
+# Path: tests/test_call_summaries.py
+# A call summary delivered twice, or replayed after it was written, ends up
+# as exactly one call_logs row.
+import asyncio
+from functools import partial
+from ai_agent.webhook_handler import SummaryIngestor
+from backend.db.crud import insert_call_summaries
+from backend.db.database import CallLogDB
+
+def summary(call_id, student_id="S1"):
+    return {'call_id': call_id, 'student_id': student_id, 'transcript': "...",
+            'sentiment': "Neutral", 'action_item': "None"}
+
+def call_ids(session_factory):
+    with session_factory() as db:
+        return sorted(c for (c,) in db.query(CallLogDB.call_id))
+
+def test_insert_skips_duplicates_and_replays(session_factory):
+    write = partial(insert_call_summaries, session_factory=session_factory)
+    assert write([summary("c1"), summary("c2"), summary("c1")]) == 2
+    assert write([summary("c2"), summary("c3")]) == 1
+    assert call_ids(session_factory) == ["c1", "c2", "c3"]
+
+def test_summaries_without_call_id_are_all_kept(session_factory):
+    write = partial(insert_call_summaries, session_factory=session_factory)
+    assert write([summary(None), summary(None)]) == 2
+
+def test_ingestor_writes_one_row_per_call(session_factory):
+    write = partial(insert_call_summaries, session_factory=session_factory)
+
+    async def deliver():
+        ingestor = SummaryIngestor(write, max_items=2, flush_ms=10)
+        for call_id in ["c1", "c1", "c2", "c3"]:
+            await ingestor.submit(summary(call_id))
+        await ingestor.flush()
+        # Provider retries after the first delivery was already written
+        await ingestor.submit(summary("c1"))
+        await ingestor.close()
+        return ingestor.stats
+
+    stats = asyncio.run(deliver())
+    assert call_ids(session_factory) == ["c1", "c2", "c3"]
+    assert stats["written"] == 3
+    assert stats["duplicates"] == 2
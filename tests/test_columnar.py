@@ -0,0 +1,28 @@
+# Path: tests/test_columnar.py
+# A .cols directory is only used in place of the CSV it was built from.
+import os
+import pandas as pd
+from ml_engine.columnar import columnar_path, write_columnar, is_current, convert_csv
+
+def dataset(tmp_path):
+    csv_path = str(tmp_path / "engineering.csv")
+    df = pd.DataFrame({'cgpa': [7.5, 8.0], 'dropout_status': [0, 1]})
+    df.to_csv(csv_path, index=False)
+    return df, csv_path
+
+def test_stamped_cols_follow_their_csv(tmp_path):
+    df, csv_path = dataset(tmp_path)
+    cols = convert_csv(csv_path)
+    assert is_current(cols, csv_path)
+
+    df.assign(cgpa=[1.0, 2.0]).to_csv(csv_path, index=False)
+    os.utime(csv_path, ns=(0, 0))
+    assert not is_current(cols, csv_path)
+
+def test_unstamped_cols_are_stale_next_to_a_csv(tmp_path):
+    df, csv_path = dataset(tmp_path)
+    cols = write_columnar(df, columnar_path(csv_path))
+    assert not is_current(cols, csv_path)
+
+    os.remove(csv_path)
+    assert is_current(cols, csv_path)
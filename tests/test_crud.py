@@ -0,0 +1,33 @@
+# Path: tests/test_crud.py
+# Bulk writes against a throwaway SQLite file.
+from backend.db.crud import bulk_upsert_students, STUDENT_COLUMNS
+from backend.db.database import StudentDB
+
+def student(student_id, risk_score, name="A"):
+    row = dict.fromkeys(STUDENT_COLUMNS)
+    row.update(student_id=student_id, name=name, risk_score=risk_score, financial_flag=False)
+    return row
+
+def test_upsert_overwrites_existing_students(session_factory):
+    with session_factory() as db:
+        bulk_upsert_students(db, [student("S1", 10), student("S2", 20)])
+        db.commit()
+        bulk_upsert_students(db, [student("S1", 90)])
+        db.commit()
+        scores = dict(db.query(StudentDB.student_id, StudentDB.risk_score))
+    assert scores == {"S1": 90, "S2": 20}
+
+def test_duplicate_ids_in_one_batch_keep_the_last_row(session_factory):
+    records = [student("S1", 10, "first"), student("S2", 20), student("S1", 30, "last")]
+    with session_factory() as db:
+        assert bulk_upsert_students(db, records, batch_size=10) == 3
+        db.commit()
+        rows = db.query(StudentDB.student_id, StudentDB.risk_score, StudentDB.name).all()
+    assert sorted(rows) == [("S1", 30, "last"), ("S2", 20, "A")]
+
+def test_duplicate_ids_across_batches_keep_the_last_row(session_factory):
+    records = [student("S1", 10), student("S1", 20), student("S1", 30)]
+    with session_factory() as db:
+        bulk_upsert_students(db, records, batch_size=2)
+        db.commit()
+        assert db.query(StudentDB.risk_score).scalar() == 30
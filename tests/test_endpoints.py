@@ -0,0 +1,31 @@
+# Path: tests/test_endpoints.py
+# API behaviour with the router mounted on a bare app (no startup hooks).
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from backend.api.v1.endpoints import router
+
+CSV = b"student_id,name,attendance_rate,cgpa\nS1,A,0.9,8.1\nS2,B,0.4,5.2\n"
+
+@pytest.fixture
+def client(tmp_registry):
+    app = FastAPI()
+    app.include_router(router, prefix="/api/v1")
+    with TestClient(app) as client:
+        yield client
+
+def test_escalate_without_model_is_reported(client):
+    response = client.post("/api/v1/predict/engineering?escalate=true",
+                           files={"file": ("students.csv", CSV, "text/csv")})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total_students"] == 2
+    assert body["escalation_candidates"] == 0
+    assert "No engineering model" in body["escalation_skipped"]
+
+@pytest.mark.parametrize("domain", ["physics", "engineering"])
+def test_jobs_need_a_known_domain_with_a_model(client, domain):
+    # tmp_registry has no models at all, so "engineering" has no model either
+    response = client.post(f"/api/v1/jobs/{domain}", files={"file": ("students.csv", CSV, "text/csv")})
+    assert response.status_code == 404
+    assert domain in response.json()["detail"]
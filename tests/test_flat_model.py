@@ -0,0 +1,96 @@
+# Path: tests/test_flat_model.py
+# The flat engine must score exactly like sklearn: same probabilities and the
+# same int(p * 100) risk scores, NaN features included.
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+from ml_engine.flat_model import compile_model, check_parity, export_flat, load_flat, flat_path_for
+
+N_FEATURES = 6
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(600, N_FEATURES))
+    y = (X[:, 0] + 0.5 * X[:, 1] - X[:, 2] + rng.normal(scale=0.5, size=len(X)) > 0).astype(int)
+    return X, y
+
+def with_nans(X, seed=1):
+    X = X.copy()
+    rng = np.random.default_rng(seed)
+    X[rng.random(X.shape) < 0.15] = np.nan
+    X[:5] = np.nan  # whole rows missing too
+    return X
+
+MODELS = {
+    "forest": lambda: RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0),
+    "boosting": lambda: GradientBoostingClassifier(n_estimators=30, max_depth=3, random_state=0),
+    "linear": lambda: LogisticRegression(max_iter=1000),
+}
+
+@pytest.mark.parametrize("name", MODELS)
+def test_predict_proba_parity(name, data):
+    X, y = data
+    model = MODELS[name]().fit(X, y)
+    flat = compile_model(model)
+
+    assert flat.kind == name
+    np.testing.assert_allclose(flat.predict_proba(X), model.predict_proba(X), rtol=0, atol=1e-9)
+    np.testing.assert_array_equal(flat.predict(X), model.predict(X))
+    _, mismatches = check_parity(model, flat, X)
+    assert mismatches == 0
+
+def test_forest_parity_with_nan_rows(data):
+    # Trained on missing values, so the trees learn where NaNs go
+    X, y = data
+    X_nan = with_nans(X)
+    model = RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0).fit(X_nan, y)
+    flat = compile_model(model)
+
+    assert flat.missing_left.any()
+    np.testing.assert_allclose(flat.predict_proba(X_nan), model.predict_proba(X_nan), rtol=0, atol=1e-9)
+    check_parity(model, flat, X_nan)
+
+def test_forest_parity_nan_rows_unseen_in_training(data):
+    X, y = data
+    model = RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0).fit(X, y)
+    X_nan = with_nans(X, seed=2)
+    np.testing.assert_allclose(compile_model(model).predict_proba(X_nan), model.predict_proba(X_nan),
+                               rtol=0, atol=1e-9)
+
+def test_parity_across_eval_blocks(data, monkeypatch):
+    # Rows are scored in EVAL_BLOCK_ROWS blocks; block edges must not change results
+    import ml_engine.flat_model as flat_model
+    monkeypatch.setattr(flat_model, "EVAL_BLOCK_ROWS", 64)
+    X, y = data
+    model = GradientBoostingClassifier(n_estimators=30, max_depth=3, random_state=0).fit(X, y)
+    check_parity(model, compile_model(model), X)
+
+def test_check_parity_catches_disagreement(data):
+    X, y = data
+    model = RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0).fit(X, y)
+    flat = compile_model(model)
+    flat.value = 1.0 - flat.value
+    with pytest.raises(AssertionError):
+        check_parity(model, flat, X)
+
+def test_export_and_mmap_load_keep_parity(data, tmp_path):
+    X, y = data
+    model = GradientBoostingClassifier(n_estimators=30, max_depth=3, random_state=0).fit(X, y)
+    model_path = str(tmp_path / "model_test.pkl")
+    assert export_flat(model, model_path, X) == flat_path_for(model_path)
+
+    for mmap_mode in (None, "r"):
+        flat = load_flat(flat_path_for(model_path), mmap_mode=mmap_mode)
+        check_parity(model, flat, X)
+
+def test_rejects_unsupported_models(data):
+    X, y = data
+    with pytest.raises(TypeError):
+        compile_model(RandomForestClassifier())  # not fitted
+    with pytest.raises(TypeError):
+        compile_model(object())
+    three_classes = LogisticRegression(max_iter=1000).fit(X, np.arange(len(X)) % 3)
+    with pytest.raises(TypeError):
+        compile_model(three_classes)
@@ -0,0 +1,111 @@
+# Path: tests/test_jobs.py
+# Background scoring jobs against a throwaway SQLite file: resuming after a
+# restart, and chunks someone else already committed.
+import asyncio
+import os
+from datetime import timedelta
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from backend.core import jobs
+from backend.core.jobs import JobRunner, eta_seconds, chunk_path, upload_path, read_results
+from backend.core.scoring import score_batch
+from backend.db.crud import PredictionJobStore
+from backend.db.database import StudentDB
+from ml_engine.predictor import get_model_features
+
+DOMAIN = "engineering"
+CHUNK_ROWS = 10
+
+@pytest.fixture
+def store(session_factory, tmp_registry, tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_DIR", str(tmp_path / "jobs"))
+    features = get_model_features(DOMAIN)
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, len(features)))
+    model = LogisticRegression().fit(X, (X[:, 0] > 0).astype(int))
+    joblib.dump(model, tmp_registry.model_path(DOMAIN))
+    return PredictionJobStore(session_factory, persist_students=True)
+
+def upload(job_id, rows=25):
+    """Writes a job's upload.csv and returns its DataFrame."""
+    features = get_model_features(DOMAIN)
+    df = pd.DataFrame(np.random.default_rng(1).normal(size=(rows, len(features))), columns=features)
+    df.insert(0, 'student_id', [f"S{i}" for i in range(rows)])
+    df.insert(1, 'name', "A")
+    os.makedirs(os.path.dirname(upload_path(job_id)))
+    df.to_csv(upload_path(job_id), index=False)
+    return df
+
+def student_ids(session_factory):
+    with session_factory() as db:
+        return sorted(s for (s,) in db.query(StudentDB.student_id))
+
+def test_resume_starts_at_the_first_uncommitted_chunk(store, session_factory):
+    df = upload("j1")
+    store.create("j1", DOMAIN, CHUNK_ROWS, total_rows=len(df))
+    # Committed before the "restart": chunk 0, whose file was never written
+    assert store.commit_chunk("j1", 0, score_batch(df.iloc[:CHUNK_ROWS], DOMAIN))
+    store.mark_running("j1", rows_done=CHUNK_ROWS)
+
+    runner = JobRunner(store, chunk_rows=CHUNK_ROWS)
+    asyncio.run(runner.run("j1"))
+
+    job = store.get("j1")
+    assert job['status'] == "completed"
+    assert (job['chunks_done'], job['rows_done'], job['total_rows']) == (3, 25, 25)
+    assert not os.path.exists(chunk_path("j1", 0))  # not scored again
+    assert os.path.exists(chunk_path("j1", 2))
+    assert [r['student_id'] for r in read_results(job, CHUNK_ROWS, 100)] == [f"S{i}" for i in range(10, 25)]
+    assert len(student_ids(session_factory)) == 25
+
+def test_replayed_chunk_is_not_committed_twice(store, session_factory):
+    df = upload("j2")
+    store.create("j2", DOMAIN, CHUNK_ROWS, total_rows=len(df))
+    results = score_batch(df.iloc[:CHUNK_ROWS], DOMAIN)
+    assert store.commit_chunk("j2", 0, results)
+    assert not store.commit_chunk("j2", 0, results)
+    job = store.get("j2")
+    assert (job['chunks_done'], job['rows_done']) == (1, CHUNK_ROWS)
+
+def test_runner_stops_when_a_chunk_was_committed_elsewhere(store, session_factory):
+    df = upload("j3")
+    store.create("j3", DOMAIN, CHUNK_ROWS, total_rows=len(df))
+
+    class StaleStore(PredictionJobStore):
+        """Another worker commits chunk 0 right after this one read the job."""
+
+        def mark_running(self, job_id, rows_done):
+            super().mark_running(job_id, rows_done)
+            super().commit_chunk(job_id, 0, score_batch(df.iloc[:CHUNK_ROWS], DOMAIN))
+
+    stale = StaleStore(session_factory, persist_students=True)
+    asyncio.run(JobRunner(stale, chunk_rows=CHUNK_ROWS).run("j3"))
+
+    job = store.get("j3")
+    assert job['status'] == "running"  # left for the worker that owns it
+    assert (job['chunks_done'], job['rows_done']) == (1, CHUNK_ROWS)
+
+def test_job_without_a_model_stores_no_mock_scores(store, session_factory, tmp_registry):
+    upload("j4")
+    store.create("j4", DOMAIN, CHUNK_ROWS)
+    os.remove(tmp_registry.model_path(DOMAIN))
+
+    with pytest.raises(ValueError, match="No engineering model"):
+        asyncio.run(JobRunner(store, chunk_rows=CHUNK_ROWS).run("j4"))
+    assert store.get("j4")['chunks_done'] == 0
+    assert student_ids(session_factory) == []
+
+def test_timestamps_come_back_utc_aware(session_factory):
+    store = PredictionJobStore(session_factory, persist_students=False)
+    store.create("j1", DOMAIN, chunk_rows=10, total_rows=100)
+    store.mark_running("j1", rows_done=0)
+    job = store.get("j1")
+    assert job['created_at'].utcoffset() == timedelta(0)
+    assert job['started_at'].utcoffset() == timedelta(0)
+
+    job['rows_done'] = 25
+    eta = eta_seconds(job, now=job['started_at'] + timedelta(seconds=10))
+    assert eta == 30
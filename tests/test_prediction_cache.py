@@ -0,0 +1,54 @@
+# Path: tests/test_prediction_cache.py
+# A retrained model must never be served the previous model's cached scores:
+# a registry reload has to clear both the per-row and the per-file level.
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from backend.core.cache import prediction_cache
+from backend.core.scoring import score_batch
+from ml_engine.predictor import get_model_features
+
+DOMAIN = "engineering"
+
+def constant_model(label, n_features):
+    """LogisticRegression that scores every row near 100 (label=1) or near 0."""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, n_features))
+    y = np.full(200, label)
+    y[:2] = 1 - label  # needs both classes to fit
+    return LogisticRegression().fit(X, y)
+
+def test_reload_clears_row_and_file_levels(tmp_registry):
+    features = get_model_features(DOMAIN)
+    df = pd.DataFrame(np.random.default_rng(1).normal(size=(50, len(features))), columns=features)
+
+    joblib.dump(constant_model(1, len(features)), tmp_registry.model_path(DOMAIN))
+    before = score_batch(df, DOMAIN)["risk_score"].to_numpy()
+    version = tmp_registry.version(DOMAIN)
+    prediction_cache.put_file(DOMAIN, version, "upload-sha", before)
+    assert prediction_cache.stats()["rows"] == len(df)
+    assert prediction_cache.get_file(DOMAIN, version, "upload-sha") is not None
+
+    # Retrain: swap the file and reload, as the watcher would
+    joblib.dump(constant_model(0, len(features)), tmp_registry.model_path(DOMAIN))
+    assert tmp_registry.load(DOMAIN) is not None
+
+    assert prediction_cache.stats()["rows"] == 0
+    assert prediction_cache.stats()["files"] == 0
+    assert prediction_cache.get_file(DOMAIN, version, "upload-sha") is None
+
+    after = score_batch(df, DOMAIN)["risk_score"].to_numpy()
+    assert before.min() > 80
+    assert after.max() < 20
+
+def test_reload_keeps_other_domains(tmp_registry):
+    features = get_model_features(DOMAIN)
+    prediction_cache.put_file("med", "v1", "upload-sha", np.array([1, 2, 3]))
+
+    joblib.dump(constant_model(1, len(features)), tmp_registry.model_path(DOMAIN))
+    tmp_registry.load(DOMAIN)
+    joblib.dump(constant_model(0, len(features)), tmp_registry.model_path(DOMAIN))
+    tmp_registry.load(DOMAIN)
+
+    assert prediction_cache.get_file("med", "v1", "upload-sha") is not None
@@ -0,0 +1,79 @@
+# Path: tests/test_scoring.py
+# Batch scoring must match per-row scoring, and blank cells must not push a
+# whole chunk into the slow per-row retry.
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+from backend.core.scoring import predict_risk_scores, accepts_nan
+from ml_engine.flat_model import compile_model
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(500, 5))
+    y = (X[:, 0] - X[:, 1] > 0).astype(int)
+    return X, y
+
+MODELS = {
+    "forest": lambda: RandomForestClassifier(n_estimators=10, max_depth=5, random_state=0),
+    "boosting": lambda: GradientBoostingClassifier(n_estimators=20, random_state=0),
+    "linear": lambda: LogisticRegression(),
+}
+
+class CountingModel:
+    """Wraps a model and counts predict_proba calls."""
+
+    def __init__(self, model):
+        self.model = model
+        self.calls = 0
+
+    def _get_tags(self):
+        return {'allow_nan': accepts_nan(self.model)}
+
+    def predict_proba(self, X):
+        self.calls += 1
+        return self.model.predict_proba(X)
+
+@pytest.mark.parametrize("name", MODELS)
+def test_batch_matches_per_row(name, data):
+    X, y = data
+    model = MODELS[name]().fit(X, y)
+    expected = [int(model.predict_proba(X[i:i + 1])[0][1] * 100) for i in range(len(X))]
+    np.testing.assert_array_equal(predict_risk_scores(model, X, chunk_size=128), expected)
+
+@pytest.mark.parametrize("name", MODELS)
+@pytest.mark.parametrize("flat", [False, True])
+def test_nan_rows_skip_the_per_row_retry(name, flat, data):
+    X, y = data
+    model = MODELS[name]().fit(X, y)
+    model = compile_model(model) if flat else model
+    X_nan = X.copy()
+    X_nan[7, 2] = np.nan
+
+    counting = CountingModel(model)
+    scores = predict_risk_scores(counting, X_nan, chunk_size=len(X))
+    assert counting.calls == 1  # one chunk, no per-row fallback
+
+    clean = np.delete(np.arange(len(X)), 7)
+    np.testing.assert_array_equal(scores[clean], predict_risk_scores(model, X[clean]))
+    if accepts_nan(model):
+        assert scores[7] == int(model.predict_proba(X_nan[7:8])[0][1] * 100)
+    else:
+        assert scores[7] == 50  # "Magic 50" fallback
+
+def test_invalid_rows_get_the_fallback(data):
+    X, y = data
+    model = LogisticRegression().fit(X, y)
+    invalid = np.zeros(len(X), dtype=bool)
+    invalid[[0, 3]] = True
+    scores = predict_risk_scores(model, X, invalid)
+    assert scores[0] == scores[3] == 50
+
+def test_nan_support_per_model_type(data):
+    X, y = data
+    assert accepts_nan(MODELS["forest"]().fit(X, y))
+    assert not accepts_nan(MODELS["boosting"]().fit(X, y))
+    assert not accepts_nan(MODELS["linear"]().fit(X, y))
+    assert compile_model(MODELS["forest"]().fit(X, y)).allow_nan
+    assert not compile_model(MODELS["linear"]().fit(X, y)).allow_nan